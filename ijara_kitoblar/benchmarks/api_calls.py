@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Telegram API Calls Benchmark
+Har bir foydalanuvchi harakati (buyruq yoki tugma) uchun yuboriladigan
+Bot API so'rovlari soni, hajmi va handler vaqtini o'lchash.
+
+Telegram ga haqiqiy so'rov yuborilmaydi - so'rovlar RecordingSession da yoziladi.
+Database sifatida vaqtinchalik SQLite fayl ishlatiladi.
+
+Ishlatish:
+    python -m ijara_kitoblar.benchmarks.api_calls
+    python -m ijara_kitoblar.benchmarks.api_calls --repeat 200 --json api_calls.json
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Config import qilinishidan oldin - vaqtinchalik SQLite database
+os.environ['DB_TYPE'] = 'sqlite'
+os.environ['SQLITE_DB'] = os.path.join(tempfile.mkdtemp(prefix='ijara_kitoblar_'), 'api_calls.db')
+
+# bot.handlers importlari main.py dagidek ishlashi uchun
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import SendMessage
+from aiogram.types import Update, Message, CallbackQuery, Chat, User
+
+from ijara_kitoblar.database.db_manager import DatabaseManager
+from ijara_kitoblar.database.admin_manager import AdminManager
+from ijara_kitoblar.database.migrations import upgrade_database
+from ijara_kitoblar.benchmarks.common import percentiles, write_report
+
+from bot.handlers import registration, subscription, admin
+from bot.utils import rendering
+
+USER_ID = 1001
+ADMIN_ID = 1002
+
+# (nom, turi, matn yoki callback_data, telegram_id)
+SCENARIOS = [
+    ("/subscription", 'message', "/subscription", USER_ID),
+    ("/mysubscription", 'message', "/mysubscription", USER_ID),
+    ("tarif: Free", 'callback', "plan_Free", USER_ID),
+    ("tarif: Money", 'callback', "plan_Money", USER_ID),
+    ("tarif: Premium", 'callback', "plan_Premium", USER_ID),
+    ("/admin", 'message', "/admin", ADMIN_ID),
+    ("admin: statistika", 'callback', "admin_stats", ADMIN_ID),
+    ("admin: orqaga", 'callback', "admin_back", ADMIN_ID),
+    ("admin: adminlar", 'callback', "super_admin_list", ADMIN_ID),
+]
+
+
+class RecordingSession(BaseSession):
+    """Bot API so'rovlarini tarmoqqa yubormasdan yozib borish"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []  # (method nomi, payload hajmi baytlarda)
+        self._message_id = 0
+
+    async def make_request(self, bot, method, timeout=None):
+        # AiohttpSession dagidek form maydonlariga aylantirib hajmini hisoblash
+        files = {}
+        size = 0
+        for key, value in method.model_dump(warnings=False).items():
+            value = self.prepare_value(value, bot=bot, files=files)
+            if value is not None:
+                size += len(key) + len(str(value).encode('utf-8'))
+        self.calls.append((type(method).__name__, size))
+
+        if isinstance(method, SendMessage):
+            self._message_id += 1
+            return Message(
+                message_id=self._message_id,
+                date=datetime.now(),
+                chat=Chat(id=method.chat_id, type='private'),
+                text=method.text
+            )
+        return True
+
+    async def stream_content(self, *args, **kwargs):
+        raise NotImplementedError
+        yield b''
+
+    async def close(self):
+        pass
+
+
+def build_update(update_id: int, kind: str, value: str, telegram_id: int) -> Update:
+    """Sintetik Update (xabar yoki tugma bosilishi)"""
+    user = User(id=telegram_id, is_bot=False, first_name="Test")
+    message = Message(
+        message_id=update_id,
+        date=datetime.now(),
+        chat=Chat(id=telegram_id, type='private'),
+        from_user=user,
+        text=value if kind == 'message' else "..."
+    )
+
+    if kind == 'message':
+        return Update(update_id=update_id, message=message)
+
+    return Update(update_id=update_id, callback_query=CallbackQuery(
+        id=str(update_id), from_user=user, chat_instance="bench", message=message, data=value
+    ))
+
+
+def seed_database():
+    """Benchmark foydalanuvchisi va super adminni yaratish"""
+    upgrade_database()
+
+    db = DatabaseManager()
+    db.create_user("Aziz", "Karimov", "+998901112233", 2000, "TATU", telegram_id=USER_ID)
+    admin_user, _ = db.create_user("Admin", "Adminov", "+998901112244", 1990, "TATU", telegram_id=ADMIN_ID)
+    db.close()
+
+    admin_manager = AdminManager()
+    admin_manager.add_super_admin(ADMIN_ID, admin_user.library_id, admin_user.full_name)
+    admin_manager.close()
+
+
+async def run_scenarios(repeat: int) -> list:
+    """Har bir stsenariyni repeat marta bajarib API chaqiruvlarini sanash"""
+    session = RecordingSession()
+    bot = Bot(token="42:BENCHMARK", session=session)
+
+    dp = Dispatcher(storage=MemoryStorage())
+    dp.include_router(registration.router)
+    dp.include_router(subscription.router)
+    dp.include_router(admin.router)
+
+    results = []
+    update_id = 0
+
+    for name, kind, value, telegram_id in SCENARIOS:
+        latencies = []
+        calls = []
+
+        for _ in range(repeat):
+            update_id += 1
+            update = build_update(update_id, kind, value, telegram_id)
+            session.calls.clear()
+
+            started = time.perf_counter()
+            await dp.feed_update(bot, update)
+            latencies.append(time.perf_counter() - started)
+            calls.append(list(session.calls))
+
+        last = calls[-1]
+        results.append({
+            'scenario': name,
+            'api_calls': len(last),
+            'methods': [method for method, _ in last],
+            'payload_bytes': sum(size for _, size in last),
+            'handler_latency_ms': percentiles(latencies)
+        })
+
+    await bot.session.close()
+    return results
+
+
+def time_keyboard_rendering(iterations: int) -> dict:
+    """Klaviaturani har safar qurish va tayyor variantni olish vaqtlari"""
+    plans = list(rendering.SUBSCRIPTION_KEYBOARDS)
+
+    def measure(func):
+        started = time.perf_counter()
+        for i in range(iterations):
+            func(plans[i % len(plans)])
+        return round((time.perf_counter() - started) / iterations * 1_000_000, 3)
+
+    return {
+        'build_us': measure(rendering.build_subscription_keyboard),
+        'cached_us': measure(rendering.get_subscription_keyboard)
+    }
+
+
+def print_results(results: list, rendering_times: dict):
+    """Natijalarni jadval ko'rinishida chiqarish"""
+    print("=" * 92)
+    print(f"{'Harakat':<22} {'API':>4} {'bayt':>7} {'p50 ms':>8} {'p95 ms':>8}  Metodlar")
+    print("-" * 92)
+    for r in results:
+        latency = r['handler_latency_ms']
+        print(f"{r['scenario']:<22} {r['api_calls']:>4} {r['payload_bytes']:>7} "
+              f"{latency['p50']:>8} {latency['p95']:>8}  {', '.join(r['methods'])}")
+    print("-" * 92)
+    print(f"⌨️ Tarif klaviaturasi: qurish {rendering_times['build_us']} µs, "
+          f"tayyor {rendering_times['cached_us']} µs")
+    print("=" * 92)
+
+
+def main():
+    """Asosiy funksiya"""
+    parser = argparse.ArgumentParser(description="Har bir harakat uchun Telegram API chaqiruvlari")
+    parser.add_argument('--repeat', type=int, default=50, help="Har bir stsenariy takrorlari")
+    parser.add_argument('--json', dest='json_path', help="Natijani JSON faylga yozish")
+    args = parser.parse_args()
+
+    seed_database()
+    results = asyncio.run(run_scenarios(args.repeat))
+    rendering_times = time_keyboard_rendering(10_000)
+
+    print_results(results, rendering_times)
+
+    if args.json_path:
+        write_report({'repeat': args.repeat, 'scenarios': results,
+                      'keyboard_rendering': rendering_times}, args.json_path)
+        print(f"💾 Natija saqlandi: {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
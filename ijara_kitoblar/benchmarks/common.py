@@ -0,0 +1,48 @@
+"""
+Benchmark Utils - Benchmarklar uchun umumiy yordamchi funksiyalar
+"""
+import json
+import math
+import time
+from contextlib import contextmanager
+from typing import List
+
+
+def percentiles(values: List[float]) -> dict:
+    """
+    p50/p95/p99 va max ni millisekundlarda hisoblash
+
+    Args:
+        values: Soniyalardagi o'lchovlar
+    """
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+    ordered = sorted(values)
+
+    def rank(p):
+        # Nearest-rank: qiymatlarning kamida p qismi shu qiymatdan katta emas
+        return round(ordered[max(0, math.ceil(p * len(ordered)) - 1)] * 1000, 3)
+
+    return {
+        "p50": rank(0.50),
+        "p95": rank(0.95),
+        "p99": rank(0.99),
+        "max": round(ordered[-1] * 1000, 3)
+    }
+
+
+@contextmanager
+def timer(results: dict, name: str):
+    """Blok bajarilish vaqtini results[name] ga soniyalarda yozish"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        results[name] = time.perf_counter() - started
+
+
+def write_report(report: dict, path: str):
+    """Hisobotni JSON faylga yozish"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
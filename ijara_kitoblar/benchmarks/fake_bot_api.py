@@ -0,0 +1,263 @@
+"""
+Fake Telegram Bot API - lokal load test uchun aiohttp server
+Bot TELEGRAM_API_URL orqali shu serverga ulanadi (https://api.telegram.org o'rniga).
+
+Qo'llab-quvvatlanadigan metodlar: getMe, getUpdates, deleteWebhook, sendMessage,
+editMessageText, answerCallbackQuery, getChat. Qolgan metodlar {"ok": true} qaytaradi.
+
+Rate limit simulyatsiyasi: global (sekundiga) va chat bo'yicha limit oshsa
+429 va parameters.retry_after qaytariladi (haqiqiy Telegram kabi).
+"""
+import asyncio
+import random
+import time
+from collections import defaultdict, deque
+from typing import Dict, Optional
+
+from aiohttp import web
+
+# Javob kutiladigan metodlar (foydalanuvchi latency si shular bo'yicha o'lchanadi)
+REPLY_METHODS = ('sendMessage', 'editMessageText')
+
+
+class RateLimiter:
+    """Fixed window limit: oyna ichida limit oshsa qolgan vaqt qaytariladi"""
+
+    def __init__(self, limit: float, window: float = 1.0):
+        self.limit = limit
+        self.window = window
+        self._windows: Dict[object, list] = {}  # kalit -> [oyna boshlanishi, soni]
+
+    def hit(self, key=None) -> Optional[int]:
+        """So'rovni hisoblash; limit oshgan bo'lsa retry_after (soniya)"""
+        if not self.limit:
+            return None
+
+        now = time.monotonic()
+        started, count = self._windows.get(key, (now, 0))
+        if now - started >= self.window:
+            started, count = now, 0
+
+        if count >= self.limit:
+            self._windows[key] = [started, count]
+            return max(1, int(started + self.window - now + 0.999))
+
+        self._windows[key] = [started, count + 1]
+        return None
+
+
+class FakeBotAPI:
+    """Sintetik update'lar navbati va bot javoblarini yozib boruvchi server"""
+
+    def __init__(self, global_rate: float = 30, chat_rate: float = 0,
+                 flood_probability: float = 0.0, retry_after: int = 1):
+        """
+        Args:
+            global_rate: Sekundiga maksimal yuboriladigan xabarlar (0 - cheksiz)
+            chat_rate: Bitta chatga sekundiga maksimal xabarlar (0 - cheksiz)
+            flood_probability: Tasodifiy 429 ehtimoli (0..1)
+            retry_after: Tasodifiy 429 uchun retry_after qiymati
+        """
+        self.global_limiter = RateLimiter(global_rate)
+        self.chat_limiter = RateLimiter(chat_rate)
+        self.flood_probability = flood_probability
+        self.retry_after = retry_after
+
+        self.bot_user = {'id': 42, 'is_bot': True, 'first_name': "Kutubxona", 'username': "kutubxona_bot"}
+
+        self._updates = deque()
+        self._update_id = 0
+        self._updates_event = asyncio.Event()
+
+        self._message_id = 0
+        self._replies: Dict[int, asyncio.Queue] = defaultdict(asyncio.Queue)
+        self.last_message_id: Dict[int, int] = {}
+
+        # Statistika
+        self.requests = defaultdict(int)  # metod -> soni
+        self.rate_limited = 0
+        self.delivery_lag = []  # update navbatga qo'yilgandan getUpdates gacha (soniya)
+
+        self.app = web.Application()
+        self.app.router.add_route('*', '/bot{token}/{method}', self.handle)
+        self._runner: Optional[web.AppRunner] = None
+
+    # ========================================
+    # SERVER
+    # ========================================
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8081):
+        """Serverni ishga tushirish"""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+    async def stop(self):
+        """Serverni to'xtatish"""
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Barcha Bot API metodlari uchun bitta kirish nuqtasi"""
+        method = request.match_info['method']
+        params = await self._read_params(request)
+        self.requests[method] += 1
+
+        if method in REPLY_METHODS:
+            chat_id = int(params.get('chat_id', 0))
+            retry_after = self._check_limits(chat_id)
+            if retry_after:
+                self.rate_limited += 1
+                return self._error(429, f"Too Many Requests: retry after {retry_after}",
+                                   {'retry_after': retry_after})
+
+        handler = getattr(self, f"_method_{method}", None)
+        result = await handler(params) if handler else True
+        return web.json_response({'ok': True, 'result': result})
+
+    @staticmethod
+    async def _read_params(request: web.Request) -> dict:
+        """Form (aiogram) yoki JSON so'rov parametrlarini o'qish"""
+        if request.content_type == 'application/json':
+            return await request.json()
+        params = dict(await request.post())
+        params.update(request.query)
+        return params
+
+    @staticmethod
+    def _error(code: int, description: str, parameters: dict = None) -> web.Response:
+        body = {'ok': False, 'error_code': code, 'description': description}
+        if parameters:
+            body['parameters'] = parameters
+        return web.json_response(body, status=code)
+
+    def _check_limits(self, chat_id: int) -> Optional[int]:
+        """429 qaytarish kerakligini aniqlash"""
+        if self.flood_probability and random.random() < self.flood_probability:
+            return self.retry_after
+        return self.global_limiter.hit() or self.chat_limiter.hit(chat_id)
+
+    # ========================================
+    # BOT API METODLARI
+    # ========================================
+
+    async def _method_getMe(self, params: dict):
+        return self.bot_user
+
+    async def _method_getChat(self, params: dict):
+        chat_id = int(params['chat_id'])
+        # ChatFullInfo majburiy maydonlari bilan
+        return {'id': chat_id, 'type': 'private', 'first_name': f"User{chat_id}",
+                'accent_color_id': 0, 'max_reaction_count': 11}
+
+    async def _method_getUpdates(self, params: dict):
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = float(params.get('timeout') or 0)
+
+        # offset dan kichik update'lar tasdiqlangan
+        while self._updates and self._updates[0][0]['update_id'] < offset:
+            self._updates.popleft()
+
+        if not self._updates and timeout:
+            self._updates_event.clear()
+            try:
+                await asyncio.wait_for(self._updates_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+
+        now = time.perf_counter()
+        result = []
+        for update, queued_at, delivered in list(self._updates)[:limit]:
+            if not delivered:
+                self.delivery_lag.append(now - queued_at)
+            result.append(update)
+
+        # Yetkazilganlar belgilanadi (qayta so'ralsa lag qayta hisoblanmaydi)
+        for i in range(len(result)):
+            update, queued_at, _ = self._updates[i]
+            self._updates[i] = (update, queued_at, True)
+
+        return result
+
+    async def _method_sendMessage(self, params: dict):
+        chat_id = int(params['chat_id'])
+        self._message_id += 1
+        self.last_message_id[chat_id] = self._message_id
+        message = self._message(chat_id, self._message_id, params.get('text', ''), from_bot=True)
+        self._replies[chat_id].put_nowait(('sendMessage', params.get('text', ''), time.perf_counter()))
+        return message
+
+    async def _method_editMessageText(self, params: dict):
+        chat_id = int(params.get('chat_id') or 0)
+        message_id = int(params.get('message_id') or 0)
+        self._replies[chat_id].put_nowait(('editMessageText', params.get('text', ''), time.perf_counter()))
+        return self._message(chat_id, message_id, params.get('text', ''), from_bot=True)
+
+    # ========================================
+    # SINTETIK FOYDALANUVCHILAR
+    # ========================================
+
+    def _message(self, chat_id: int, message_id: int, text: str, from_bot: bool = False) -> dict:
+        sender = self.bot_user if from_bot else {'id': chat_id, 'is_bot': False, 'first_name': f"User{chat_id}"}
+        return {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private', 'first_name': f"User{chat_id}"},
+            'from': sender,
+            'text': text
+        }
+
+    def _enqueue(self, update: dict) -> float:
+        self._update_id += 1
+        update['update_id'] = self._update_id
+        queued_at = time.perf_counter()
+        self._updates.append((update, queued_at, False))
+        self._updates_event.set()
+        return queued_at
+
+    def send_text(self, chat_id: int, text: str) -> float:
+        """Foydalanuvchi xabarini navbatga qo'yish (buyruq bo'lsa entity bilan)"""
+        self._message_id += 1
+        message = self._message(chat_id, self._message_id, text)
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+        return self._enqueue({'message': message})
+
+    def press_button(self, chat_id: int, data: str) -> float:
+        """Inline tugma bosilishini navbatga qo'yish (oxirgi bot xabari ostida)"""
+        message_id = self.last_message_id.get(chat_id, 0)
+        return self._enqueue({'callback_query': {
+            'id': f"{chat_id}:{self._update_id + 1}",
+            'from': {'id': chat_id, 'is_bot': False, 'first_name': f"User{chat_id}"},
+            'chat_instance': str(chat_id),
+            'message': self._message(chat_id, message_id, "...", from_bot=True),
+            'data': data
+        }})
+
+    async def wait_reply(self, chat_id: int, timeout: float):
+        """
+        Bot javobini kutish
+
+        Returns:
+            (metod, matn, javob vaqti perf_counter bo'yicha)
+        """
+        return await asyncio.wait_for(self._replies[chat_id].get(), timeout)
+
+    def drain_replies(self, chat_id: int):
+        """Oldingi qadamdan qolgan qo'shimcha javoblarni tashlab yuborish"""
+        queue = self._replies[chat_id]
+        while not queue.empty():
+            queue.get_nowait()
+
+    @property
+    def pending_updates(self) -> int:
+        return len(self._updates)
+
+    def summary(self) -> dict:
+        return {
+            'requests': dict(self.requests),
+            'rate_limited': self.rate_limited,
+            'pending_updates': self.pending_updates
+        }
+
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+End-to-End Load Test - fake Bot API server va sintetik foydalanuvchilar bilan
+Internet va haqiqiy Telegram kerak emas: bot (main.py) TELEGRAM_API_URL orqali
+lokal fake serverga ulanadi, sintetik foydalanuvchilar /start, /register,
+/subscription va admin panel oqimlarini bajaradi.
+
+Ishlatish:
+    python -m ijara_kitoblar.benchmarks.load_test --users 1000 --concurrency 100
+    python -m ijara_kitoblar.benchmarks.load_test --db postgresql --users 5000 --json load.json
+    python -m ijara_kitoblar.benchmarks.load_test --flood-probability 0.01 --global-rate 30
+
+    # Bot alohida ishga tushirilgan bo'lsa (TELEGRAM_API_URL=http://127.0.0.1:8081 python main.py)
+    python -m ijara_kitoblar.benchmarks.load_test --no-spawn --users 100
+"""
+import argparse
+import asyncio
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_NAMES = ["Aziz", "Dilnoza", "Jasur", "Madina", "Sardor", "Nilufar", "Bekzod", "Gulnora",
+               "Otabek", "Shahnoza", "Javohir", "Malika", "Sherzod", "Zarina", "Ulug'bek", "Feruza"]
+LAST_NAMES = ["Karimov", "Rahimova", "Toshmatov", "Yusupova", "Abdullayev", "Saidova",
+              "Ergashev", "Nazarova", "Qodirov", "Mirzayeva", "Xolmatov", "Tursunova"]
+STUDY_PLACES = ["Toshkent Davlat Universiteti", "TATU", "Iqtisodiyot kolleji", "IT Park",
+                "O'zMU", "Westminster", "Inha Universiteti"]
+
+BOT_TOKEN = "123456789:LOAD-TEST"
+
+
+def configure_database(db_type: str):
+    """Config import qilinishidan oldin database turini tanlash"""
+    os.environ['DB_TYPE'] = db_type
+    if db_type == 'sqlite' and 'SQLITE_DB' not in os.environ:
+        os.environ['SQLITE_DB'] = os.path.join(tempfile.mkdtemp(prefix='ijara_kitoblar_'), 'load_test.db')
+
+
+class LoadStats:
+    """Qadamlar bo'yicha latency va xatolar"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)  # qadam -> soniyalar
+        self.timeouts = defaultdict(int)
+        self.errors = defaultdict(int)  # bot "❌" bilan javob bergan qadamlar
+        self.completed_users = 0
+        self.failed_users = 0
+        self.admin_rounds = 0
+
+
+class SyntheticUser:
+    """Bitta sintetik foydalanuvchi - botga xabar yuborib javobini kutadi"""
+
+    def __init__(self, server, stats: LoadStats, chat_id: int, timeout: float):
+        self.server = server
+        self.stats = stats
+        self.chat_id = chat_id
+        self.timeout = timeout
+
+    async def step(self, name: str, text: str = None, button: str = None) -> bool:
+        """Xabar yoki tugma yuborib birinchi javobni kutish"""
+        self.server.drain_replies(self.chat_id)
+
+        if button:
+            queued_at = self.server.press_button(self.chat_id, button)
+        else:
+            queued_at = self.server.send_text(self.chat_id, text)
+
+        try:
+            _, reply_text, replied_at = await self.server.wait_reply(self.chat_id, self.timeout)
+        except asyncio.TimeoutError:
+            self.stats.timeouts[name] += 1
+            return False
+
+        self.stats.latencies[name].append(replied_at - queued_at)
+        if reply_text.startswith("❌"):
+            self.stats.errors[name] += 1
+            return False
+        return True
+
+    async def register_flow(self, index: int, phone_tag: int) -> bool:
+        """/start -> /register -> 5 qadam -> /subscription -> tarif -> /mysubscription"""
+        steps = [
+            ("/start", {'text': "/start"}),
+            ("/register", {'text': "/register"}),
+            ("ism", {'text': random.choice(FIRST_NAMES)}),
+            ("familiya", {'text': random.choice(LAST_NAMES)}),
+            ("telefon", {'text': f"+99897{(phone_tag * 100_000 + index) % 10 ** 7:07d}"}),
+            ("tug'ilgan yil", {'text': str(random.randint(1970, 2008))}),
+            ("o'qish joyi", {'text': random.choice(STUDY_PLACES)}),
+            ("/subscription", {'text': "/subscription"}),
+            ("tarif tanlash", {'button': random.choice(["plan_Money", "plan_Premium", "plan_Free"])}),
+            ("/mysubscription", {'text': "/mysubscription"}),
+        ]
+        for name, kwargs in steps:
+            if not await self.step(name, **kwargs):
+                return False
+        return True
+
+    async def admin_flow(self) -> bool:
+        """/admin -> statistika -> orqaga"""
+        return (await self.step("/admin", text="/admin")
+                and await self.step("admin: statistika", button="admin_stats")
+                and await self.step("admin: orqaga", button="admin_back"))
+
+
+async def wait_for_bot(server, admin_id: int, timeout: float) -> bool:
+    """Bot polling boshlashi va super admin yaratilishini kutish"""
+    from ijara_kitoblar.database.admin_manager import AdminManager
+
+    deadline = time.monotonic() + timeout
+    admin_manager = AdminManager()
+    try:
+        while time.monotonic() < deadline:
+            if server.requests.get('getUpdates') and await asyncio.to_thread(admin_manager.is_admin, admin_id):
+                return True
+            await asyncio.sleep(0.2)
+        return False
+    finally:
+        admin_manager.close()
+
+
+def spawn_bot(api_url: str, admin_id: int, log_path: str) -> subprocess.Popen:
+    """main.py ni fake serverga ulangan holda ishga tushirish"""
+    env = dict(os.environ, TELEGRAM_API_URL=api_url, BOT_TOKEN=BOT_TOKEN, SUPER_ADMIN_ID=str(admin_id))
+    # ijara_kitoblar.* importlari uchun
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.path.dirname(PROJECT_DIR), env.get('PYTHONPATH')]))
+    log = open(log_path, 'w', encoding='utf-8')
+    return subprocess.Popen([sys.executable, 'main.py'], cwd=PROJECT_DIR, env=env,
+                            stdout=log, stderr=subprocess.STDOUT)
+
+
+def stop_bot(process: subprocess.Popen):
+    """Botni SIGINT bilan to'xtatish (on_shutdown ishlashi uchun)"""
+    if process.poll() is None:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def run_load(args) -> dict:
+    """Server, bot va foydalanuvchilarni ishga tushirib natijani qaytarish"""
+    from ijara_kitoblar.benchmarks.fake_bot_api import FakeBotAPI
+    from ijara_kitoblar.benchmarks.common import percentiles
+    from ijara_kitoblar.database.migrations import upgrade_database
+
+    await asyncio.to_thread(upgrade_database)
+
+    server = FakeBotAPI(global_rate=args.global_rate, chat_rate=args.chat_rate,
+                        flood_probability=args.flood_probability, retry_after=args.retry_after)
+    await server.start(args.host, args.port)
+    api_url = f"http://{args.host}:{args.port}"
+
+    process = None
+    if not args.no_spawn:
+        print(f"🤖 Bot ishga tushirilmoqda (log: {args.bot_log})...")
+        process = spawn_bot(api_url, args.admin_id, args.bot_log)
+    else:
+        print(f"⏳ Bot kutilmoqda: TELEGRAM_API_URL={api_url} BOT_TOKEN=... python main.py")
+
+    stats = LoadStats()
+    try:
+        if not await wait_for_bot(server, args.admin_id, args.startup_timeout):
+            raise RuntimeError("Bot ishga tushmadi yoki super admin yaratilmadi")
+
+        print(f"🚀 {args.users} foydalanuvchi, concurrency {args.concurrency}")
+        semaphore = asyncio.Semaphore(args.concurrency)
+        phone_tag = uuid.uuid4().int % 1000
+        base_chat_id = 10_000_000 + phone_tag * 1_000_000
+        done = asyncio.Event()
+
+        async def user_task(index: int):
+            async with semaphore:
+                user = SyntheticUser(server, stats, base_chat_id + index, args.step_timeout)
+                if await user.register_flow(index, phone_tag):
+                    stats.completed_users += 1
+                else:
+                    stats.failed_users += 1
+
+        async def admin_task():
+            admin = SyntheticUser(server, stats, args.admin_id, args.step_timeout)
+            while not done.is_set():
+                if await admin.admin_flow():
+                    stats.admin_rounds += 1
+                await asyncio.sleep(args.admin_interval)
+
+        started = time.perf_counter()
+        admin = asyncio.create_task(admin_task())
+        await asyncio.gather(*(user_task(i) for i in range(args.users)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await admin
+
+    finally:
+        if process:
+            stop_bot(process)
+        await server.stop()
+
+    total_steps = sum(len(values) for values in stats.latencies.values())
+    return {
+        'users': args.users,
+        'concurrency': args.concurrency,
+        'database': os.environ.get('DB_TYPE'),
+        'elapsed_s': round(elapsed, 3),
+        'completed_users': stats.completed_users,
+        'failed_users': stats.failed_users,
+        'admin_rounds': stats.admin_rounds,
+        'steps': total_steps,
+        'steps_per_s': round(total_steps / elapsed, 1) if elapsed else 0,
+        'delivery_lag_ms': percentiles(server.delivery_lag),
+        'step_latency_ms': {
+            name: {**percentiles(values), 'count': len(values),
+                   'timeouts': stats.timeouts[name], 'errors': stats.errors[name]}
+            for name, values in stats.latencies.items()
+        },
+        'timeouts': dict(stats.timeouts),
+        'server': server.summary()
+    }
+
+
+def print_report(report: dict):
+    """Natijalarni jadval ko'rinishida chiqarish"""
+    print("=" * 80)
+    print(f"👥 Foydalanuvchilar: {report['completed_users']}/{report['users']} muvaffaqiyatli, "
+          f"{report['failed_users']} xato | admin: {report['admin_rounds']} marta")
+    print(f"⏱️ {report['elapsed_s']} s, {report['steps']} qadam, {report['steps_per_s']} qadam/s")
+    lag = report['delivery_lag_ms']
+    print(f"📬 getUpdates lag: p50 {lag['p50']} ms, p95 {lag['p95']} ms, p99 {lag['p99']} ms")
+    print(f"🚦 429 javoblar: {report['server']['rate_limited']}")
+    print("-" * 80)
+    print(f"{'Qadam':<20} {'soni':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'timeout':>8} {'xato':>6}")
+    print("-" * 80)
+    for name, r in report['step_latency_ms'].items():
+        print(f"{name:<20} {r['count']:>6} {r['p50']:>9} {r['p95']:>9} {r['p99']:>9} "
+              f"{r['timeouts']:>8} {r['errors']:>6}")
+    for name, count in report['timeouts'].items():
+        if name not in report['step_latency_ms']:
+            print(f"{name:<20} {0:>6} {'-':>9} {'-':>9} {'-':>9} {count:>8} {0:>6}")
+    print("-" * 80)
+    requests = ", ".join(f"{method}: {count}" for method, count in sorted(report['server']['requests'].items()))
+    print(f"📡 Bot API so'rovlari: {requests}")
+    print("=" * 80)
+
+
+def main():
+    """Asosiy funksiya"""
+    parser = argparse.ArgumentParser(description="Fake Bot API bilan end-to-end load test")
+    parser.add_argument('--db', choices=['sqlite', 'postgresql'], default='sqlite',
+                        help="Database (sqlite - vaqtinchalik fayl, postgresql - .env sozlamalari)")
+    parser.add_argument('--users', type=int, default=200, help="Sintetik foydalanuvchilar soni")
+    parser.add_argument('--concurrency', type=int, default=50, help="Bir vaqtda faol foydalanuvchilar")
+    parser.add_argument('--admin-id', type=int, default=1000, help="Super admin Telegram ID si")
+    parser.add_argument('--admin-interval', type=float, default=0.5, help="Admin oqimlari orasidagi pauza (s)")
+    parser.add_argument('--global-rate', type=float, default=30, help="Sekundiga xabarlar limiti (0 - cheksiz)")
+    parser.add_argument('--chat-rate', type=float, default=0, help="Chat bo'yicha sekundiga limit (0 - cheksiz)")
+    parser.add_argument('--flood-probability', type=float, default=0.0, help="Tasodifiy 429 ehtimoli")
+    parser.add_argument('--retry-after', type=int, default=1, help="Tasodifiy 429 uchun retry_after")
+    parser.add_argument('--step-timeout', type=float, default=10.0, help="Bot javobini kutish (s)")
+    parser.add_argument('--startup-timeout', type=float, default=60.0, help="Bot ishga tushishini kutish (s)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--no-spawn', action='store_true', help="Botni ishga tushirmaslik (alohida ishlaydi)")
+    parser.add_argument('--bot-log', default=os.path.join(tempfile.gettempdir(), 'ijara_kitoblar_load_test_bot.log'))
+    parser.add_argument('--json', dest='json_path', help="Natijani JSON faylga yozish")
+    args = parser.parse_args()
+
+    configure_database(args.db)
+
+    report = asyncio.run(run_load(args))
+    print_report(report)
+
+    if args.json_path:
+        from ijara_kitoblar.benchmarks.common import write_report
+        write_report(report, args.json_path)
+        print(f"💾 Natija saqlandi: {args.json_path}")
+
+    sys.exit(0 if report['failed_users'] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+DTO Microbenchmark - detach qilingan ORM obyektlari va UserView narxini solishtirish
+Har bir usul uchun: bitta qatorga ketgan vaqt (µs) va xotira (bayt, tracemalloc peak).
+
+Usullar:
+- orm      - session.query(User).all() + expunge (eski getter'lar)
+- row      - select(*USER_VIEW_COLUMNS), faqat Row tuple lar (pastki chegara)
+- view     - select(*USER_VIEW_COLUMNS) + UserView (hozirgi getter'lar)
+- build    - faqat UserView yaratish (qatorlar oldindan o'qilgan, database siz)
+- access   - age/full_name/days_until_expiry o'qish (ORM property vs tayyor maydon)
+
+Ishlatish:
+    python -m ijara_kitoblar.benchmarks.views --users 10000 --repeat 5
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from ijara_kitoblar.database.models import User
+from ijara_kitoblar.database.views import USER_VIEW_COLUMNS, user_views
+from ijara_kitoblar.database.migrations import upgrade_database
+from ijara_kitoblar.database.engine import get_engine
+from ijara_kitoblar.benchmarks.common import write_report
+from ijara_kitoblar.benchmarks.datagen import load_users
+
+
+def measure(func: Callable[[], list], count: int, repeat: int) -> dict:
+    """
+    Funksiyani o'lchash: eng yaxshi vaqt va xotira peak i
+
+    Args:
+        func: Natija ro'yxatini qaytaruvchi funksiya (ro'yxat o'lchov davomida xotirada turadi)
+        count: Qatorlar soni (bitta qatorga bo'lish uchun)
+        repeat: Takrorlar (eng yaxshi vaqt olinadi)
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+        del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    return {
+        'total_ms': round(best * 1000, 2),
+        'us_per_row': round(best / count * 1_000_000, 3),
+        'bytes_per_row': round(peak / count)
+    }
+
+
+def run(url: str, users: int, repeat: int) -> dict:
+    """Sintetik ma'lumot yuklash va barcha usullarni o'lchash"""
+    upgrade_database(url)
+    engine = get_engine(url)
+    load_users(engine, users)
+    Session = sessionmaker(bind=engine)
+    stmt = select(*USER_VIEW_COLUMNS)
+
+    def orm():
+        session = Session()
+        try:
+            result = session.query(User).all()
+            for user in result:
+                session.expunge(user)
+            return result
+        finally:
+            session.close()
+
+    def rows():
+        with engine.connect() as connection:
+            return connection.execute(stmt).all()
+
+    def views():
+        with engine.connect() as connection:
+            return list(user_views(connection.execute(stmt)))
+
+    prefetched = [tuple(row) for row in rows()]
+    orm_users = orm()
+    view_users = views()
+
+    def build():
+        return list(user_views(prefetched))
+
+    def access(items):
+        return lambda: [(item.age, item.full_name, item.days_until_expiry) for item in items]
+
+    return {
+        'users': users,
+        'orm': measure(orm, users, repeat),
+        'row': measure(rows, users, repeat),
+        'view': measure(views, users, repeat),
+        'build': measure(build, users, repeat),
+        'access_orm': measure(access(orm_users), users, repeat),
+        'access_view': measure(access(view_users), users, repeat)
+    }
+
+
+def print_results(results: dict):
+    """Natijalarni jadval ko'rinishida chiqarish"""
+    print("\n" + "=" * 64)
+    print(f"📊 DTO MICROBENCHMARK ({results['users']:,} ta foydalanuvchi)")
+    print("=" * 64)
+    print(f"{'Usul':<14}{'Jami (ms)':>14}{'µs/qator':>14}{'bayt/qator':>14}")
+    print("-" * 64)
+
+    for name in ('orm', 'row', 'view', 'build', 'access_orm', 'access_view'):
+        stats = results[name]
+        print(f"{name:<14}{stats['total_ms']:>14.2f}{stats['us_per_row']:>14.3f}{stats['bytes_per_row']:>14,}")
+
+    print("=" * 64)
+    speedup = results['orm']['us_per_row'] / max(results['view']['us_per_row'], 1e-9)
+    memory = results['orm']['bytes_per_row'] / max(results['view']['bytes_per_row'], 1)
+    print(f"⚡ view / orm: {speedup:.1f}x tezroq, {memory:.1f}x kam xotira\n")
+
+
+def main():
+    """Asosiy funksiya"""
+    parser = argparse.ArgumentParser(description="ORM obyektlari va UserView DTO narxini solishtirish")
+    parser.add_argument('--users', type=int, default=10_000, help="Foydalanuvchilar soni")
+    parser.add_argument('--repeat', type=int, default=5, help="Takrorlar (eng yaxshi vaqt olinadi)")
+    parser.add_argument('--json', dest='json_path', help="Natijani JSON faylga yozish")
+    args = parser.parse_args()
+
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='ijara_kitoblar_'), 'views.db')}"
+    results = run(url, args.users, args.repeat)
+    print_results(results)
+
+    if args.json_path:
+        write_report(results, args.json_path)
+        print(f"💾 Natija saqlandi: {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
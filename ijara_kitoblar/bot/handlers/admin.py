@@ -4,13 +4,23 @@ Ko'p adminlar, super admin tizimi bilan
 """
 from aiogram import Router, F
 from aiogram.filters import Command
-from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
+from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from datetime import datetime
+import re
 
 from ijara_kitoblar.database.db_manager import DatabaseManager
+from ijara_kitoblar.database.phone import normalize_phone
 from ijara_kitoblar.database.admin_manager import AdminManager
+from ijara_kitoblar.database.models import User
+from ijara_kitoblar.config import SUBSCRIPTION_PLANS
+from bot.utils.tracing import tracer
+from bot.utils.audit import audit
+from bot.utils.notification import send_messages_concurrently
+from bot.utils.rendering import (
+    ADMIN_KEYBOARD, SUPER_ADMIN_KEYBOARD, ADMIN_LIST_KEYBOARD, BACK_KEYBOARD
+)
 
 router = Router()
 
@@ -22,30 +32,14 @@ class AdminStates(StatesGroup):
     waiting_for_approval = State()
 
 
-def get_admin_keyboard():
-    """Admin panel klaviaturasi"""
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="📊 Statistika", callback_data="admin_stats")],
-        [InlineKeyboardButton(text="👥 Foydalanuvchilar", callback_data="admin_users")],
-        [InlineKeyboardButton(text="➕ Foydalanuvchi qo'shish", callback_data="admin_add_user")],
-        [InlineKeyboardButton(text="✅ Tarifni tasdiqlash", callback_data="admin_approve")],
-        [InlineKeyboardButton(text="🔍 Qidirish", callback_data="admin_search")],
-    ])
-    return keyboard
-
-
-def get_super_admin_keyboard():
-    """Super Admin panel klaviaturasi"""
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="📊 Statistika", callback_data="admin_stats")],
-        [InlineKeyboardButton(text="👥 Foydalanuvchilar", callback_data="admin_users")],
-        [InlineKeyboardButton(text="➕ Foydalanuvchi qo'shish", callback_data="admin_add_user")],
-        [InlineKeyboardButton(text="✅ Tarifni tasdiqlash", callback_data="admin_approve")],
-        [InlineKeyboardButton(text="🔍 Qidirish", callback_data="admin_search")],
-        [InlineKeyboardButton(text="👨‍💼 Adminlar", callback_data="super_admin_list")],
-        [InlineKeyboardButton(text="➕ Admin qo'shish", callback_data="super_add_admin")],
-    ])
-    return keyboard
+# Ommaviy tasdiqlash uchun CSV fayl hajmi chegarasi (1 MB)
+MAX_APPROVAL_FILE_SIZE = 1024 * 1024
+
+# Hisobotda ko'rsatiladigan xatolar soni
+MAX_REPORT_ITEMS = 20
+
+# Library ID: ID0001, ID0002, ... (generate_library_id)
+LIBRARY_ID_PATTERN = re.compile(r"ID\d{4,}")
 
 
 @router.message(Command("admin"))
@@ -64,7 +58,7 @@ async def cmd_admin(message: Message):
 
     # Super admin bo'lsa qo'shimcha tugmalar
     if admin.is_super_admin:
-        keyboard = get_super_admin_keyboard()
+        keyboard = SUPER_ADMIN_KEYBOARD
         welcome_text = (
             "🔐 SUPER ADMIN PANEL\n\n"
             f"👤 {admin.full_name}\n"
@@ -72,7 +66,7 @@ async def cmd_admin(message: Message):
             "Kerakli bo'limni tanlang:"
         )
     else:
-        keyboard = get_admin_keyboard()
+        keyboard = ADMIN_KEYBOARD
         welcome_text = (
             "🔐 ADMIN PANEL\n\n"
             f"👤 {admin.full_name}\n"
@@ -113,11 +107,7 @@ async def admin_statistics(callback: CallbackQuery):
         f"└─ Oddiy Admin: {admin_stats['regular']}"
     )
 
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="🔙 Orqaga", callback_data="admin_back")]
-    ])
-
-    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.message.edit_text(text, reply_markup=BACK_KEYBOARD)
     await callback.answer()
 
     db.close()
@@ -134,8 +124,11 @@ async def admin_users_list(callback: CallbackQuery):
         admin_manager.close()
         return
 
+    # Faqat 15 tasi o'qiladi (butun jadval yuklanmaydi), qolgani soni bilan
     db = DatabaseManager()
-    users = db.get_all_users()
+    active_filter = [User.is_active == True]
+    users = list(db.iter_users(active_filter, batch_size=15, limit=15))
+    total = db.count_users(active_filter)
     db.close()
     admin_manager.close()
 
@@ -145,7 +138,7 @@ async def admin_users_list(callback: CallbackQuery):
 
     text = "👥 FOYDALANUVCHILAR RO'YXATI\n\n"
 
-    for user in users[:15]:  # Faqat 15 tasini ko'rsatish
+    for user in users:
         telegram_status = "✅" if user.telegram_id else "📵"
         text += (
             f"📚 {user.library_id} {telegram_status}\n"
@@ -154,15 +147,11 @@ async def admin_users_list(callback: CallbackQuery):
             f"   📞 {user.phone_number}\n\n"
         )
 
-    if len(users) > 15:
-        text += f"\n... va yana {len(users) - 15} ta foydalanuvchi\n"
+    if total > 15:
+        text += f"\n... va yana {total - 15} ta foydalanuvchi\n"
         text += "\nQidirish uchun: /search [ism yoki ID]"
 
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="🔙 Orqaga", callback_data="admin_back")]
-    ])
-
-    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.message.edit_text(text, reply_markup=BACK_KEYBOARD)
     await callback.answer()
 
 
@@ -187,6 +176,7 @@ async def admin_approve_subscription(callback: CallbackQuery):
         "/approve ID0001 Premium\n"
         "yoki\n"
         "/approve ID0001 Free\n\n"
+        "📦 Ko'p foydalanuvchi uchun: /bulkapprove\n\n"
         "💡 Maslahat: ID raqamni to'g'ri kiriting!"
     )
     await callback.answer()
@@ -204,6 +194,11 @@ async def process_approve(message: Message):
 
     admin_manager.close()
 
+    # Ko'p qatorli xabar yoki CSV fayl - ommaviy tasdiqlash
+    if message.document or len((message.text or "").strip().splitlines()) > 1:
+        await run_bulk_approve(message)
+        return
+
     try:
         parts = message.text.split()
         if len(parts) != 3:
@@ -228,33 +223,31 @@ async def process_approve(message: Message):
             )
             return
 
+        # Oldindan SELECT siz - topilmasa UPDATE ning o'zi xato qaytaradi
         db = DatabaseManager()
-        user = db.get_user_by_library_id(library_id)
-
-        if not user:
-            await message.answer(f"❌ {library_id} ID raqamli foydalanuvchi topilmadi!")
-            db.close()
-            return
-
-        success, msg = db.update_subscription(library_id, plan_name)
+        user, msg = db.change_subscription(library_id, plan_name)
         db.close()
 
-        if success:
+        audit('approve', message.from_user.id, library_id,
+              {'plan': plan_name, 'old_plan': user['old_plan'], 'version': user['version']}
+              if user else {'plan': plan_name, 'error': msg}, user is not None)
+
+        if user:
             await message.answer(
                 f"✅ MUVAFFAQIYATLI TASDIQLANDI!\n\n"
-                f"👤 {user.full_name}\n"
+                f"👤 {user['full_name']}\n"
                 f"📚 Library ID: {library_id}\n"
                 f"📋 Yangi tarif: {plan_name}\n"
                 f"📅 Muddat: 30 kun\n"
-                f"📞 Telefon: {user.phone_number}"
+                f"📞 Telefon: {user['phone_number']}"
             )
 
             # Agar foydalanuvchida telegram bo'lsa, unga xabar yuborish
-            if user.telegram_id:
+            if user['telegram_id']:
                 try:
                     from bot.main import bot
                     await bot.send_message(
-                        user.telegram_id,
+                        user['telegram_id'],
                         f"✅ TARIFINGIZ TASDIQLANDI!\n\n"
                         f"📋 Yangi tarif: {plan_name}\n"
                         f"📅 Amal qilish muddati: 30 kun\n\n"
@@ -269,6 +262,190 @@ async def process_approve(message: Message):
         await message.answer(f"❌ Xatolik yuz berdi: {str(e)}")
 
 
+def parse_approval_lines(text: str):
+    """
+    Ommaviy tasdiqlash qatorlarini o'qish
+
+    Har bir qator: library_id plan [days]
+    Ajratuvchi: probel, vergul yoki nuqtali vergul. /approve, sarlavha va # izoh
+    qatorlari o'tkazib yuboriladi. Bir ID bir necha marta kelsa, hammasi qaytadi
+    (bulk_update_subscriptions da oxirgisi hisobga olinadi).
+
+    Returns:
+        (entries, errors) - entries: (library_id, plan_name, duration_days) ro'yxati
+    """
+    entries = []
+    errors = []
+
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if line.strip().startswith("#"):
+            continue
+
+        parts = [part for part in re.split(r"[\s,;]+", line.strip()) if part]
+
+        if parts and parts[0].lower().startswith("/approve"):
+            parts = parts[1:]
+
+        if not parts or parts[0].lower() == "library_id":
+            continue
+
+        if len(parts) not in (2, 3):
+            errors.append(f"{line_number}-qator: noto'g'ri format")
+            continue
+
+        library_id = parts[0].upper()
+        plan_name = parts[1].capitalize()
+
+        if not LIBRARY_ID_PATTERN.fullmatch(library_id):
+            errors.append(f"{line_number}-qator: noto'g'ri Library ID '{parts[0]}'")
+            continue
+
+        if plan_name not in SUBSCRIPTION_PLANS:
+            errors.append(f"{line_number}-qator: noto'g'ri tarif '{parts[1]}'")
+            continue
+
+        duration_days = None
+        if len(parts) == 3:
+            if not parts[2].isdigit() or int(parts[2]) <= 0:
+                errors.append(f"{line_number}-qator: noto'g'ri kunlar soni '{parts[2]}'")
+                continue
+            duration_days = int(parts[2])
+        elif SUBSCRIPTION_PLANS[plan_name]['duration_days']:
+            duration_days = SUBSCRIPTION_PLANS[plan_name]['duration_days']
+
+        entries.append((library_id, plan_name, duration_days))
+
+    return entries, errors
+
+
+async def run_bulk_approve(message: Message):
+    """Ko'p qatorli xabar yoki CSV fayldan tariflarni ommaviy tasdiqlash"""
+    if message.document:
+        if message.document.file_size and message.document.file_size > MAX_APPROVAL_FILE_SIZE:
+            await message.answer("❌ Fayl juda katta! Maksimal hajm: 1 MB")
+            return
+
+        try:
+            content = await message.bot.download(message.document)
+            text = content.read().decode("utf-8-sig")
+        except Exception as e:
+            await message.answer(f"❌ Faylni o'qishda xato: {str(e)}")
+            return
+    else:
+        text = message.text or ""
+
+    entries, errors = parse_approval_lines(text)
+
+    if not entries:
+        await message.answer(
+            "❌ Tasdiqlash uchun to'g'ri qator topilmadi!\n\n"
+            "✅ Format (har bir qatorda):\n"
+            "ID0001 Money\n"
+            "ID0002 Premium 60\n\n"
+            + ("\n".join(errors[:MAX_REPORT_ITEMS]) if errors else "")
+        )
+        return
+
+    await message.answer(f"⏳ {len(entries)} ta qator qayta ishlanmoqda...")
+
+    db = DatabaseManager()
+    updated, not_found, error = db.bulk_update_subscriptions(entries)
+    db.close()
+
+    if error:
+        await message.answer(error)
+        return
+
+    for user in updated:
+        audit('approve', message.from_user.id, user['library_id'],
+              {'plan': user['plan_name'], 'days': user['duration_days'], 'bulk': True})
+
+    # Telegram bog'langan foydalanuvchilarga xabar yuborish
+    notifications = []
+    for user in updated:
+        if not user['telegram_id']:
+            continue
+
+        duration_text = (
+            f"📅 Amal qilish muddati: {user['duration_days']} kun\n\n"
+            if user['duration_days'] else "\n"
+        )
+        notifications.append((
+            user['telegram_id'],
+            f"✅ TARIFINGIZ TASDIQLANDI!\n\n"
+            f"📋 Yangi tarif: {user['plan_name']}\n"
+            f"{duration_text}"
+            f"🎉 Kutubxonadan to'liq foydalanishingiz mumkin!"
+        ))
+
+    sent_count, failed_count = await send_messages_concurrently(message.bot, notifications)
+
+    report = (
+        "📦 OMMAVIY TASDIQLASH NATIJASI\n\n"
+        f"✅ Tasdiqlandi: {len(updated)} ta\n"
+        f"❌ Topilmadi: {len(not_found)} ta\n"
+        f"⚠️ Noto'g'ri qatorlar: {len(errors)} ta\n\n"
+        f"📨 Xabar yuborildi: {sent_count} ta\n"
+        f"📵 Yuborilmadi: {failed_count} ta\n"
+        f"📵 Telegram yo'q: {len(updated) - len(notifications)} ta"
+    )
+
+    if not_found:
+        report += "\n\n❌ TOPILMAGAN ID LAR:\n" + ", ".join(not_found[:MAX_REPORT_ITEMS])
+        if len(not_found) > MAX_REPORT_ITEMS:
+            report += f" ... (+{len(not_found) - MAX_REPORT_ITEMS})"
+
+    if errors:
+        report += "\n\n⚠️ XATOLAR:\n" + "\n".join(errors[:MAX_REPORT_ITEMS])
+        if len(errors) > MAX_REPORT_ITEMS:
+            report += f"\n... (+{len(errors) - MAX_REPORT_ITEMS})"
+
+    await message.answer(report)
+
+
+@router.message(Command("bulkapprove"))
+async def cmd_bulk_approve(message: Message, state: FSMContext):
+    """Ommaviy tasdiqlashni boshlash"""
+    admin_manager = AdminManager()
+
+    if not admin_manager.is_admin(message.from_user.id):
+        await message.answer("❌ Sizda admin huquqi yo'q!")
+        admin_manager.close()
+        return
+
+    admin_manager.close()
+
+    await message.answer(
+        "📦 OMMAVIY TASDIQLASH\n\n"
+        "Ro'yxatni xabar sifatida yoki CSV fayl qilib yuboring.\n\n"
+        "📝 Format (har bir qatorda):\n"
+        "library_id plan [days]\n\n"
+        "Masalan:\n"
+        "ID0001 Money\n"
+        "ID0002 Premium 60\n"
+        "ID0003 Free\n\n"
+        "❌ Bekor qilish: /cancel"
+    )
+    await state.set_state(AdminStates.waiting_for_approval)
+
+
+@router.message(AdminStates.waiting_for_approval, (F.text & ~F.text.startswith("/")) | F.document)
+async def process_bulk_approve(message: Message, state: FSMContext):
+    """Ommaviy tasdiqlash ro'yxatini qabul qilish"""
+    admin_manager = AdminManager()
+
+    if not admin_manager.is_admin(message.from_user.id):
+        await message.answer("❌ Sizda admin huquqi yo'q!")
+        admin_manager.close()
+        await state.clear()
+        return
+
+    admin_manager.close()
+
+    await state.clear()
+    await run_bulk_approve(message)
+
+
 @router.callback_query(F.data == "admin_search")
 async def admin_search_info(callback: CallbackQuery):
     """Qidirish haqida ma'lumot"""
@@ -374,6 +551,27 @@ async def search_users(message: Message):
         await message.answer(f"❌ Xatolik: {str(e)}")
 
 
+@router.message(Command("latency"))
+async def cmd_latency(message: Message):
+    """Handlerlar latency statistikasi (p50/p95/p99)"""
+    admin_manager = AdminManager()
+
+    if not admin_manager.is_admin(message.from_user.id):
+        await message.answer("❌ Sizda admin huquqi yo'q!")
+        admin_manager.close()
+        return
+
+    admin_manager.close()
+
+    report = tracer.format_report()
+
+    if not report:
+        await message.answer("⏱️ Hozircha latency ma'lumotlari yo'q")
+        return
+
+    await message.answer(f"⏱️ HANDLER LATENCY (p95 bo'yicha)\n\n{report}")
+
+
 # ========================================
 # SUPER ADMIN FUNKTSIYALARI
 # ========================================
@@ -405,13 +603,7 @@ async def super_admin_list(callback: CallbackQuery):
             f"   📅 {admin.added_date.strftime('%d.%m.%Y')}\n\n"
         )
 
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="➕ Admin qo'shish", callback_data="super_add_admin")],
-        [InlineKeyboardButton(text="➖ Admin o'chirish", callback_data="super_remove_admin")],
-        [InlineKeyboardButton(text="🔙 Orqaga", callback_data="admin_back")]
-    ])
-
-    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.message.edit_text(text, reply_markup=ADMIN_LIST_KEYBOARD)
     await callback.answer()
     admin_manager.close()
 
@@ -493,6 +685,9 @@ async def process_add_admin(message: Message):
             added_by=message.from_user.id
         )
 
+        audit('add_admin', message.from_user.id, library_id,
+              {'telegram_id': user.telegram_id} if success else {'error': msg}, success)
+
         if success:
             await message.answer(
                 f"✅ YANGI ADMIN QO'SHILDI!\n\n"
@@ -575,6 +770,8 @@ async def process_remove_admin(message: Message):
             removed_by=message.from_user.id
         )
 
+        audit('remove_admin', message.from_user.id, library_id, None if success else {'error': msg}, success)
+
         await message.answer(msg)
         admin_manager.close()
 
@@ -652,17 +849,10 @@ async def process_add_user_last_name(message: Message, state: FSMContext):
 @router.message(AddUserStates.phone_number)
 async def process_add_user_phone(message: Message, state: FSMContext):
     """Telefon raqamni qabul qilish"""
-    phone_number = message.text.strip()
+    # Telefon raqamni E.164 formatiga keltirish va tekshirish
+    phone_number = normalize_phone(message.text)
 
-    # Telefon raqamni formatlash
-    if not phone_number.startswith('+'):
-        if phone_number.startswith('998'):
-            phone_number = '+' + phone_number
-        else:
-            phone_number = '+998' + phone_number.lstrip('0')
-
-    # Telefon raqam formatini tekshirish
-    if len(phone_number.replace('+', '')) < 12:
+    if not phone_number:
         await message.answer(
             "❌ Noto'g'ri telefon raqam!\n\n"
             "To'g'ri format: +998901234567\n"
@@ -728,6 +918,10 @@ async def process_add_user_study_place(message: Message, state: FSMContext):
     )
     db.close()
 
+    audit('add_user', message.from_user.id, user.library_id if user else None,
+          {'phone': data['phone_number']} if user else {'phone': data['phone_number'], 'error': error},
+          user is not None)
+
     if error:
         await message.answer(f"❌ Xatolik yuz berdi:\n{error}")
         await state.clear()
@@ -762,10 +956,10 @@ async def admin_back(callback: CallbackQuery):
     admin = admin_manager.get_admin_by_telegram_id(callback.from_user.id)
 
     if admin.is_super_admin:
-        keyboard = get_super_admin_keyboard()
+        keyboard = SUPER_ADMIN_KEYBOARD
         text = "🔐 SUPER ADMIN PANEL\n\nKerakli bo'limni tanlang:"
     else:
-        keyboard = get_admin_keyboard()
+        keyboard = ADMIN_KEYBOARD
         text = "🔐 ADMIN PANEL\n\nKerakli bo'limni tanlang:"
 
     await callback.message.edit_text(text, reply_markup=keyboard)
@@ -7,8 +7,10 @@ from aiogram import Router, F
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import Message, ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
+from aiogram.types import Message
 from ijara_kitoblar.database.db_manager import DatabaseManager
+from ijara_kitoblar.database.phone import normalize_phone
+from bot.utils.rendering import CONTACT_KEYBOARD, REMOVE_KEYBOARD
 from datetime import datetime
 
 router = Router()
@@ -113,18 +115,11 @@ async def process_last_name(message: Message, state: FSMContext):
     
     await state.update_data(last_name=last_name)
     
-    # Telefon raqam uchun keyboard
-    keyboard = ReplyKeyboardMarkup(
-        keyboard=[[KeyboardButton(text="📱 Telefon raqamni yuborish", request_contact=True)]],
-        resize_keyboard=True,
-        one_time_keyboard=True
-    )
-    
     await message.answer(
         "3️⃣ Telefon raqamingizni yuboring:\n\n"
         "Format: +998XXXXXXXXX\n"
         "yoki tugmani bosing 👇",
-        reply_markup=keyboard
+        reply_markup=CONTACT_KEYBOARD
     )
     await state.set_state(Registration.phone_number)
 
@@ -132,15 +127,13 @@ async def process_last_name(message: Message, state: FSMContext):
 @router.message(Registration.phone_number, F.contact)
 async def process_phone_contact(message: Message, state: FSMContext):
     """Kontakt orqali telefon qabul qilish"""
-    phone_number = message.contact.phone_number
-    if not phone_number.startswith('+'):
-        phone_number = '+' + phone_number
+    phone_number = normalize_phone(message.contact.phone_number) or message.contact.phone_number
     
     await state.update_data(phone_number=phone_number)
     await message.answer(
         "4️⃣ Tug'ilgan yilingizni kiriting:\n\n"
         "Masalan: 2000",
-        reply_markup=ReplyKeyboardRemove()
+        reply_markup=REMOVE_KEYBOARD
     )
     await state.set_state(Registration.birth_year)
 
@@ -148,17 +141,10 @@ async def process_phone_contact(message: Message, state: FSMContext):
 @router.message(Registration.phone_number, F.text)
 async def process_phone_text(message: Message, state: FSMContext):
     """Matn orqali telefon qabul qilish"""
-    phone_number = message.text.strip()
+    # Telefon raqamni E.164 formatiga keltirish va tekshirish
+    phone_number = normalize_phone(message.text)
     
-    # Telefon raqamni formatlash
-    if not phone_number.startswith('+'):
-        if phone_number.startswith('998'):
-            phone_number = '+' + phone_number
-        else:
-            phone_number = '+998' + phone_number.lstrip('0')
-    
-    # Telefon raqam formatini tekshirish
-    if len(phone_number.replace('+', '')) < 12:
+    if not phone_number:
         await message.answer(
             "❌ Noto'g'ri telefon raqam!\n\n"
             "To'g'ri format: +998901234567\n"
@@ -170,7 +156,7 @@ async def process_phone_text(message: Message, state: FSMContext):
     await message.answer(
         "4️⃣ Tug'ilgan yilingizni kiriting:\n\n"
         "Masalan: 2000",
-        reply_markup=ReplyKeyboardRemove()
+        reply_markup=REMOVE_KEYBOARD
     )
     await state.set_state(Registration.birth_year)
 
@@ -332,19 +318,13 @@ async def process_link_library_id(message: Message, state: FSMContext):
     # Telefon raqam orqali tasdiqlash
     await state.update_data(library_id=library_id, user_data=user)
     
-    keyboard = ReplyKeyboardMarkup(
-        keyboard=[[KeyboardButton(text="📱 Telefon raqamni yuborish", request_contact=True)]],
-        resize_keyboard=True,
-        one_time_keyboard=True
-    )
-    
     await message.answer(
         f"✅ {library_id} ID topildi!\n\n"
         f"👤 {user.full_name}\n"
         f"📞 {user.phone_number}\n\n"
         f"🔐 TASDIQLASH:\n"
         f"Telefon raqamingizni yuboring (tugmani bosing):",
-        reply_markup=keyboard
+        reply_markup=CONTACT_KEYBOARD
     )
     await state.set_state(LinkAccount.phone_verification)
 
@@ -357,21 +337,19 @@ async def process_link_phone_verification(message: Message, state: FSMContext):
     user = data['user_data']
     
     phone_number = message.contact.phone_number
-    if not phone_number.startswith('+'):
-        phone_number = '+' + phone_number
     
-    # Telefon raqamni solishtirish
-    user_phone = user.phone_number.replace(' ', '').replace('-', '')
-    input_phone = phone_number.replace(' ', '').replace('-', '')
+    # Telefon raqamni solishtirish (ikkalasi ham E.164 ko'rinishida)
+    user_phone = user.phone_normalized or normalize_phone(user.phone_number)
+    input_phone = normalize_phone(phone_number)
     
-    if user_phone != input_phone:
+    if not input_phone or user_phone != input_phone:
         await message.answer(
             "❌ Telefon raqam mos kelmadi!\n\n"
             f"Ro'yxatdagi raqam: {user.phone_number}\n"
             f"Yuborilgan raqam: {phone_number}\n\n"
             "Iltimos, to'g'ri telefon raqamni yuboring yoki\n"
             "admin bilan bog'laning.",
-            reply_markup=ReplyKeyboardRemove()
+            reply_markup=REMOVE_KEYBOARD
         )
         return
     
@@ -393,12 +371,12 @@ async def process_link_phone_verification(message: Message, state: FSMContext):
             "• /subscription - Tarifni ko'rish/o'zgartirish\n"
             "• /profile - Profilni ko'rish\n"
             "• /help - Yordam",
-            reply_markup=ReplyKeyboardRemove()
+            reply_markup=REMOVE_KEYBOARD
         )
     else:
         await message.answer(
             f"❌ {msg}",
-            reply_markup=ReplyKeyboardRemove()
+            reply_markup=REMOVE_KEYBOARD
         )
     
     await state.clear()
@@ -419,7 +397,7 @@ async def cmd_cancel(message: Message, state: FSMContext):
         "Qaytadan boshlash uchun:\n"
         "• /register - Yangi ro'yxat\n"
         "• /link - Library ID ni bog'lash",
-        reply_markup=ReplyKeyboardRemove()
+        reply_markup=REMOVE_KEYBOARD
     )
 
 
@@ -438,9 +416,8 @@ async def cmd_profile(message: Message):
         return
     
     subscription_info = ""
-    if user.subscription_plan != 'Free' and user.subscription_end_date:
-        days_left = user.subscription_end_date - datetime.now()
-        subscription_info = f"\n📅 Amal qilish muddati: {days_left.days} kun"
+    if user.days_until_expiry is not None:
+        subscription_info = f"\n📅 Amal qilish muddati: {user.days_until_expiry} kun"
     
     await message.answer(
         "👤 PROFIL MA'LUMOTLARI\n\n"
@@ -3,37 +3,17 @@ Subscription Handler - Tariflar bilan ishlash
 """
 from aiogram import Router, F
 from aiogram.filters import Command
-from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
+from aiogram.types import Message, CallbackQuery
 from ijara_kitoblar.database.db_manager import DatabaseManager
 from ijara_kitoblar.config import SUBSCRIPTION_PLANS
-from datetime import datetime
+from bot.utils.rendering import (
+    get_subscription_keyboard, plan_emoji, render_paid_plan,
+    FREE_SWITCHED_TEXT, PLAN_FEATURES_BLOCKS, SEPARATOR
+)
 
 router = Router()
 
 
-def get_subscription_keyboard(current_plan: str = None):
-    """Tariflar klaviaturasi"""
-    buttons = []
-    
-    for plan_name, plan_info in SUBSCRIPTION_PLANS.items():
-        price_text = f"{plan_info['price']:,} so'm" if plan_info['price'] > 0 else "Bepul"
-        
-        # Hozirgi tarif belgisi
-        prefix = "✅ " if plan_name == current_plan else ""
-        
-        if plan_name == "Free":
-            emoji = "🟢"
-        elif plan_name == "Money":
-            emoji = "🔵"
-        else:
-            emoji = "🟣"
-        
-        button_text = f"{prefix}{emoji} {plan_name} ({price_text})"
-        buttons.append([InlineKeyboardButton(text=button_text, callback_data=f"plan_{plan_name}")])
-    
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
-
-
 @router.message(Command("subscription"))
 async def cmd_subscription(message: Message):
     """Tariflar bo'limi"""
@@ -51,8 +31,8 @@ async def cmd_subscription(message: Message):
     # Hozirgi tarif haqida ma'lumot
     subscription_info = f"📋 Hozirgi tarif: {user.subscription_plan}"
     
-    if user.subscription_plan != 'Free' and user.subscription_end_date:
-        days_left = (user.subscription_end_date - datetime.now()).days
+    if user.days_until_expiry is not None:
+        days_left = user.days_until_expiry
         if days_left > 0:
             subscription_info += f"\n⏳ Tugashiga: {days_left} kun"
         else:
@@ -76,8 +56,6 @@ async def process_plan_selection(callback: CallbackQuery):
         await callback.answer("❌ Noto'g'ri tarif!", show_alert=True)
         return
     
-    plan = SUBSCRIPTION_PLANS[plan_name]
-    
     db = DatabaseManager()
     user = db.get_user_by_telegram_id(callback.from_user.id)
     
@@ -88,18 +66,12 @@ async def process_plan_selection(callback: CallbackQuery):
     
     # Free tarifga avtomatik o'tish
     if plan_name == "Free":
-        success, msg = db.update_subscription(user.library_id, plan_name)
+        success, msg = db.update_subscription(user.library_id, plan_name, expected_version=user.version)
         db.close()
         
         if success:
-            await callback.message.edit_text(
-                f"✅ FREE TARIFGA O'TDINGIZ!\n\n"
-                f"🟢 Bu tarif bepul va cheksiz.\n\n"
-                f"📋 Xususiyatlar:\n"
-            )
-            
-            for feature in plan['features']:
-                await callback.message.answer(f"  • {feature}")
+            # Xususiyatlar ham shu xabarda - bitta API chaqiruv
+            await callback.message.edit_text(FREE_SWITCHED_TEXT)
         else:
             await callback.message.edit_text(f"❌ {msg}")
     
@@ -107,25 +79,7 @@ async def process_plan_selection(callback: CallbackQuery):
     else:
         db.close()
         
-        features_text = "\n".join([f"  ✓ {f}" for f in plan['features']])
-        
-        await callback.message.edit_text(
-            f"{'🔵' if plan_name == 'Money' else '🟣'} {plan_name.upper()} TARIF\n\n"
-            f"━━━━━━━━━━━━━━━━━━━━\n"
-            f"💰 Narx: {plan['price']:,} so'm\n"
-            f"📅 Muddat: {plan['duration_days']} kun\n"
-            f"━━━━━━━━━━━━━━━━━━━━\n\n"
-            f"📋 XUSUSIYATLAR:\n{features_text}\n\n"
-            f"━━━━━━━━━━━━━━━━━━━━\n"
-            f"💳 TO'LOV MA'LUMOTLARI:\n\n"
-            f"1️⃣ To'lovni amalga oshiring\n"
-            f"2️⃣ Kvitansiya rasmini adminga yuboring\n"
-            f"3️⃣ Sizning Library ID ingizni ayting\n\n"
-            f"📚 Library ID: {user.library_id}\n\n"
-            f"✅ Admin tasdiqlashidan so'ng obunangiz\n"
-            f"   faollashadi va sizga xabar keladi.\n\n"
-            f"📞 Savollar bo'lsa admin bilan bog'laning."
-        )
+        await callback.message.edit_text(render_paid_plan(plan_name, user.library_id))
     
     await callback.answer()
 
@@ -142,23 +96,15 @@ async def cmd_my_subscription(message: Message):
         return
     
     plan_name = user.subscription_plan
-    plan = SUBSCRIPTION_PLANS.get(plan_name, {})
-    
-    if plan_name == 'Free':
-        emoji = "🟢"
-    elif plan_name == 'Money':
-        emoji = "🔵"
-    else:
-        emoji = "🟣"
     
     text = (
-        f"{emoji} HOZIRGI TARIF: {plan_name.upper()}\n\n"
-        f"━━━━━━━━━━━━━━━━━━━━\n"
+        f"{plan_emoji(plan_name)} HOZIRGI TARIF: {plan_name.upper()}\n\n"
+        f"{SEPARATOR}\n"
         f"📚 Library ID: {user.library_id}\n"
     )
     
-    if plan_name != 'Free' and user.subscription_end_date:
-        days_left = (user.subscription_end_date - datetime.now()).days
+    if user.days_until_expiry is not None:
+        days_left = user.days_until_expiry
         
         if days_left > 0:
             text += f"📅 Tugashiga: {days_left} kun\n"
@@ -167,13 +113,10 @@ async def cmd_my_subscription(message: Message):
             text += "⚠️ Obuna muddati tugagan!\n"
             text += "💡 Tarifni yangilang: /subscription\n"
     
-    text += "━━━━━━━━━━━━━━━━━━━━\n\n"
+    text += f"{SEPARATOR}\n\n"
     
     # Xususiyatlar
-    if 'features' in plan:
-        text += "📋 XUSUSIYATLAR:\n"
-        for feature in plan['features']:
-            text += f"  ✓ {feature}\n"
+    text += PLAN_FEATURES_BLOCKS.get(plan_name, "")
     
     text += "\n💡 Tarifni o'zgartirish: /subscription"
     
@@ -0,0 +1,139 @@
+"""
+Audit Utils - Admin harakatlarini jurnalga navbat orqali yozish
+Handler faqat yozuvni navbatga qo'shadi (put_nowait, kutmaydi). Fon task yozuvlarni
+AUDIT_FLUSH_INTERVAL_MS oralig'ida yoki AUDIT_BATCH_SIZE ga yetganda bitta INSERT bilan
+database ga yozadi (thread da, event loop bloklanmaydi).
+
+Ishlatish:
+    from bot.utils.audit import audit
+    audit('approve', message.from_user.id, library_id, {'plan': plan_name}, success)
+"""
+import asyncio
+import logging
+from typing import Callable, List, Optional
+
+from ijara_kitoblar.config import AUDIT_FLUSH_INTERVAL_MS, AUDIT_BATCH_SIZE, AUDIT_QUEUE_SIZE
+from ijara_kitoblar.database.audit_manager import AuditManager, audit_record
+
+logger = logging.getLogger(__name__)
+
+# Navbatni to'xtatish belgisi
+_STOP = object()
+
+
+class AuditQueue:
+    """
+    Audit yozuvlari navbati
+
+    Bot bitta event loop da ishlaydi: record() navbatga qo'shadi, run() esa
+    yozuvlarni bo'laklab database ga yozadi. Navbat to'lsa yangi yozuv tashlab
+    yuboriladi (handler hech qachon database ni kutmaydi).
+    """
+
+    def __init__(self, writer: Optional[Callable[[List[dict]], int]] = None,
+                 flush_interval_ms: int = AUDIT_FLUSH_INTERVAL_MS,
+                 batch_size: int = AUDIT_BATCH_SIZE, max_size: int = AUDIT_QUEUE_SIZE):
+        """
+        Args:
+            writer: Bo'lakni yozuvchi funksiya (default: AuditManager().write_batch)
+            flush_interval_ms: Birinchi yozuvdan keyin bo'lakni yozishgacha kutish
+            batch_size: Bo'lakdagi maksimal yozuvlar
+            max_size: Navbat hajmi
+        """
+        self._writer = writer
+        self.flush_interval = flush_interval_ms / 1000
+        self.batch_size = batch_size
+        self._queue = asyncio.Queue(maxsize=max_size)
+        self._task: Optional[asyncio.Task] = None
+
+        # Statistika
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def depth(self) -> int:
+        """Navbatda kutayotgan yozuvlar soni"""
+        return self._queue.qsize()
+
+    def record(self, action: str, actor_telegram_id: Optional[int] = None,
+               target_library_id: Optional[str] = None, details: Optional[dict] = None,
+               success: bool = True):
+        """Yozuvni navbatga qo'shish (bloklanmaydi)"""
+        try:
+            self._queue.put_nowait(audit_record(action, actor_telegram_id, target_library_id, details, success))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            # Navbat to'lganda log ni to'ldirib yubormaslik uchun har 1000 tadan biri
+            if self.dropped % 1000 == 1:
+                logger.warning(f"⚠️ Audit navbati to'la, yozuvlar tashlab yuborilmoqda "
+                               f"(jami: {self.dropped}, oxirgisi: {action} {target_library_id or ''})")
+
+    def start(self):
+        """Fon yozuvchi task ni ishga tushirish"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+            logger.info("📝 Audit navbati ishga tushdi")
+
+    async def stop(self):
+        """Qolgan yozuvlarni yozib, fon task ni to'xtatish (bot to'xtaganda)"""
+        if self._task is None or self._task.done():
+            return
+
+        await self._queue.put(_STOP)
+        await self._task
+        logger.info(f"📝 Audit navbati to'xtatildi (yozildi: {self.written}, "
+                    f"tashlandi: {self.dropped}, xato: {self.failed})")
+
+    async def run(self):
+        """Navbatdan bo'laklarni yig'ish va yozish"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            stopping = False
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._write(batch)
+
+            if stopping:
+                return
+
+    async def _write(self, batch: List[dict]):
+        """Bo'lakni thread da yozish (xato bo'lsa log ga yoziladi, navbat to'xtamaydi)"""
+        try:
+            if self._writer is None:
+                self._writer = AuditManager().write_batch
+
+            self.written += await asyncio.to_thread(self._writer, batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"❌ Audit yozuvlarini saqlashda xato ({len(batch)} ta): {e}")
+
+
+# Jarayon bo'yicha yagona navbat
+audit_queue = AuditQueue()
+
+
+def audit(action: str, actor_telegram_id: Optional[int] = None,
+          target_library_id: Optional[str] = None, details: Optional[dict] = None,
+          success: bool = True):
+    """Admin harakatini jurnalga qo'shish (audit_queue.record qisqa nomi)"""
+    audit_queue.record(action, actor_telegram_id, target_library_id, details, success)
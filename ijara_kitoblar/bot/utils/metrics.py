@@ -0,0 +1,318 @@
+"""
+Metrics Utils - Prometheus formatidagi /metrics endpoint
+Bitta bot nusxasi qayerda chegaraga yetayotganini ko'rish uchun:
+- handlerlar bo'yicha update'lar (jami va updates/sec), latency p50/p95/p99
+- DB connection pool holati
+- bildirishnoma navbati chuqurligi va xabar yuborish tezligi
+- Telegram API xatolari (kod bo'yicha)
+- event loop kechikishi
+
+Endpoint main.on_startup da ishga tushadi va METRICS_HOST:METRICS_PORT da tinglaydi:
+    curl http://127.0.0.1:9499/metrics
+
+Prometheus:
+    scrape_configs:
+      - job_name: kutubxona_bot
+        static_configs:
+          - targets: ['127.0.0.1:9499']
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from typing import Dict, Iterable, Optional, Tuple
+
+from aiohttp import web
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import (
+    TelegramAPIError, TelegramBadRequest, TelegramConflictError, TelegramEntityTooLarge,
+    TelegramForbiddenError, TelegramMigrateToChat, TelegramNetworkError, TelegramNotFound,
+    TelegramRetryAfter, TelegramServerError, TelegramUnauthorizedError
+)
+
+from ijara_kitoblar.config import METRICS_HOST, METRICS_PORT, METRICS_LAG_INTERVAL, METRICS_RATE_WINDOW
+from ijara_kitoblar.database.engine import pool_status
+from bot.utils.tracing import tracer, percentiles
+from bot.utils.audit import audit_queue
+from bot.utils.notification import broadcast_stats
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Exception -> HTTP kod (tartib muhim: voris klasslar birinchi)
+_ERROR_CODES = (
+    (TelegramRetryAfter, "429"),
+    (TelegramMigrateToChat, "400"),
+    (TelegramBadRequest, "400"),
+    (TelegramUnauthorizedError, "401"),
+    (TelegramForbiddenError, "403"),
+    (TelegramNotFound, "404"),
+    (TelegramConflictError, "409"),
+    (TelegramEntityTooLarge, "413"),
+    (TelegramServerError, "5xx"),
+    (TelegramNetworkError, "network"),
+)
+
+_QUANTILES = (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99"))
+
+
+def telegram_error_code(error: TelegramAPIError) -> str:
+    """Telegram API xatosi uchun kod (label qiymati)"""
+    for error_type, code in _ERROR_CODES:
+        if isinstance(error, error_type):
+            return code
+    return "other"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_metric(name: str, metric_type: str, help_text: str,
+                   samples: Iterable[Tuple[dict, float]]) -> str:
+    """Bitta metrika (HELP, TYPE va qiymatlar) Prometheus matn formatida"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(labels)} {value:g}" if isinstance(value, float)
+                     else f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines)
+
+
+class MetricsCollector:
+    """
+    Jarayon metrikalari
+
+    Fon task har METRICS_LAG_INTERVAL da event loop kechikishini o'lchaydi va
+    hisoblagichlardan namuna oladi; tezliklar (updates/sec, xabar/sec) oxirgi
+    METRICS_RATE_WINDOW soniyadagi namunalar bo'yicha hisoblanadi.
+    """
+
+    def __init__(self, lag_interval: float = METRICS_LAG_INTERVAL, rate_window: int = METRICS_RATE_WINDOW):
+        self.lag_interval = lag_interval
+        self.rate_window = rate_window
+        self.started = time.time()
+        self.lag = 0.0
+        self.api_errors: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._lags = deque()
+        self._samples = deque()
+        self._task: Optional[asyncio.Task] = None
+
+    def record_api_error(self, method: str, code: str):
+        """Telegram API xatosini hisoblash"""
+        self.api_errors[(method, code)] += 1
+
+    @staticmethod
+    def _counters() -> Tuple[Dict[str, int], int]:
+        """Handlerlar bo'yicha update'lar va yuborilgan xabarlar soni"""
+        updates = {name: stats.total.count for name, stats in tracer.handlers.items()}
+        return updates, broadcast_stats.sent
+
+    def start(self):
+        """Namuna olish task ini ishga tushirish"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    def stop(self):
+        """Namuna olish task ini to'xtatish"""
+        if self._task is not None:
+            self._task.cancel()
+
+    async def run(self):
+        """Event loop kechikishini o'lchash va hisoblagichlardan namuna olish"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            expected = loop.time() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            now = loop.time()
+
+            # Uyqu rejalashtirilgandan qancha kech tugadi - loop shuncha band bo'lgan
+            self.lag = max(0.0, now - expected)
+            self._lags.append((now, self.lag))
+            self._samples.append((now, self._counters()))
+
+            window_start = now - self.rate_window
+            while self._lags and self._lags[0][0] < window_start:
+                self._lags.popleft()
+            while len(self._samples) > 1 and self._samples[0][0] < window_start:
+                self._samples.popleft()
+
+    def rates(self) -> Tuple[Dict[str, float], float]:
+        """
+        Oyna bo'yicha tezliklar
+
+        Returns:
+            ({handler: updates/sec}, yuborilgan xabarlar/sec)
+        """
+        if not self._samples:
+            return {}, 0.0
+
+        started, (old_updates, old_sent) = self._samples[0]
+        elapsed = asyncio.get_running_loop().time() - started
+        if elapsed <= 0:
+            return {}, 0.0
+
+        updates, sent = self._counters()
+        handler_rates = {
+            name: round((count - old_updates.get(name, 0)) / elapsed, 3)
+            for name, count in updates.items()
+        }
+        return handler_rates, round((sent - old_sent) / elapsed, 3)
+
+    def render(self) -> str:
+        """Barcha metrikalar Prometheus matn formatida"""
+        handler_rates, send_rate = self.rates()
+        blocks = [
+            _format_metric("bot_uptime_seconds", "gauge", "Bot ishlayotgan vaqt",
+                           [({}, round(time.time() - self.started, 1))]),
+
+            # Handlerlar
+            _format_metric("bot_updates_total", "counter", "Qayta ishlangan update'lar (handler bo'yicha)",
+                           [({"handler": name}, stats.total.count) for name, stats in tracer.handlers.items()]),
+            _format_metric("bot_updates_per_second", "gauge",
+                           f"Oxirgi {self.rate_window} soniyadagi updates/sec (handler bo'yicha)",
+                           [({"handler": name}, rate) for name, rate in handler_rates.items()]),
+            self._render_latency(),
+
+            # Database
+            self._render_pools(),
+
+            # Bildirishnomalar va audit navbati
+            _format_metric("bot_notification_queue_depth", "gauge", "Yuborilishini kutayotgan xabarlar",
+                           [({}, broadcast_stats.pending)]),
+            _format_metric("bot_broadcast_messages_total", "counter", "Bildirishnoma xabarlari (natija bo'yicha)",
+                           [({"result": "sent"}, broadcast_stats.sent),
+                            ({"result": "failed"}, broadcast_stats.failed),
+                            ({"result": "retry_after"}, broadcast_stats.retries)]),
+            _format_metric("bot_broadcast_send_rate", "gauge",
+                           f"Oxirgi {self.rate_window} soniyadagi xabar/sec",
+                           [({}, send_rate)]),
+            _format_metric("bot_audit_queue_depth", "gauge", "Yozilishini kutayotgan audit yozuvlari",
+                           [({}, audit_queue.depth)]),
+            _format_metric("bot_audit_records_total", "counter", "Audit yozuvlari (natija bo'yicha)",
+                           [({"result": "written"}, audit_queue.written),
+                            ({"result": "dropped"}, audit_queue.dropped),
+                            ({"result": "failed"}, audit_queue.failed)]),
+
+            # Telegram API
+            _format_metric("telegram_api_requests_total", "counter", "Telegram API chaqiruvlari (getUpdates siz)",
+                           [({"method": method}, buffer.count) for method, buffer in tracer.api_methods.items()]),
+            _format_metric("telegram_api_errors_total", "counter", "Telegram API xatolari (metod va kod bo'yicha)",
+                           [({"method": method, "code": code}, count)
+                            for (method, code), count in self.api_errors.items()]),
+
+            # Event loop
+            _format_metric("bot_event_loop_lag_seconds", "gauge", "Event loop kechikishi (oxirgi o'lchov)",
+                           [({}, round(self.lag, 6))]),
+            _format_metric("bot_event_loop_lag_max_seconds", "gauge",
+                           f"Oxirgi {self.rate_window} soniyadagi maksimal event loop kechikishi",
+                           [({}, round(max((lag for _, lag in self._lags), default=0.0), 6))]),
+        ]
+        return "\n".join(blocks) + "\n"
+
+    @staticmethod
+    def _render_latency() -> str:
+        """Handler latency (tracer ring buffer lari bo'yicha)"""
+        lines = [
+            "# HELP bot_handler_latency_seconds Update qabul qilingandan handler tugaguncha",
+            "# TYPE bot_handler_latency_seconds summary"
+        ]
+        for name, stats in tracer.handlers.items():
+            values = percentiles(stats.total.snapshot())
+            for quantile, key in _QUANTILES:
+                labels = _format_labels({"handler": name, "quantile": quantile})
+                lines.append(f"bot_handler_latency_seconds{labels} {values[key] / 1000:g}")
+            handler_labels = _format_labels({'handler': name})
+            lines.append(f"bot_handler_latency_seconds_sum{handler_labels} {stats.total.sum:g}")
+            lines.append(f"bot_handler_latency_seconds_count{handler_labels} {stats.total.count}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _render_pools() -> str:
+        """Connection pool holati (NullPool da faqat pool turi)"""
+        pools = pool_status()
+        blocks = []
+        for key, help_text in (("size", "Pool hajmi"),
+                               ("checked_out", "Band connection'lar"),
+                               ("checked_in", "Bo'sh connection'lar"),
+                               ("overflow", "Pool dan tashqari ochilgan connection'lar")):
+            blocks.append(_format_metric(
+                f"db_pool_{key}", "gauge", help_text,
+                [({"database": pool['database'], "pool": pool['pool']}, pool[key])
+                 for pool in pools if key in pool]
+            ))
+        return "\n".join(blocks)
+
+
+# Jarayon bo'yicha yagona collector
+metrics = MetricsCollector()
+
+_runner: Optional[web.AppRunner] = None
+
+
+class ApiErrorMiddleware(BaseRequestMiddleware):
+    """Bot session middleware - Telegram API xatolarini kod bo'yicha hisoblaydi"""
+
+    async def __call__(self, make_request, bot, method):
+        try:
+            return await make_request(bot, method)
+        except TelegramAPIError as e:
+            api_method = getattr(method, "__api_method__", type(method).__name__)
+            metrics.record_api_error(api_method, telegram_error_code(e))
+            raise
+
+
+def install_metrics(bot):
+    """Telegram API xatolarini hisoblash middleware'ini ulash"""
+    bot.session.middleware(ApiErrorMiddleware())
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    """GET /metrics"""
+    return web.Response(body=metrics.render().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+
+async def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT):
+    """
+    /metrics HTTP serverini ishga tushirish (port 0 bo'lsa o'chirilgan)
+
+    Port band bo'lsa xato log ga yoziladi, bot ishlashda davom etadi.
+    """
+    global _runner
+
+    if not port or _runner is not None:
+        return
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        logger.error(f"❌ Metrics serverini ishga tushirib bo'lmadi ({host}:{port}): {e}")
+        await runner.cleanup()
+        return
+
+    _runner = runner
+    metrics.start()
+    logger.info(f"📈 Metrics: http://{host}:{port}/metrics")
+
+
+async def stop_metrics_server():
+    """/metrics serverini to'xtatish"""
+    global _runner
+
+    metrics.stop()
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None
@@ -2,63 +2,181 @@
 Notification Utils - Bildirishnomalar yuborish
 """
 import asyncio
-from datetime import datetime, timedelta
+from typing import Iterable, Tuple
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
 from ijara_kitoblar.database.db_manager import DatabaseManager
+from ijara_kitoblar.database.models import User
+from ijara_kitoblar.config import BROADCAST_CONCURRENCY, BROADCAST_RATE, TELEGRAM_MAX_RETRIES
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-async def send_expiry_warnings(bot):
+class BroadcastStats:
     """
-    Obuna tugashiga 3 kun qolganda ogohlantirish yuborish
-    Har kuni bir marta ishlaydi
+    Bildirishnoma va ommaviy xabarlar statistikasi (bot/utils/metrics.py uchun)
+
+    pending - navbatda (semaphore / rate limit ni kutayotgan) xabarlar soni.
+    retries - 429 (retry_after) javoblari soni: RetryAfterMiddleware qayta yuborganlari
+    va urinishlar tugab chaqiruvchiga o'tganlari.
     """
-    logger.info("📢 Bildirishnoma tizimi ishga tushdi (Ogohlantirish)")
-    
-    while True:
-        try:
-            db = DatabaseManager()
-            
-            # 3 kun qolganlarni topish
-            warning_days = 3
-            users = db.get_users_expiring_soon(warning_days)
-            
-            sent_count = 0
-            error_count = 0
-            
-            for user in users:
-                # Faqat Telegram ID bor foydalanuvchilarga yuborish
-                if not user.telegram_id:
-                    continue
-                
-                if user.subscription_plan in ['Money', 'Premium'] and user.subscription_end_date:
-                    days_left = (user.subscription_end_date - datetime.now()).days
-                    
-                    if days_left < 0:
-                        continue  # Muddati allaqachon o'tgan
-                    
+    __slots__ = ("pending", "sent", "failed", "retries")
+
+    def __init__(self):
+        self.pending = 0
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+
+
+# Jarayon bo'yicha yagona statistika
+broadcast_stats = BroadcastStats()
+
+
+def _iter_batched(db: DatabaseManager, filters: list, batch_size: int):
+    """Bo'laklardagi foydalanuvchilar ketma-ket (bo'lak o'qilishi bilan connection bo'shaydi)"""
+    for batch in db.iter_user_batches(filters, batch_size=batch_size):
+        yield from batch
+
+
+async def scan_expiry_warnings(bot, db: DatabaseManager, warning_days: int = 3,
+                               delay: float = 0.5, batch_size: int = 1000) -> Tuple[int, int]:
+    """
+    Obunasi tugayotganlarga bir marta ogohlantirish yuborish
+
+    Foydalanuvchilar db.iter_user_batches orqali keyset bo'laklarida o'qiladi (xotira
+    doimiy); har bir bo'lak o'qilgach connection yopiladi, xabarlar undan keyin yuboriladi.
+
+    Args:
+        bot: Bot instance
+        db: DatabaseManager
+        warning_days: Necha kun qolganda ogohlantirish
+        delay: Xabarlar orasidagi pauza (rate limiting)
+        batch_size: Database dan bitta fetch dagi qatorlar soni
+
+    Returns:
+        (yuborilganlar soni, xatolar soni)
+    """
+    filters = db.expiring_soon_filters(warning_days) + [User.telegram_id.isnot(None)]
+
+    sent_count = 0
+    error_count = 0
+
+    for user in _iter_batched(db, filters, batch_size):
+        # Faqat Telegram ID bor foydalanuvchilarga yuborish
+        if not user.telegram_id:
+            continue
+
+        if user.days_until_expiry is not None:
+            days_left = user.days_until_expiry
+
+            if user.is_subscription_expired:
+                continue  # Muddati allaqachon o'tgan
+
+            try:
+                await bot.send_message(
+                    user.telegram_id,
+                    f"⚠️ OGOHLANTIRISH!\n\n"
+                    f"━━━━━━━━━━━━━━━━━━━━\n"
+                    f"📚 Library ID: {user.library_id}\n"
+                    f"👤 {user.full_name}\n"
+                    f"📋 Tarif: {user.subscription_plan}\n"
+                    f"━━━━━━━━━━━━━━━━━━━━\n\n"
+                    f"⏰ Obunangiz tugashiga {days_left} kun qoldi!\n\n"
+                    f"💡 Obunani uzaytirish uchun:\n"
+                    f"   /subscription\n\n"
+                    f"📌 Agar obuna tugasa, avtomatik ravishda\n"
+                    f"   Free rejimga o'tasiz."
+                )
+                sent_count += 1
+                broadcast_stats.sent += 1
+                await asyncio.sleep(delay)  # Rate limiting
+
+            except Exception as e:
+                error_count += 1
+                broadcast_stats.failed += 1
+                logger.error(f"Xabar yuborishda xato (user {user.library_id}): {e}")
+
+    return sent_count, error_count
+
+
+async def downgrade_expired_subscriptions(bot, db: DatabaseManager, delay: float = 0.5,
+                                          batch_size: int = 1000) -> Tuple[int, int]:
+    """
+    Muddati o'tgan obunalarni bir marta Free rejimga o'tkazish
+
+    Foydalanuvchilar db.iter_user_batches orqali keyset bo'laklarida o'qiladi (xotira
+    doimiy); yangilash va xabarlar bo'lak o'qilib, connection yopilgandan keyin bajariladi.
+    Keyset id bo'yicha, shuning uchun Free ga o'tkazilgan qatorlar keyingi bo'laklarni surmaydi.
+
+    Args:
+        bot: Bot instance
+        db: DatabaseManager
+        delay: Xabarlar orasidagi pauza (rate limiting)
+        batch_size: Database dan bitta fetch dagi qatorlar soni
+
+    Returns:
+        (Free ga o'tkazilganlar soni, xatolar soni)
+    """
+    updated_count = 0
+    error_count = 0
+
+    for user in _iter_batched(db, db.expired_filters(), batch_size):
+        if user.subscription_plan in ['Money', 'Premium']:
+            # Avtomatik Free rejimga o'tkazish
+            old_plan = user.subscription_plan
+            # Skanerlashdan keyin admin obunani uzaytirgan bo'lsa - o'zgartirilmaydi
+            success, msg = db.update_subscription(user.library_id, 'Free', expected_version=user.version)
+
+            if success:
+                updated_count += 1
+
+                # Faqat Telegram ID bor bo'lsa xabar yuborish
+                if user.telegram_id:
                     try:
                         await bot.send_message(
                             user.telegram_id,
-                            f"⚠️ OGOHLANTIRISH!\n\n"
+                            f"📢 OBUNA TUGADI!\n\n"
                             f"━━━━━━━━━━━━━━━━━━━━\n"
                             f"📚 Library ID: {user.library_id}\n"
                             f"👤 {user.full_name}\n"
-                            f"📋 Tarif: {user.subscription_plan}\n"
                             f"━━━━━━━━━━━━━━━━━━━━\n\n"
-                            f"⏰ Obunangiz tugashiga {days_left} kun qoldi!\n\n"
-                            f"💡 Obunani uzaytirish uchun:\n"
+                            f"❌ Sizning {old_plan} obunangiz muddati tugadi.\n"
+                            f"✅ Avtomatik ravishda Free rejimga o'tdingiz.\n\n"
+                            f"💰 Yangi obuna sotib olish:\n"
                             f"   /subscription\n\n"
-                            f"📌 Agar obuna tugasa, avtomatik ravishda\n"
-                            f"   Free rejimga o'tasiz."
+                            f"📚 Free rejimda kutubxonadan cheklangan\n"
+                            f"   foydalanishingiz mumkin."
                         )
-                        sent_count += 1
-                        await asyncio.sleep(0.5)  # Rate limiting
-                    
+                        broadcast_stats.sent += 1
+                        await asyncio.sleep(delay)  # Rate limiting
+
                     except Exception as e:
                         error_count += 1
+                        broadcast_stats.failed += 1
                         logger.error(f"Xabar yuborishda xato (user {user.library_id}): {e}")
+                else:
+                    # Telegram ID yo'q bo'lsa faqat log qilish
+                    logger.info(f"📝 {user.library_id} ({user.full_name}) - "
+                                f"Free rejimga o'tdi (Telegram yo'q)")
+
+    return updated_count, error_count
+
+
+async def send_expiry_warnings(bot):
+    """
+    Obuna tugashiga 3 kun qolganda ogohlantirish yuborish
+    Har kuni bir marta ishlaydi
+    """
+    logger.info("📢 Bildirishnoma tizimi ishga tushdi (Ogohlantirish)")
+    
+    while True:
+        try:
+            db = DatabaseManager()
+            
+            # 3 kun qolganlarni topish
+            sent_count, error_count = await scan_expiry_warnings(bot, db, warning_days=3)
             
             db.close()
             
@@ -83,46 +201,8 @@ async def check_expired_subscriptions(bot):
         try:
             db = DatabaseManager()
             
-            # Muddati o'tganlarni topish
-            expired_users = db.get_expired_subscriptions()
-            
-            updated_count = 0
-            error_count = 0
-            
-            for user in expired_users:
-                if user.subscription_plan in ['Money', 'Premium']:
-                    # Avtomatik Free rejimga o'tkazish
-                    old_plan = user.subscription_plan
-                    success, msg = db.update_subscription(user.library_id, 'Free')
-                    
-                    if success:
-                        updated_count += 1
-                        
-                        # Faqat Telegram ID bor bo'lsa xabar yuborish
-                        if user.telegram_id:
-                            try:
-                                await bot.send_message(
-                                    user.telegram_id,
-                                    f"📢 OBUNA TUGADI!\n\n"
-                                    f"━━━━━━━━━━━━━━━━━━━━\n"
-                                    f"📚 Library ID: {user.library_id}\n"
-                                    f"👤 {user.full_name}\n"
-                                    f"━━━━━━━━━━━━━━━━━━━━\n\n"
-                                    f"❌ Sizning {old_plan} obunangiz muddati tugadi.\n"
-                                    f"✅ Avtomatik ravishda Free rejimga o'tdingiz.\n\n"
-                                    f"💰 Yangi obuna sotib olish:\n"
-                                    f"   /subscription\n\n"
-                                    f"📚 Free rejimda kutubxonadan cheklangan\n"
-                                    f"   foydalanishingiz mumkin."
-                                )
-                                await asyncio.sleep(0.5)  # Rate limiting
-                            
-                            except Exception as e:
-                                error_count += 1
-                                logger.error(f"Xabar yuborishda xato (user {user.library_id}): {e}")
-                        else:
-                            # Telegram ID yo'q bo'lsa faqat log qilish
-                            logger.info(f"📝 {user.library_id} ({user.full_name}) - Free rejimga o'tdi (Telegram yo'q)")
+            # Muddati o'tganlarni topish va Free ga o'tkazish
+            updated_count, error_count = await downgrade_expired_subscriptions(bot, db)
             
             db.close()
             
@@ -199,3 +279,116 @@ async def send_notification_to_admins(bot, message: str):
     
     except Exception as e:
         logger.error(f"❌ Adminlarga xabar yuborishda xato: {e}")
+
+
+
+class RateLimiter:
+    """Sekundiga belgilangan sondan ortiq chaqiruv qilinmasligini ta'minlash"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        """Navbatdagi ruxsat etilgan vaqtgacha kutish"""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            # Kutish paytida pause() slotni surishi mumkin - qayta tekshiramiz
+            while True:
+                now = loop.time()
+                if self._next_slot <= now:
+                    break
+                await asyncio.sleep(self._next_slot - now)
+            self._next_slot = now + self.interval
+
+    def pause(self, seconds: float):
+        """Barcha yuboruvchilarni to'xtatish (429 retry_after) - navbatdagi slot kamida now + seconds"""
+        self._next_slot = max(self._next_slot, asyncio.get_running_loop().time() + seconds)
+
+
+class RetryAfterMiddleware(BaseRequestMiddleware):
+    """
+    Bot session middleware - 429 (retry_after) bo'lganda kutib, so'rovni qayta yuborish
+
+    Flood wait butun bot uchun: 429 kelganda retry_after tugaguncha boshqa
+    so'rovlar ham yuborilmaydi (handler javoblari, bildirishnomalar).
+    max_retries tugasa TelegramRetryAfter chaqiruvchiga o'tadi.
+    """
+
+    def __init__(self, max_retries: int = TELEGRAM_MAX_RETRIES):
+        self.max_retries = max_retries
+        self._resume_at = 0.0
+
+    async def _wait_flood(self):
+        loop = asyncio.get_running_loop()
+        while self._resume_at > loop.time():
+            await asyncio.sleep(self._resume_at - loop.time())
+
+    async def __call__(self, make_request, bot, method):
+        for attempt in range(self.max_retries + 1):
+            await self._wait_flood()
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self._resume_at = max(self._resume_at, asyncio.get_running_loop().time() + e.retry_after)
+                if attempt == self.max_retries:
+                    raise
+                broadcast_stats.retries += 1
+                logger.warning(f"⏳ Telegram limit: {e.retry_after} soniya kutib qayta yuboramiz "
+                               f"({getattr(method, '__api_method__', type(method).__name__)})")
+
+
+def install_retry(bot):
+    """429 da kutib qayta yuborish middleware'ini bot session ga ulash"""
+    bot.session.middleware(RetryAfterMiddleware())
+
+
+async def send_messages_concurrently(bot, messages: Iterable[Tuple[int, str]],
+                                     concurrency: int = BROADCAST_CONCURRENCY,
+                                     rate: float = BROADCAST_RATE) -> Tuple[int, int]:
+    """
+    Ko'p xabarlarni parallel, lekin rate limit bilan yuborish
+
+    429 larni bot session dagi RetryAfterMiddleware qayta yuboradi. Bu yerga
+    yetib kelgan 429 (urinishlar tugagan) - hamma yuboruvchilar to'xtatiladi,
+    xabar yuborilmagan deb hisoblanadi.
+
+    Args:
+        bot: Bot instance
+        messages: (telegram_id, xabar matni) juftliklari
+        concurrency: Bir vaqtda yuborilayotgan xabarlar soni
+        rate: Sekundiga maksimal xabarlar soni
+
+    Returns:
+        (yuborilganlar soni, xatolar soni)
+    """
+    limiter = RateLimiter(rate)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send_one(chat_id: int, text: str) -> bool:
+        try:
+            async with semaphore:
+                await limiter.wait()
+                try:
+                    await bot.send_message(chat_id, text)
+                    broadcast_stats.sent += 1
+                    return True
+                except TelegramRetryAfter as e:
+                    broadcast_stats.retries += 1
+                    # Flood wait butun bot uchun - umumiy limiter orqali hamma to'xtaydi
+                    limiter.pause(e.retry_after)
+                    logger.error(f"Telegram limit: urinishlar tugadi, {e.retry_after} soniya kutamiz ({chat_id})")
+                except Exception as e:
+                    logger.error(f"Xabar yuborishda xato ({chat_id}): {e}")
+                broadcast_stats.failed += 1
+                return False
+        finally:
+            broadcast_stats.pending -= 1
+
+    messages = list(messages)
+    broadcast_stats.pending += len(messages)
+    results = await asyncio.gather(*(send_one(chat_id, text) for chat_id, text in messages))
+
+    sent_count = sum(1 for ok in results if ok)
+    return sent_count, len(results) - sent_count
@@ -0,0 +1,62 @@
+"""
+Profiling Utils - Botning ishga tushish bosqichlarini o'lchash
+Faqat standart kutubxona ishlatiladi, shuning uchun main.py da eng birinchi import qilinadi.
+
+Batafsil import tahlili uchun: python -X importtime main.py
+"""
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+
+class StartupProfiler:
+    """Import va ishga tushish bosqichlari vaqtini yozib borish"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.phases: List[Tuple[str, float, float]] = []  # (nom, boshlanish, davomiylik)
+        self.marks: List[Tuple[str, float]] = []  # (nom, jarayon boshidan vaqt)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Blok bajarilish vaqtini bosqich sifatida yozish"""
+        phase_started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, phase_started - self.started, time.perf_counter() - phase_started))
+
+    def mark(self, name: str):
+        """Muhim nuqtani yozish (masalan: polling boshlandi, birinchi update)"""
+        if not self.has_mark(name):
+            self.marks.append((name, time.perf_counter() - self.started))
+
+    def has_mark(self, name: str) -> bool:
+        """Nuqta allaqachon yozilganligini tekshirish"""
+        return any(mark_name == name for mark_name, _ in self.marks)
+
+    def report(self) -> str:
+        """Bosqichlar jadvali"""
+        lines = [
+            "=" * 60,
+            "⏱️ STARTUP PROFIL",
+            "=" * 60,
+            f"{'Bosqich':<36} {'boshlanish':>10} {'vaqt':>10}",
+            "-" * 60
+        ]
+        for name, offset, duration in self.phases:
+            lines.append(f"{name:<36} {offset * 1000:>8.1f}ms {duration * 1000:>8.1f}ms")
+
+        if self.marks:
+            lines.append("-" * 60)
+            for name, offset in self.marks:
+                lines.append(f"{name:<36} {offset * 1000:>8.1f}ms")
+
+        lines.append("=" * 60)
+        return "\n".join(lines)
+
+    def print_report(self):
+        """Profil yoqilgan bo'lsa hisobotni chiqarish"""
+        if self.enabled:
+            print(self.report(), flush=True)
@@ -0,0 +1,158 @@
+"""
+Rendering Utils - Oldindan tayyorlangan klaviaturalar va statik matnlar
+SUBSCRIPTION_PLANS o'zgarmaydi, shuning uchun klaviatura va tarif matnlari
+import paytida bir marta quriladi va har bir handler chaqiruvida qayta ishlatiladi.
+
+MUHIM: Klaviatura obyektlari barcha handlerlar uchun umumiy - ularni o'zgartirmang.
+"""
+from typing import Dict, Optional
+
+from aiogram.types import (
+    InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
+)
+
+from ijara_kitoblar.config import SUBSCRIPTION_PLANS
+
+SEPARATOR = "━━━━━━━━━━━━━━━━━━━━"
+
+PLAN_EMOJI = {
+    'Free': "🟢",
+    'Money': "🔵",
+    'Premium': "🟣"
+}
+
+
+def plan_emoji(plan_name: str) -> str:
+    """Tarif belgisi (noma'lum tariflar uchun 🟣)"""
+    return PLAN_EMOJI.get(plan_name, "🟣")
+
+
+def format_price(plan_info: dict) -> str:
+    """Narx matni: 50,000 so'm yoki Bepul"""
+    return f"{plan_info['price']:,} so'm" if plan_info['price'] > 0 else "Bepul"
+
+
+# ========================================
+# TARIF KLAVIATURALARI
+# ========================================
+
+def build_subscription_keyboard(current_plan: Optional[str] = None) -> InlineKeyboardMarkup:
+    """Tariflar klaviaturasini qurish (keshlanmaydi)"""
+    buttons = []
+
+    for plan_name, plan_info in SUBSCRIPTION_PLANS.items():
+        # Hozirgi tarif belgisi
+        prefix = "✅ " if plan_name == current_plan else ""
+        button_text = f"{prefix}{plan_emoji(plan_name)} {plan_name} ({format_price(plan_info)})"
+        buttons.append([InlineKeyboardButton(text=button_text, callback_data=f"plan_{plan_name}")])
+
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+# Har bir hozirgi tarif uchun alohida variant (None - tarif belgilanmagan)
+SUBSCRIPTION_KEYBOARDS: Dict[Optional[str], InlineKeyboardMarkup] = {
+    current_plan: build_subscription_keyboard(current_plan)
+    for current_plan in (None, *SUBSCRIPTION_PLANS)
+}
+
+
+def get_subscription_keyboard(current_plan: Optional[str] = None) -> InlineKeyboardMarkup:
+    """Tariflar klaviaturasi (oldindan tayyorlangan)"""
+    return SUBSCRIPTION_KEYBOARDS.get(current_plan, SUBSCRIPTION_KEYBOARDS[None])
+
+
+# ========================================
+# ADMIN KLAVIATURALARI
+# ========================================
+
+_ADMIN_ROWS = [
+    [InlineKeyboardButton(text="📊 Statistika", callback_data="admin_stats")],
+    [InlineKeyboardButton(text="👥 Foydalanuvchilar", callback_data="admin_users")],
+    [InlineKeyboardButton(text="➕ Foydalanuvchi qo'shish", callback_data="admin_add_user")],
+    [InlineKeyboardButton(text="✅ Tarifni tasdiqlash", callback_data="admin_approve")],
+    [InlineKeyboardButton(text="🔍 Qidirish", callback_data="admin_search")],
+]
+
+ADMIN_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=_ADMIN_ROWS)
+
+SUPER_ADMIN_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[
+    *_ADMIN_ROWS,
+    [InlineKeyboardButton(text="👨‍💼 Adminlar", callback_data="super_admin_list")],
+    [InlineKeyboardButton(text="➕ Admin qo'shish", callback_data="super_add_admin")],
+])
+
+ADMIN_LIST_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="➕ Admin qo'shish", callback_data="super_add_admin")],
+    [InlineKeyboardButton(text="➖ Admin o'chirish", callback_data="super_remove_admin")],
+    [InlineKeyboardButton(text="🔙 Orqaga", callback_data="admin_back")]
+])
+
+BACK_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="🔙 Orqaga", callback_data="admin_back")]
+])
+
+
+# ========================================
+# RO'YXATDAN O'TISH KLAVIATURALARI
+# ========================================
+
+CONTACT_KEYBOARD = ReplyKeyboardMarkup(
+    keyboard=[[KeyboardButton(text="📱 Telefon raqamni yuborish", request_contact=True)]],
+    resize_keyboard=True,
+    one_time_keyboard=True
+)
+
+REMOVE_KEYBOARD = ReplyKeyboardRemove()
+
+
+# ========================================
+# TARIF MATNLARI
+# ========================================
+
+def _features_text(plan_info: dict, bullet: str) -> str:
+    return "\n".join(f"  {bullet} {feature}" for feature in plan_info['features'])
+
+
+# Free tarifga o'tish - xususiyatlar bilan bitta xabar
+FREE_SWITCHED_TEXT = (
+    "✅ FREE TARIFGA O'TDINGIZ!\n\n"
+    f"{PLAN_EMOJI['Free']} Bu tarif bepul va cheksiz.\n\n"
+    "📋 Xususiyatlar:\n"
+    f"{_features_text(SUBSCRIPTION_PLANS['Free'], '•')}"
+)
+
+# Pullik tarif - Library ID gacha va undan keyingi qismlar
+_PAID_PLAN_HEADERS = {
+    plan_name: (
+        f"{plan_emoji(plan_name)} {plan_name.upper()} TARIF\n\n"
+        f"{SEPARATOR}\n"
+        f"💰 Narx: {plan_info['price']:,} so'm\n"
+        f"📅 Muddat: {plan_info['duration_days']} kun\n"
+        f"{SEPARATOR}\n\n"
+        f"📋 XUSUSIYATLAR:\n{_features_text(plan_info, '✓')}\n\n"
+        f"{SEPARATOR}\n"
+        "💳 TO'LOV MA'LUMOTLARI:\n\n"
+        "1️⃣ To'lovni amalga oshiring\n"
+        "2️⃣ Kvitansiya rasmini adminga yuboring\n"
+        "3️⃣ Sizning Library ID ingizni ayting\n\n"
+    )
+    for plan_name, plan_info in SUBSCRIPTION_PLANS.items()
+    if plan_name != 'Free'
+}
+
+_PAID_PLAN_FOOTER = (
+    "✅ Admin tasdiqlashidan so'ng obunangiz\n"
+    "   faollashadi va sizga xabar keladi.\n\n"
+    "📞 Savollar bo'lsa admin bilan bog'laning."
+)
+
+# /mysubscription dagi xususiyatlar bloki
+PLAN_FEATURES_BLOCKS = {
+    plan_name: f"📋 XUSUSIYATLAR:\n{_features_text(plan_info, '✓')}\n"
+    for plan_name, plan_info in SUBSCRIPTION_PLANS.items()
+}
+
+
+def render_paid_plan(plan_name: str, library_id: str) -> str:
+    """Pullik tarif va to'lov ma'lumotlari matni"""
+    return f"{_PAID_PLAN_HEADERS[plan_name]}📚 Library ID: {library_id}\n\n{_PAID_PLAN_FOOTER}"
@@ -0,0 +1,321 @@
+"""
+Tracing Utils - Handlerlar kechikishini (latency) o'lchash
+Har bir update uchun qabul qilingan paytdan handler tugaguncha bo'lgan vaqt,
+DB so'rovlari va Telegram API chaqiruvlari (send_message, edit_text...) yoziladi.
+Natijalar har bir handler uchun p50/p95/p99 ko'rinishida eksport qilinadi.
+"""
+import asyncio
+import json
+import logging
+import math
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.types import TelegramObject
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ijara_kitoblar.config import TRACE_BUFFER_SIZE, TRACE_REPORT_INTERVAL, TRACE_EXPORT_PATH
+
+logger = logging.getLogger(__name__)
+
+# Hozirgi update ning span i (har bir update o'z kontekstida ishlaydi)
+_current_span: ContextVar[Optional["UpdateSpan"]] = ContextVar("current_span", default=None)
+
+# Long polling so'rovlari statistikani buzmasligi uchun hisobga olinmaydi
+_IGNORED_API_METHODS = {"getUpdates"}
+
+
+class RingBuffer:
+    """
+    Qat'iy o'lchamli halqa bufer
+
+    Bot bitta event loop da ishlaydi, shuning uchun lock kerak emas:
+    yangi qiymat eng eski qiymat ustiga yoziladi, xotira o'smaydi.
+    """
+    __slots__ = ("_values", "_size", "_count", "_sum")
+
+    def __init__(self, size: int):
+        self._values = [0.0] * size
+        self._size = size
+        self._count = 0
+        self._sum = 0.0
+
+    def append(self, value: float):
+        self._values[self._count % self._size] = value
+        self._count += 1
+        self._sum += value
+
+    @property
+    def count(self) -> int:
+        """Jami yozilgan qiymatlar soni (buferdan chiqib ketganlari ham)"""
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        """Jami yozilgan qiymatlar yig'indisi (Prometheus summary _sum)"""
+        return self._sum
+
+    def snapshot(self) -> list:
+        """Buferdagi qiymatlar nusxasi"""
+        return self._values[:min(self._count, self._size)]
+
+
+def percentiles(values: list) -> dict:
+    """p50/p95/p99 (nearest-rank) va max ni millisekundlarda hisoblash"""
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+    ordered = sorted(values)
+
+    def rank(p):
+        # Qiymatlarning kamida p qismi shu qiymatdan katta emas
+        return round(ordered[max(0, math.ceil(p * len(ordered)) - 1)] * 1000, 2)
+
+    return {
+        "p50": rank(0.50),
+        "p95": rank(0.95),
+        "p99": rank(0.99),
+        "max": round(ordered[-1] * 1000, 2)
+    }
+
+
+class UpdateSpan:
+    """Bitta update ni qayta ishlash davomidagi o'lchovlar"""
+    __slots__ = ("handler", "started", "handler_time", "db_time", "db_calls", "api_time", "api_calls")
+
+    def __init__(self):
+        self.handler = None
+        self.started = time.perf_counter()
+        self.handler_time = 0.0
+        self.db_time = 0.0
+        self.db_calls = 0
+        self.api_time = 0.0
+        self.api_calls = 0
+
+
+class HandlerStats:
+    """Bitta handler uchun yig'ilgan o'lchovlar"""
+    __slots__ = ("total", "handler", "db", "api", "db_calls", "api_calls")
+
+    def __init__(self, size: int):
+        self.total = RingBuffer(size)
+        self.handler = RingBuffer(size)
+        self.db = RingBuffer(size)
+        self.api = RingBuffer(size)
+        self.db_calls = 0
+        self.api_calls = 0
+
+
+class LatencyTracer:
+    """Handlerlar va API metodlari bo'yicha latency agregatori"""
+
+    def __init__(self, buffer_size: int = TRACE_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self.handlers: Dict[str, HandlerStats] = {}
+        self.api_methods: Dict[str, RingBuffer] = {}
+
+    def record(self, span: UpdateSpan):
+        """Tugagan span ni handler statistikasiga qo'shish"""
+        name = span.handler or "unhandled"
+        stats = self.handlers.get(name)
+        if stats is None:
+            stats = self.handlers[name] = HandlerStats(self.buffer_size)
+
+        stats.total.append(time.perf_counter() - span.started)
+        stats.handler.append(span.handler_time)
+        stats.db.append(span.db_time)
+        stats.api.append(span.api_time)
+        stats.db_calls += span.db_calls
+        stats.api_calls += span.api_calls
+
+    def record_api(self, method: str, elapsed: float):
+        """Telegram API chaqiruvini yozish"""
+        buffer = self.api_methods.get(method)
+        if buffer is None:
+            buffer = self.api_methods[method] = RingBuffer(self.buffer_size)
+        buffer.append(elapsed)
+
+    def snapshot(self) -> dict:
+        """Barcha statistikani dict ko'rinishida olish (millisekundlarda)"""
+        handlers = {}
+        for name, stats in self.handlers.items():
+            count = stats.total.count
+            handlers[name] = {
+                "count": count,
+                "total": percentiles(stats.total.snapshot()),
+                "handler": percentiles(stats.handler.snapshot()),
+                "db": percentiles(stats.db.snapshot()),
+                "api": percentiles(stats.api.snapshot()),
+                "db_calls_per_update": round(stats.db_calls / count, 2) if count else 0,
+                "api_calls_per_update": round(stats.api_calls / count, 2) if count else 0
+            }
+
+        api_methods = {
+            method: dict(count=buffer.count, **percentiles(buffer.snapshot()))
+            for method, buffer in self.api_methods.items()
+        }
+
+        return {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "handlers": handlers,
+            "api_methods": api_methods
+        }
+
+    def export_json(self, path: str):
+        """Statistikani JSON faylga yozish"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+
+    def format_report(self, limit: int = 10) -> str:
+        """Eng sekin handlerlar (p95 bo'yicha) matnli hisoboti"""
+        handlers = self.snapshot()["handlers"]
+        ordered = sorted(handlers.items(), key=lambda item: item[1]["total"]["p95"], reverse=True)
+
+        lines = []
+        for name, stats in ordered[:limit]:
+            total = stats["total"]
+            lines.append(
+                f"{name}: n={stats['count']} "
+                f"p50={total['p50']}ms p95={total['p95']}ms p99={total['p99']}ms "
+                f"(db p95={stats['db']['p95']}ms, api p95={stats['api']['p95']}ms)"
+            )
+        return "\n".join(lines)
+
+
+# Jarayon bo'yicha yagona tracer
+tracer = LatencyTracer()
+
+
+class UpdateTracingMiddleware(BaseMiddleware):
+    """
+    Outer middleware - update qabul qilingandan to'liq qayta ishlanguncha
+    bo'lgan vaqtni o'lchaydi va span ni kontekstga joylaydi
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        span = UpdateSpan()
+        token = _current_span.set(span)
+        try:
+            return await handler(event, data)
+        finally:
+            _current_span.reset(token)
+            tracer.record(span)
+
+
+class HandlerTracingMiddleware(BaseMiddleware):
+    """Inner middleware - qaysi handler ishlaganini va uning vaqtini yozadi"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        span = _current_span.get()
+        if span is None:
+            return await handler(event, data)
+
+        handler_object = data.get("handler")
+        if handler_object is not None:
+            span.handler = getattr(handler_object.callback, "__name__", None)
+
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            span.handler_time += time.perf_counter() - started
+
+
+class ApiTracingMiddleware(BaseRequestMiddleware):
+    """Bot session middleware - chiquvchi Telegram API chaqiruvlarini o'lchaydi"""
+
+    async def __call__(self, make_request, bot, method):
+        api_method = getattr(method, "__api_method__", type(method).__name__)
+        if api_method in _IGNORED_API_METHODS:
+            return await make_request(bot, method)
+
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            elapsed = time.perf_counter() - started
+            tracer.record_api(api_method, elapsed)
+
+            span = _current_span.get()
+            if span is not None:
+                span.api_time += elapsed
+                span.api_calls += 1
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Boshlanish vaqti execution context'da - so'rov xato bilan tugasa (masalan
+    # create_user dagi IntegrityError) context bilan birga yo'qoladi, pool'dagi
+    # connection'da qolib ketmaydi
+    if context is not None and _current_span.get() is not None:
+        context._trace_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = _current_span.get()
+    started = getattr(context, "_trace_started", None)
+    if span is None or started is None:
+        return
+
+    span.db_time += time.perf_counter() - started
+    span.db_calls += 1
+
+
+def install_db_tracing():
+    """Barcha SQLAlchemy engine'lar uchun so'rov vaqtini o'lchashni yoqish"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def install_tracing(dp, bot):
+    """
+    Dispatcher, bot session va SQLAlchemy ga tracing middleware'larini ulash
+
+    Args:
+        dp: Dispatcher
+        bot: Bot instance
+    """
+    dp.update.outer_middleware(UpdateTracingMiddleware())
+    dp.message.middleware(HandlerTracingMiddleware())
+    dp.callback_query.middleware(HandlerTracingMiddleware())
+    bot.session.middleware(ApiTracingMiddleware())
+    install_db_tracing()
+    logger.info("⏱️ Latency tracing yoqildi")
+
+
+async def report_latency(interval: int = TRACE_REPORT_INTERVAL, export_path: str = TRACE_EXPORT_PATH):
+    """
+    Latency hisobotini muntazam ravishda log ga (va JSON faylga) yozish
+
+    Args:
+        interval: Hisobot oralig'i (soniyalarda)
+        export_path: JSON fayl yo'li (bo'sh bo'lsa yozilmaydi)
+    """
+    while True:
+        await asyncio.sleep(interval)
+
+        try:
+            report = tracer.format_report()
+            if report:
+                logger.info(f"⏱️ Handler latency (p95 bo'yicha):\n{report}")
+
+            if export_path:
+                tracer.export_json(export_path)
+
+        except Exception as e:
+            logger.error(f"❌ Latency hisobotini yozishda xato: {e}")
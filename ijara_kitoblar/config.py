@@ -19,8 +19,12 @@ BOT_TOKEN = os.getenv('BOT_TOKEN')
 # Faqat bitta super admin bo'lishi mumkin
 SUPER_ADMIN_ID = os.getenv('SUPER_ADMIN_ID')  # Telegram ID
 
+# Bot API server manzili (bo'sh - https://api.telegram.org)
+# Lokal load test uchun: http://127.0.0.1:8081 (benchmarks/load_test.py)
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', '')
+
 # ========================================
-# DATABASE SOZLAMALARI (PostgreSQL)
+# DATABASE SOZLAMALARI (PostgreSQL / SQLite)
 # ========================================
 
 # Database type (sqlite yoki postgresql)
@@ -33,18 +37,17 @@ POSTGRES_DB = os.getenv('POSTGRES_DB', 'library')
 POSTGRES_USER = os.getenv('POSTGRES_USER', 'postgres')
 POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD', '')
 
-DATABASE_URL = f'postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}'
-# SQLite sozlamalari (fallback)
-# SQLITE_DB = os.getenv('SQLITE_DB', 'library.db')
-#
-# # Database URL yaratish
-# if DB_TYPE == 'postgresql':
-#     DATABASE_URL = f'postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}'
-# else:
-#     DATABASE_URL = f'sqlite:///{SQLITE_DB}'
+# SQLite sozlamalari (kichik filiallar va lokal test uchun)
+SQLITE_DB = os.getenv('SQLITE_DB', 'library.db')
+
+# Database URL yaratish
+if DB_TYPE == 'sqlite':
+    DATABASE_URL = f'sqlite:///{SQLITE_DB}'
+else:
+    DATABASE_URL = f'postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}'
 
 # Database path (SQLite uchun)
-# DATABASE_PATH = SQLITE_DB
+DATABASE_PATH = SQLITE_DB
 
 # ========================================
 # TARIF REJALARI
@@ -94,6 +97,15 @@ WARNING_DAYS = 3
 # Bildirishnomalarni tekshirish oralig'i (soatlarda)
 CHECK_INTERVAL_HOURS = 6
 
+# Ommaviy xabar yuborish: bir vaqtda yuboriladigan xabarlar soni
+BROADCAST_CONCURRENCY = int(os.getenv('BROADCAST_CONCURRENCY', '10'))
+
+# Ommaviy xabar yuborish: sekundiga maksimal xabarlar (Telegram limiti ~30)
+BROADCAST_RATE = float(os.getenv('BROADCAST_RATE', '25'))
+
+# Telegram 429 (retry_after): har qanday so'rov necha marta qayta yuboriladi
+TELEGRAM_MAX_RETRIES = int(os.getenv('TELEGRAM_MAX_RETRIES', '3'))
+
 # ========================================
 # LIBRARY ID SOZLAMALARI
 # ========================================
@@ -130,8 +142,68 @@ REQUIRE_PHONE_VERIFICATION = True
 # CONNECTION POOL SOZLAMALARI (PostgreSQL)
 # ========================================
 
-# Connection pool parametrlari
-POOL_SIZE = 10  # Maksimal connection'lar soni
-MAX_OVERFLOW = 20  # Qo'shimcha connection'lar
-POOL_TIMEOUT = 30  # Timeout (soniyalarda)
-POOL_RECYCLE = 3600  # Connection'ni qayta ishlatish vaqti (1 soat)
\ No newline at end of file
+# Pool rejimi: 'queue' (oddiy) yoki 'pgbouncer' (NullPool, transaction pooling)
+DB_POOL_MODE = os.getenv('DB_POOL_MODE', 'queue')
+
+# Connection pool parametrlari (bitta jarayon uchun, barcha managerlar bo'lishadi)
+POOL_SIZE = int(os.getenv('POOL_SIZE', '5'))  # Doimiy connection'lar soni
+MAX_OVERFLOW = int(os.getenv('MAX_OVERFLOW', '5'))  # Qo'shimcha connection'lar
+POOL_TIMEOUT = int(os.getenv('POOL_TIMEOUT', '30'))  # Timeout (soniyalarda)
+POOL_RECYCLE = int(os.getenv('POOL_RECYCLE', '3600'))  # Connection'ni qayta ishlatish vaqti (1 soat)
+
+# Connection'ni olishdan oldin tekshirish (uzilgan connection'lar uchun)
+POOL_PRE_PING = os.getenv('POOL_PRE_PING', 'true').lower() == 'true'
+
+# LIFO - oxirgi ishlatilgan connection qayta olinadi, ortiqchalari yopilib ketadi
+POOL_USE_LIFO = os.getenv('POOL_USE_LIFO', 'true').lower() == 'true'
+
+# ========================================
+# TRACING SOZLAMALARI
+# ========================================
+
+# Har bir handler uchun saqlanadigan oxirgi o'lchovlar soni (ring buffer)
+TRACE_BUFFER_SIZE = int(os.getenv('TRACE_BUFFER_SIZE', '2048'))
+
+# Latency hisobotini log ga yozish oralig'i (soniyalarda)
+TRACE_REPORT_INTERVAL = int(os.getenv('TRACE_REPORT_INTERVAL', '300'))
+
+# Latency statistikasi yoziladigan JSON fayl (bo'sh bo'lsa faqat log)
+TRACE_EXPORT_PATH = os.getenv('TRACE_EXPORT_PATH', '')
+
+# ========================================
+# METRICS SOZLAMALARI
+# ========================================
+
+# Prometheus /metrics endpoint (0 - o'chirilgan). Faqat lokal tinglash tavsiya etiladi
+# 9100 emas - u node_exporter porti
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9499'))
+
+# Event loop kechikishini o'lchash oralig'i (soniyalarda)
+METRICS_LAG_INTERVAL = float(os.getenv('METRICS_LAG_INTERVAL', '0.5'))
+
+# updates/sec va xabar yuborish tezligi hisoblanadigan oyna (soniyalarda)
+METRICS_RATE_WINDOW = int(os.getenv('METRICS_RATE_WINDOW', '60'))
+
+# ========================================
+# AUDIT SOZLAMALARI
+# ========================================
+
+# Audit yozuvlari database ga shu oraliqda bo'laklab yoziladi (millisekundlarda)
+AUDIT_FLUSH_INTERVAL_MS = int(os.getenv('AUDIT_FLUSH_INTERVAL_MS', '500'))
+
+# Bitta INSERT dagi maksimal yozuvlar (to'lsa oraliqni kutmasdan yoziladi)
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '100'))
+
+# Navbat hajmi (to'lsa yangi yozuvlar tashlab yuboriladi, handler kutmaydi)
+AUDIT_QUEUE_SIZE = int(os.getenv('AUDIT_QUEUE_SIZE', '10000'))
+
+# ========================================
+# SQLITE SOZLAMALARI
+# ========================================
+
+# Database band bo'lsa kutish vaqti (millisekundlarda)
+SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000'))
+
+# Memory-mapped I/O hajmi (baytlarda, 0 - o'chirilgan)
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
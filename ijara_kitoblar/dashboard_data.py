@@ -0,0 +1,221 @@
+"""
+Dashboard Data - Streamlit sahifalari uchun ma'lumot tayyorlash
+Streamlit/pandas siz import qilinadi, shuning uchun benchmarklarda alohida o'lchanadi.
+Funksiyalar jadval qatorlarini (dict ro'yxati) qaytaradi, DataFrame ni dashboard o'zi quradi.
+
+Foydalanuvchilar database.views.UserView sifatida keladi (db getter'lari va db.iter_users) -
+yosh, to'liq ism va qolgan kunlar o'qilgan paytda bir marta hisoblangan.
+"""
+import csv
+import io
+import os
+import tempfile
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional
+
+# Yosh guruhlari: (0, 18], (18, 25], (25, 35], (35, 50], (50, 100]
+AGE_BINS = [0, 18, 25, 35, 50, 100]
+AGE_LABELS = ['0-18', '19-25', '26-35', '36-50', '50+']
+
+
+def count_new_users(users: Iterable, days: int = 7, now: Optional[datetime] = None) -> int:
+    """Oxirgi `days` kun ichida ro'yxatdan o'tganlar soni"""
+    now = now or datetime.now()
+    return sum(1 for user in users if (now - user.created_at).days < days)
+
+
+def plan_share(stats: dict, key: str) -> int:
+    """Tarif foizi (jami foydalanuvchilarga nisbatan)"""
+    total = stats['total_users']
+    return round(stats[key] / total * 100 if total > 0 else 0)
+
+
+def age_group_counts(users: Iterable) -> List[dict]:
+    """Yosh guruhlari bo'yicha foydalanuvchilar soni (chegaradan tashqaridagilar hisoblanmaydi)"""
+    counts = [0] * len(AGE_LABELS)
+
+    for user in users:
+        age = user.age
+        for i in range(len(AGE_LABELS)):
+            if AGE_BINS[i] < age <= AGE_BINS[i + 1]:
+                counts[i] += 1
+                break
+
+    return [{'Yosh guruhi': label, 'Soni': count} for label, count in zip(AGE_LABELS, counts)]
+
+
+def expiring_user_rows(users: Iterable) -> List[dict]:
+    """Obunasi tugayotganlar jadvali"""
+    rows = []
+
+    for user in users:
+        rows.append({
+            "🆔 Library ID": user.library_id,
+            "👤 Ism": user.full_name,
+            "📞 Telefon": user.phone_number,
+            "📋 Tarif": user.subscription_plan,
+            "⏰ Qolgan kunlar": user.days_until_expiry,
+            "📅 Tugash sanasi": user.subscription_end_date.strftime("%d.%m.%Y"),
+            "📱 Telegram": "✅" if user.telegram_id else "❌"
+        })
+
+    return rows
+
+
+def iter_user_table_rows(users: Iterable) -> Iterator[dict]:
+    """Foydalanuvchilar sahifasidagi jadval qatorlari (generator - eksport uchun)"""
+    for user in users:
+        days_left = ""
+
+        if user.days_until_expiry is not None:
+            days = user.days_until_expiry
+            days_left = f"{days} kun" if days > 0 else "⚠️ Tugagan"
+
+        yield {
+            "Status": "✅" if user.is_active else "❌",
+            "Library ID": user.library_id,
+            "Ism": user.first_name,
+            "Familiya": user.last_name,
+            "Yosh": user.age,
+            "Telefon": user.phone_number,
+            "O'quv joyi": user.study_place,
+            "Tarif": user.subscription_plan,
+            "Qolgan muddat": days_left if days_left else "Cheksiz",
+            "Telegram": "✅" if user.telegram_id else "❌",
+            "Ro'yxatdan o'tgan": user.created_at.strftime("%d.%m.%Y")
+        }
+
+
+def user_table_rows(users: Iterable) -> List[dict]:
+    """Foydalanuvchilar sahifasidagi jadval qatorlari"""
+    return list(iter_user_table_rows(users))
+
+
+def filter_user_rows(rows: List[dict], search_id: str = "", search_name: str = "",
+                     plan: str = "Barchasi", telegram: str = "Barchasi") -> List[dict]:
+    """
+    Jadval qatorlarini filtrlash (katta-kichik harf farqlanmaydi)
+
+    Args:
+        rows: user_table_rows natijasi
+        search_id: Library ID qismi
+        search_name: Ism yoki familiya qismi
+        plan: Tarif yoki "Barchasi"
+        telegram: "Bog'langan", "Bog'lanmagan" yoki "Barchasi"
+    """
+    search_id = search_id.lower()
+    search_name = search_name.lower()
+    telegram_mark = {"Bog'langan": "✅", "Bog'lanmagan": "❌"}.get(telegram)
+
+    return [
+        row for row in rows
+        if (not search_id or search_id in row['Library ID'].lower())
+        and (not search_name or search_name in row['Ism'].lower() or search_name in row['Familiya'].lower())
+        and (plan == "Barchasi" or row['Tarif'] == plan)
+        and (telegram_mark is None or row['Telegram'] == telegram_mark)
+    ]
+
+
+def audit_rows(entries: Iterable, admin_names: Optional[dict] = None,
+               action_labels: Optional[dict] = None) -> List[dict]:
+    """
+    Audit jurnali jadvali
+
+    Args:
+        entries: AuditManager.get_entries natijasi (AuditView lar)
+        admin_names: {telegram_id: full_name} - admin ismlari
+        action_labels: {action: nom} - harakat nomlari
+    """
+    admin_names = admin_names or {}
+    action_labels = action_labels or {}
+    rows = []
+
+    for entry in entries:
+        if entry.actor_telegram_id:
+            actor = admin_names.get(entry.actor_telegram_id, str(entry.actor_telegram_id))
+        else:
+            actor = "—"
+
+        rows.append({
+            "🕐 Vaqt": entry.created_at.strftime("%d.%m.%Y %H:%M:%S"),
+            "Manba": "🖥️ Dashboard" if entry.source == 'dashboard' else "🤖 Bot",
+            "Admin": actor,
+            "Harakat": action_labels.get(entry.action, entry.action),
+            "Library ID": entry.target_library_id or "",
+            "Natija": "✅" if entry.success else "❌",
+            "Tafsilotlar": entry.details or ""
+        })
+
+    return rows
+
+
+def iter_csv(rows: Iterable[dict], sep: str = ",") -> Iterator[bytes]:
+    """
+    Qatorlarni CSV bo'laklari sifatida qaytarish (butun jadval xotirada saqlanmaydi)
+
+    Birinchi bo'lak BOM bilan boshlanadi (Excel to'g'ri ochishi uchun utf-8-sig).
+    """
+    buffer = io.StringIO()
+    writer = None
+
+    for row in rows:
+        if writer is None:
+            buffer.write("\ufeff")
+            writer = csv.DictWriter(buffer, fieldnames=list(row), delimiter=sep, lineterminator="\n")
+            writer.writeheader()
+        writer.writerow(row)
+
+        if buffer.tell() >= 64 * 1024:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def rows_to_csv(rows: Iterable[dict], sep: str = ",") -> bytes:
+    """Qatorlarni CSV ga aylantirish (Excel to'g'ri ochishi uchun utf-8-sig)"""
+    return b"".join(iter_csv(rows, sep))
+
+
+def export_users_csv(db, sep: str = ",", batch_size: int = 1000,
+                     filters: Optional[list] = None) -> Iterator[bytes]:
+    """
+    Foydalanuvchilarni database dan to'g'ridan-to'g'ri CSV ga oqim bilan yozish
+
+    ORM obyektlari yaratilmaydi (db.iter_users), xotira foydalanuvchilar soniga bog'liq emas.
+
+    Args:
+        db: DatabaseManager
+        sep: Ajratuvchi ("," - CSV, "\\t" - Excel)
+        batch_size: Database dan bitta fetch dagi qatorlar soni
+        filters: SQLAlchemy shartlari (None - barcha foydalanuvchilar, nofaollar ham)
+
+    Returns:
+        CSV bo'laklari iteratori
+    """
+    return iter_csv(iter_user_table_rows(db.iter_users(filters, batch_size=batch_size)), sep)
+
+
+def write_export_file(chunks: Iterable[bytes], suffix: str = ".csv",
+                      previous: Optional[str] = None) -> str:
+    """
+    Eksport bo'laklarini vaqtinchalik faylga yozish (butun fayl xotirada yig'ilmaydi)
+
+    Args:
+        chunks: export_users_csv bo'laklari
+        suffix: Fayl kengaytmasi
+        previous: Oldingi eksport fayli (o'chiriladi)
+
+    Returns:
+        Fayl yo'li
+    """
+    if previous and os.path.exists(previous):
+        os.remove(previous)
+
+    with tempfile.NamedTemporaryFile(prefix="kutubxona_export_", suffix=suffix, delete=False) as f:
+        for chunk in chunks:
+            f.write(chunk)
+
+    return f.name
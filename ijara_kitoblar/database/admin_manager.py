@@ -2,14 +2,15 @@
 Admin Manager (PostgreSQL) - SQLAlchemy ORM bilan
 Adminlarni boshqarish tizimi
 """
-from sqlalchemy import create_engine
+from sqlalchemy import select
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import QueuePool
 from typing import List, Optional, Tuple
 import logging
 
-from ijara_kitoblar.database.models import Base, Admin
-from ijara_kitoblar.config import DATABASE_URL, POOL_SIZE, MAX_OVERFLOW, POOL_TIMEOUT, POOL_RECYCLE
+from ijara_kitoblar.database.models import Admin
+from ijara_kitoblar.database.views import AdminView, ADMIN_VIEW_COLUMNS, admin_view
+from ijara_kitoblar.config import DATABASE_URL
+from ijara_kitoblar.database.engine import get_engine
 
 logger = logging.getLogger(__name__)
 
@@ -21,23 +22,13 @@ class AdminManager:
         """Admin Manager yaratish"""
         self.database_url = database_url or DATABASE_URL
 
-        # Engine yaratish
-        self.engine = create_engine(
-            self.database_url,
-            poolclass=QueuePool,
-            pool_size=POOL_SIZE,
-            max_overflow=MAX_OVERFLOW,
-            pool_timeout=POOL_TIMEOUT,
-            pool_recycle=POOL_RECYCLE,
-            echo=False
-        )
+        # Umumiy engine (jarayon bo'yicha bitta connection pool)
+        self.engine = get_engine(self.database_url)
 
         # Session maker
+        # Jadvallar migratsiya orqali yaratiladi: python init_database.py migrate
         self.Session = sessionmaker(bind=self.engine)
 
-        # Jadvallarni yaratish
-        Base.metadata.create_all(self.engine)
-
     def get_session(self) -> Session:
         """Yangi session olish"""
         return self.Session()
@@ -190,84 +181,47 @@ class AdminManager:
         finally:
             session.close()
 
-    def get_admin_by_telegram_id(self, telegram_id: int) -> Optional[Admin]:
-        """Telegram ID bo'yicha admin topish"""
-        session = self.get_session()
+    def _get_admin_view(self, *conditions) -> Optional[AdminView]:
+        """Bitta faol adminni AdminView sifatida olish (ORM obyekt yaratilmaydi)"""
+        stmt = select(*ADMIN_VIEW_COLUMNS).where(Admin.is_active == True, *conditions).limit(1)
 
-        try:
-            admin = session.query(Admin).filter_by(
-                telegram_id=telegram_id,
-                is_active=True
-            ).first()
+        with self.engine.connect() as connection:
+            row = connection.execute(stmt).first()
+        return admin_view(row) if row else None
 
-            if admin:
-                session.expunge(admin)
-
-            return admin
-        finally:
-            session.close()
+    def get_admin_by_telegram_id(self, telegram_id: int) -> Optional[AdminView]:
+        """Telegram ID bo'yicha admin topish"""
+        return self._get_admin_view(Admin.telegram_id == telegram_id)
 
-    def get_admin_by_library_id(self, library_id: str) -> Optional[Admin]:
+    def get_admin_by_library_id(self, library_id: str) -> Optional[AdminView]:
         """Library ID bo'yicha admin topish"""
-        session = self.get_session()
+        return self._get_admin_view(Admin.library_id == library_id)
 
-        try:
-            admin = session.query(Admin).filter_by(
-                library_id=library_id,
-                is_active=True
-            ).first()
-
-            if admin:
-                session.expunge(admin)
-
-            return admin
-        finally:
-            session.close()
-
-    def get_all_admins(self) -> List[Admin]:
+    def get_all_admins(self) -> List[AdminView]:
         """Barcha adminlarni olish"""
-        session = self.get_session()
-
-        try:
-            admins = session.query(Admin).filter_by(is_active=True).order_by(
-                Admin.is_super_admin.desc(),
-                Admin.added_date.asc()
-            ).all()
-
-            for admin in admins:
-                session.expunge(admin)
+        stmt = select(*ADMIN_VIEW_COLUMNS).where(Admin.is_active == True).order_by(
+            Admin.is_super_admin.desc(),
+            Admin.added_date.asc()
+        )
 
-            return admins
-        finally:
-            session.close()
+        with self.engine.connect() as connection:
+            return [admin_view(row) for row in connection.execute(stmt)]
 
-    def get_super_admin(self) -> Optional[Admin]:
+    def get_super_admin(self) -> Optional[AdminView]:
         """Super adminni olish"""
-        session = self.get_session()
-
-        try:
-            admin = session.query(Admin).filter_by(
-                is_super_admin=True,
-                is_active=True
-            ).first()
-
-            if admin:
-                session.expunge(admin)
-
-            return admin
-        finally:
-            session.close()
+        return self._get_admin_view(Admin.is_super_admin == True)
 
     def get_admin_count(self) -> dict:
         """Admin statistikasi"""
         session = self.get_session()
 
         try:
-            from sqlalchemy import func
+            from sqlalchemy import case, func
 
+            # Boolean -> son (PostgreSQL va SQLite da bir xil ishlaydi)
             result = session.query(
                 func.count(Admin.admin_id).label('total'),
-                func.sum(func.cast(Admin.is_super_admin, 1)).label('super_admin')
+                func.sum(case((Admin.is_super_admin.is_(True), 1), else_=0)).label('super_admin')
             ).filter_by(is_active=True).first()
 
             total = result.total or 0
@@ -283,9 +237,13 @@ class AdminManager:
             session.close()
 
     def close(self):
-        """Engine ni yopish"""
-        self.engine.dispose()
-        logger.info("🔒 Admin Manager yopildi")
+        """
+        Manager ni yopish
+
+        Engine jarayon bo'yicha umumiy, shuning uchun pool bu yerda yopilmaydi.
+        Pool'larni yopish: database.engine.dispose_engines()
+        """
+        logger.debug("🔒 Admin Manager yopildi")
 
 
 # Test uchun
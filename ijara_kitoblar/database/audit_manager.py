@@ -0,0 +1,149 @@
+"""
+Audit Manager - Admin harakatlari jurnali (admin_audit jadvali)
+Yozish bo'laklab (bitta executemany INSERT), o'qish vaqt oralig'i bo'yicha index orqali.
+
+Bot handler'lari to'g'ridan-to'g'ri yozmaydi - bot/utils/audit.py navbatiga qo'shadi.
+"""
+import json
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import func, select
+
+from ijara_kitoblar.database.models import AdminAudit
+from ijara_kitoblar.database.views import AuditView, AUDIT_VIEW_COLUMNS
+from ijara_kitoblar.config import DATABASE_URL
+from ijara_kitoblar.database.engine import get_engine
+
+logger = logging.getLogger(__name__)
+
+# Bitta so'rovda qaytariladigan maksimal yozuvlar (viewer uchun)
+MAX_AUDIT_ROWS = 1000
+
+# Harakatlar va ularning nomlari (viewer uchun)
+AUDIT_ACTIONS = {
+    'approve': "✅ Tarif tasdiqlash",
+    'add_admin': "➕ Admin qo'shish",
+    'remove_admin': "➖ Admin o'chirish",
+    'add_user': "👤 Foydalanuvchi qo'shish",
+}
+
+
+def audit_record(action: str, actor_telegram_id: Optional[int] = None,
+                 target_library_id: Optional[str] = None, details: Optional[dict] = None,
+                 success: bool = True, source: str = 'bot') -> dict:
+    """
+    admin_audit jadvali uchun yozuv (vaqt harakat paytida belgilanadi, yozilgan paytda emas)
+
+    Args:
+        action: Harakat nomi ('approve', 'add_admin', 'remove_admin', 'add_user'...)
+        actor_telegram_id: Harakatni bajargan admin (dashboard da None)
+        target_library_id: Harakat qaratilgan foydalanuvchi
+        details: Qo'shimcha ma'lumotlar (JSON ga aylantiriladi)
+        success: Harakat muvaffaqiyatli bo'ldimi
+        source: 'bot' yoki 'dashboard'
+    """
+    return {
+        'created_at': datetime.now(),
+        'source': source,
+        'actor_telegram_id': actor_telegram_id,
+        'action': action,
+        'target_library_id': target_library_id,
+        'success': success,
+        'details': json.dumps(details, ensure_ascii=False, default=str) if details else None
+    }
+
+
+class AuditManager:
+    """Admin harakatlari jurnali bilan ishlash uchun klass"""
+
+    def __init__(self, database_url: str = None):
+        """Audit Manager yaratish"""
+        self.database_url = database_url or DATABASE_URL
+
+        # Umumiy engine (jarayon bo'yicha bitta connection pool)
+        self.engine = get_engine(self.database_url)
+
+    def write_batch(self, records: List[dict]) -> int:
+        """
+        Yozuvlarni bitta tranzaksiyada qo'shish
+
+        Args:
+            records: audit_record() natijalari
+
+        Returns:
+            Yozilgan yozuvlar soni (xato bo'lsa exception ko'tariladi)
+        """
+        if not records:
+            return 0
+
+        with self.engine.begin() as connection:
+            connection.execute(AdminAudit.__table__.insert(), records)
+
+        return len(records)
+
+    def record(self, action: str, actor_telegram_id: Optional[int] = None,
+               target_library_id: Optional[str] = None, details: Optional[dict] = None,
+               success: bool = True, source: str = 'dashboard') -> bool:
+        """Bitta yozuvni darhol yozish (navbatsiz jarayonlar uchun, masalan dashboard)"""
+        try:
+            self.write_batch([audit_record(action, actor_telegram_id, target_library_id,
+                                           details, success, source)])
+            return True
+        except Exception as e:
+            logger.error(f"❌ Audit yozuvini saqlashda xato: {e}")
+            return False
+
+    def get_entries(self, start: datetime, end: datetime, action: Optional[str] = None,
+                    actor_telegram_id: Optional[int] = None, target_library_id: Optional[str] = None,
+                    limit: int = 500) -> List[AuditView]:
+        """
+        Vaqt oralig'idagi yozuvlar (eng yangilari birinchi)
+
+        created_at bo'yicha index ishlatiladi; admin yoki foydalanuvchi berilsa
+        (actor_telegram_id, created_at) / (target_library_id, created_at) index'lari.
+
+        Args:
+            start: Oraliq boshi (kiradi)
+            end: Oraliq oxiri (kirmaydi)
+            action: Faqat shu harakat
+            actor_telegram_id: Faqat shu admin
+            target_library_id: Faqat shu foydalanuvchi
+            limit: Maksimal yozuvlar (MAX_AUDIT_ROWS dan oshmaydi)
+        """
+        stmt = select(*AUDIT_VIEW_COLUMNS).where(
+            AdminAudit.created_at >= start,
+            AdminAudit.created_at < end
+        )
+
+        if action:
+            stmt = stmt.where(AdminAudit.action == action)
+        if actor_telegram_id:
+            stmt = stmt.where(AdminAudit.actor_telegram_id == actor_telegram_id)
+        if target_library_id:
+            stmt = stmt.where(AdminAudit.target_library_id == target_library_id)
+
+        stmt = stmt.order_by(AdminAudit.created_at.desc(), AdminAudit.id.desc()).limit(min(limit, MAX_AUDIT_ROWS))
+
+        with self.engine.connect() as connection:
+            return [AuditView(*row) for row in connection.execute(stmt)]
+
+    def count_by_action(self, start: datetime, end: datetime) -> dict:
+        """Vaqt oralig'idagi harakatlar soni: {action: count}"""
+        stmt = select(AdminAudit.action, func.count(AdminAudit.id)).where(
+            AdminAudit.created_at >= start,
+            AdminAudit.created_at < end
+        ).group_by(AdminAudit.action)
+
+        with self.engine.connect() as connection:
+            return dict(connection.execute(stmt).all())
+
+    def close(self):
+        """
+        Manager ni yopish
+
+        Engine jarayon bo'yicha umumiy, shuning uchun pool bu yerda yopilmaydi.
+        Pool'larni yopish: database.engine.dispose_engines()
+        """
+        logger.debug("🔒 Audit Manager yopildi")
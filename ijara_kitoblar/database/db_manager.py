@@ -1,16 +1,19 @@
 """
-Database Manager (PostgreSQL) - SQLAlchemy ORM bilan
-PostgreSQL database bilan ishlash uchun
+Database Manager (PostgreSQL / SQLite) - SQLAlchemy ORM bilan
+PostgreSQL yoki SQLite (WAL) database bilan ishlash uchun
 """
-from sqlalchemy import create_engine, func
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import QueuePool
+from sqlalchemy import func, update, bindparam, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker, Session, aliased
 from datetime import datetime, timedelta
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Iterator
 import logging
 
-from ijara_kitoblar.database.models import Base, User
-from ijara_kitoblar.config import DATABASE_URL, POOL_SIZE, MAX_OVERFLOW, POOL_TIMEOUT, POOL_RECYCLE
+from ijara_kitoblar.database.models import User
+from ijara_kitoblar.database.phone import normalize_phone, backfill_phone_normalized
+from ijara_kitoblar.database.views import UserView, USER_VIEW_COLUMNS, user_view, user_views, user_view_from_model
+from ijara_kitoblar.config import DATABASE_URL
+from ijara_kitoblar.database.engine import get_engine
 
 logger = logging.getLogger(__name__)
 
@@ -27,36 +30,62 @@ class DatabaseManager:
         """
         self.database_url = database_url or DATABASE_URL
 
-        # Engine yaratish (Connection pool bilan)
-        self.engine = create_engine(
-            self.database_url,
-            poolclass=QueuePool,
-            pool_size=POOL_SIZE,
-            max_overflow=MAX_OVERFLOW,
-            pool_timeout=POOL_TIMEOUT,
-            pool_recycle=POOL_RECYCLE,
-            echo=False
-        )
+        # Umumiy engine (jarayon bo'yicha bitta connection pool)
+        self.engine = get_engine(self.database_url)
 
         # Session maker
+        # Jadvallar migratsiya orqali yaratiladi: python init_database.py migrate
         self.Session = sessionmaker(bind=self.engine)
 
-        # Jadvallarni yaratish
-        self._create_tables()
-
-    def _create_tables(self):
-        """Barcha jadvallarni yaratish"""
-        try:
-            Base.metadata.create_all(self.engine)
-            logger.info("✅ Database jadvallar yaratildi")
-        except Exception as e:
-            logger.error(f"❌ Jadval yaratishda xato: {e}")
-            raise
-
     def get_session(self) -> Session:
         """Yangi session olish"""
         return self.Session()
 
+    def _conditional_update(self, session: Session, library_id: str, values: dict,
+                            expected_version: Optional[int] = None, *conditions, returning=()):
+        """
+        Bitta UPDATE ... WHERE ... RETURNING so'rovi (SELECT siz)
+
+        version har safar 1 ga oshadi. expected_version berilsa, yozuv shu versiyada
+        bo'lgandagina yangilanadi (optimistic locking).
+
+        Returns:
+            (version, first_name, last_name, *returning) qatori yoki None (shart bajarilmadi)
+        """
+        stmt = (
+            update(User)
+            .where(User.library_id == library_id, *conditions)
+            .values(**values, updated_at=datetime.now(), version=User.version + 1)
+            .returning(User.version, User.first_name, User.last_name, *returning)
+            .execution_options(synchronize_session=False)
+        )
+        if expected_version is not None:
+            stmt = stmt.where(User.version == expected_version)
+
+        return session.execute(stmt).first()
+
+    @staticmethod
+    def _update_failure(session: Session, library_id: str,
+                        expected_version: Optional[int] = None) -> Tuple[Optional[User], Optional[str]]:
+        """
+        Shartli UPDATE yangilamagan bo'lsa sababini aniqlash (faqat xato holatida)
+
+        Returns:
+            (joriy yozuv yoki None, xato xabari yoki None)
+        """
+        user = session.query(User).filter_by(library_id=library_id).first()
+        if not user:
+            return None, f"❌ {library_id} ID li foydalanuvchi topilmadi!"
+
+        if expected_version is not None and user.version != expected_version:
+            return user, (
+                f"❌ {library_id} ma'lumotlari boshqa joyda o'zgartirilgan "
+                f"(versiya {expected_version} -> {user.version}).\n"
+                f"Ma'lumotni yangilab, qayta urinib ko'ring."
+            )
+
+        return user, None
+
     def generate_library_id(self, session: Session) -> str:
         """
         Yangi Library ID generatsiya qilish
@@ -73,7 +102,7 @@ class DatabaseManager:
 
     def create_user(self, first_name: str, last_name: str, phone_number: str,
                     birth_year: int, study_place: str,
-                    telegram_id: Optional[int] = None) -> Tuple[Optional[User], Optional[str]]:
+                    telegram_id: Optional[int] = None) -> Tuple[Optional[UserView], Optional[str]]:
         """
         Yangi foydalanuvchi yaratish
 
@@ -86,8 +115,13 @@ class DatabaseManager:
             telegram_id: Telegram ID (ixtiyoriy)
 
         Returns:
-            (User object yoki None, Xato xabari yoki None)
+            (UserView yoki None, Xato xabari yoki None)
         """
+        # Telefon raqam E.164 ko'rinishida saqlanadi
+        normalized_phone = normalize_phone(phone_number)
+        if not normalized_phone:
+            return None, "❌ Noto'g'ri telefon raqam!\n\nTo'g'ri format: +998901234567"
+
         session = self.get_session()
 
         try:
@@ -98,7 +132,7 @@ class DatabaseManager:
                     return None, f"❌ Bu Telegram akkaunt allaqachon ro'yxatdan o'tgan!\n📚 Library ID: {existing.library_id}"
 
             # Telefon raqam mavjudligini tekshirish
-            existing = session.query(User).filter_by(phone_number=phone_number).first()
+            existing = session.query(User).filter_by(phone_normalized=normalized_phone).first()
             if existing:
                 return None, f"❌ Bu telefon raqam allaqachon ro'yxatdan o'tgan!\n📚 Library ID: {existing.library_id}"
 
@@ -111,7 +145,8 @@ class DatabaseManager:
                 telegram_id=telegram_id,
                 first_name=first_name,
                 last_name=last_name,
-                phone_number=phone_number,
+                phone_number=normalized_phone,
+                phone_normalized=normalized_phone,
                 birth_year=birth_year,
                 study_place=study_place,
                 subscription_plan='Free',
@@ -123,7 +158,13 @@ class DatabaseManager:
             session.refresh(user)
 
             logger.info(f"✅ Yangi foydalanuvchi yaratildi: {library_id}")
-            return user, None
+            return user_view_from_model(user), None
+
+        except IntegrityError as e:
+            # Parallel ro'yxatdan o'tish - UNIQUE index lardan biri ushladi
+            session.rollback()
+            logger.warning(f"⚠️ Foydalanuvchi yaratishda to'qnashuv: {e.orig}")
+            return None, "❌ Bu telefon raqam yoki Telegram akkaunt allaqachon ro'yxatdan o'tgan!"
 
         except Exception as e:
             session.rollback()
@@ -133,18 +174,20 @@ class DatabaseManager:
         finally:
             session.close()
 
-    def get_user_by_library_id(self, library_id: str) -> Optional[User]:
-        """Library ID bo'yicha foydalanuvchi topish"""
-        session = self.get_session()
+    def _get_user_view(self, *conditions) -> Optional[UserView]:
+        """Bitta foydalanuvchini UserView sifatida olish (ORM obyekt yaratilmaydi)"""
+        with self.engine.connect() as connection:
+            row = connection.execute(select(*USER_VIEW_COLUMNS).where(*conditions).limit(1)).first()
+        return user_view(row) if row else None
 
-        try:
-            user = session.query(User).filter_by(library_id=library_id).first()
-            if user:
-                # Session dan detach qilish
-                session.expunge(user)
-            return user
-        finally:
-            session.close()
+    def _get_user_views(self, stmt) -> List[UserView]:
+        """So'rov natijasini UserView ro'yxatiga aylantirish"""
+        with self.engine.connect() as connection:
+            return list(user_views(connection.execute(stmt)))
+
+    def get_user_by_library_id(self, library_id: str) -> Optional[UserView]:
+        """Library ID bo'yicha foydalanuvchi topish"""
+        return self._get_user_view(User.library_id == library_id)
 
     def add_user(self, library_id, full_name, phone_number=None, telegram_id=None):
         session = self.Session()
@@ -165,54 +208,76 @@ class DatabaseManager:
             session.close()
 
 
-    def get_user_by_telegram_id(self, telegram_id: int) -> Optional[User]:
+    def get_user_by_telegram_id(self, telegram_id: int) -> Optional[UserView]:
         """Telegram ID bo'yicha foydalanuvchi topish"""
-        session = self.get_session()
+        return self._get_user_view(User.telegram_id == telegram_id)
 
-        try:
-            user = session.query(User).filter_by(telegram_id=telegram_id).first()
-            if user:
-                session.expunge(user)
-            return user
-        finally:
-            session.close()
+    def get_user_by_phone(self, phone_number: str) -> Optional[UserView]:
+        """Telefon raqam bo'yicha foydalanuvchi topish (har qanday formatda, UNIQUE index orqali)"""
+        normalized_phone = normalize_phone(phone_number)
+        if not normalized_phone:
+            return None
 
-    def get_user_by_phone(self, phone_number: str) -> Optional[User]:
-        """Telefon raqam bo'yicha foydalanuvchi topish"""
-        session = self.get_session()
+        return self._get_user_view(User.phone_normalized == normalized_phone)
 
-        try:
-            user = session.query(User).filter_by(phone_number=phone_number).first()
-            if user:
-                session.expunge(user)
-            return user
-        finally:
-            session.close()
+    def backfill_phone_numbers(self, batch_size: int = 1000) -> Tuple[int, List[str], List[str]]:
+        """
+        Eski yozuvlar uchun phone_normalized ni bo'laklab to'ldirish
 
-    def link_telegram_account(self, library_id: str, telegram_id: int) -> Tuple[bool, str]:
-        """Mavjud foydalanuvchiga Telegram akkauntni bog'lash"""
-        session = self.get_session()
+        Migratsiya 0003 buni o'zi bajaradi - bu qo'lda tuzatilgan (dublikat yoki
+        noto'g'ri) raqamlarni qayta to'ldirish uchun. Har bir bo'lak alohida qisqa tranzaksiya (id bo'yicha keyset), shuning uchun
+        jadval bloklanmaydi va bot ishlab turganda bajarish mumkin.
+        Dublikat yoki noto'g'ri raqamlar NULL qoladi va qaytariladi (qo'lda birlashtirish uchun).
 
+        Args:
+            batch_size: Bitta tranzaksiyadagi yozuvlar soni
+
+        Returns:
+            (to'ldirilganlar soni, dublikat Library ID lar, noto'g'ri raqamli Library ID lar)
+        """
         try:
-            user = session.query(User).filter_by(library_id=library_id).first()
-            if not user:
-                return False, f"❌ {library_id} ID li foydalanuvchi topilmadi!"
+            with self.engine.connect() as connection:
+                updated, duplicates, invalid = backfill_phone_normalized(connection, batch_size)
+        except Exception as e:
+            logger.error(f"❌ Telefon raqamlarni to'ldirishda xato: {e}")
+            raise
 
-            if user.telegram_id:
-                return False, "❌ Bu Library ID allaqachon Telegram ga bog'langan!"
+        logger.info(f"✅ phone_normalized to'ldirildi: {updated} ta, dublikat: {len(duplicates)} ta, "
+                    f"noto'g'ri: {len(invalid)} ta")
+        return updated, duplicates, invalid
 
-            # Boshqa foydalanuvchida bu Telegram ID borligini tekshirish
-            existing = session.query(User).filter_by(telegram_id=telegram_id).first()
-            if existing:
-                return False, f"❌ Bu Telegram akkaunt boshqa ID ga bog'langan: {existing.library_id}"
+    def link_telegram_account(self, library_id: str, telegram_id: int,
+                              expected_version: Optional[int] = None) -> Tuple[bool, str]:
+        """
+        Mavjud foydalanuvchiga Telegram akkauntni bog'lash
+
+        Args:
+            library_id: Library ID
+            telegram_id: Telegram ID
+            expected_version: O'qilgan paytdagi versiya (berilsa, o'zgargan bo'lsa rad etiladi)
+        """
+        session = self.get_session()
 
-            user.telegram_id = telegram_id
-            user.updated_at = datetime.now()
+        try:
+            # Faqat hali bog'lanmagan yozuv yangilanadi
+            row = self._conditional_update(session, library_id, {'telegram_id': telegram_id},
+                                           expected_version, User.telegram_id.is_(None))
+            if not row:
+                session.rollback()
+                _, error = self._update_failure(session, library_id, expected_version)
+                return False, error or "❌ Bu Library ID allaqachon Telegram ga bog'langan!"
 
             session.commit()
             logger.info(f"✅ Telegram bog'landi: {library_id} -> {telegram_id}")
             return True, f"✅ Telegram akkaunt muvaffaqiyatli bog'landi!\n📚 Library ID: {library_id}"
 
+        except IntegrityError:
+            # telegram_id UNIQUE - boshqa foydalanuvchida bor
+            session.rollback()
+            existing = session.query(User.library_id).filter_by(telegram_id=telegram_id).first()
+            owner = existing.library_id if existing else "?"
+            return False, f"❌ Bu Telegram akkaunt boshqa ID ga bog'langan: {owner}"
+
         except Exception as e:
             session.rollback()
             logger.error(f"❌ Telegram bog'lashda xato: {e}")
@@ -222,59 +287,230 @@ class DatabaseManager:
             session.close()
 
     def update_subscription(self, library_id: str, plan_name: str,
-                            duration_days: int = 30) -> Tuple[bool, str]:
-        """Obunani yangilash"""
-        session = self.get_session()
+                            duration_days: int = 30,
+                            expected_version: Optional[int] = None) -> Tuple[bool, str]:
+        """
+        Obunani yangilash
 
-        try:
-            user = session.query(User).filter_by(library_id=library_id).first()
-            if not user:
-                return False, f"❌ {library_id} ID li foydalanuvchi topilmadi!"
+        Args:
+            library_id: Library ID
+            plan_name: Free, Money yoki Premium
+            duration_days: Pullik tarif muddati
+            expected_version: O'qilgan paytdagi versiya (berilsa, o'zgargan bo'lsa rad etiladi)
+        """
+        user, message = self.change_subscription(library_id, plan_name, duration_days, expected_version)
+        return user is not None, message
 
-            if plan_name not in ['Free', 'Money', 'Premium']:
-                return False, "❌ Noto'g'ri tarif nomi!"
+    def change_subscription(self, library_id: str, plan_name: str,
+                            duration_days: int = 30,
+                            expected_version: Optional[int] = None) -> Tuple[Optional[dict], str]:
+        """
+        Obunani yangilash va foydalanuvchi ma'lumotlarini shu UPDATE dan qaytarish
 
-            user.subscription_plan = plan_name
+        Oldindan SELECT kerak emas: topilmasa yoki versiya o'zgargan bo'lsa xato qaytadi.
+        Eski tarif PostgreSQL da RETURNING dagi subquery dan olinadi (u UPDATE dan
+        oldingi snapshot ni ko'radi). SQLite RETURNING faqat yangi qiymatlarni
+        ko'radi - u yerda eski tarif UPDATE dan oldin o'qiladi (jarayon ichida, tarmoq yo'q).
 
-            if plan_name == 'Free':
-                user.subscription_end_date = None
-            else:
-                user.subscription_end_date = datetime.now() + timedelta(days=duration_days)
+        Returns:
+            (foydalanuvchi dict yoki None, xabar) - dict: library_id, full_name,
+            phone_number, telegram_id, old_plan, version
+        """
+        if plan_name not in ['Free', 'Money', 'Premium']:
+            return None, "❌ Noto'g'ri tarif nomi!"
+
+        end_date = None if plan_name == 'Free' else datetime.now() + timedelta(days=duration_days)
+        session = self.get_session()
 
-            user.updated_at = datetime.now()
+        try:
+            returning = (User.phone_number, User.telegram_id)
+            old_plan = None
+            if self.engine.dialect.name == 'postgresql':
+                before = aliased(User)
+                returning += (
+                    select(before.subscription_plan).where(before.id == User.id)
+                    .scalar_subquery().label('old_plan'),
+                )
+            else:
+                old_plan = session.execute(
+                    select(User.subscription_plan).where(User.library_id == library_id)
+                ).scalar()
+
+            row = self._conditional_update(
+                session, library_id,
+                {'subscription_plan': plan_name, 'subscription_end_date': end_date},
+                expected_version, returning=returning
+            )
+            if not row:
+                session.rollback()
+                _, error = self._update_failure(session, library_id, expected_version)
+                return None, error or f"❌ {library_id} ID li foydalanuvchi topilmadi!"
 
             session.commit()
             logger.info(f"✅ Obuna yangilandi: {library_id} -> {plan_name}")
-            return True, f"✅ Obuna yangilandi: {plan_name}"
+            return {
+                'library_id': library_id,
+                'full_name': f"{row.first_name} {row.last_name}",
+                'phone_number': row.phone_number,
+                'telegram_id': row.telegram_id,
+                'old_plan': row._mapping.get('old_plan', old_plan),
+                'version': row.version
+            }, f"✅ Obuna yangilandi: {plan_name}"
 
         except Exception as e:
             session.rollback()
             logger.error(f"❌ Obuna yangilashda xato: {e}")
-            return False, f"❌ Xatolik: {str(e)}"
+            return None, f"❌ Xatolik: {str(e)}"
 
         finally:
             session.close()
 
-    def get_all_users(self, active_only: bool = True) -> List[User]:
-        """Barcha foydalanuvchilarni olish"""
+    def bulk_update_subscriptions(self, entries: List[Tuple[str, str, Optional[int]]]
+                                  ) -> Tuple[List[dict], List[str], Optional[str]]:
+        """
+        Bir nechta foydalanuvchi obunasini bitta tranzaksiyada yangilash
+
+        Barcha Library ID lar bitta so'rov bilan tekshiriladi, keyin
+        yangilanishlar bitta commit bilan saqlanadi.
+
+        Args:
+            entries: (library_id, plan_name, duration_days) ro'yxati.
+                     duration_days None bo'lsa 30 kun olinadi.
+
+        Returns:
+            (yangilangan foydalanuvchilar, topilmagan ID lar, xato xabari yoki None)
+        """
+        # Bir ID bir necha marta kelsa, oxirgisi hisobga olinadi
+        requested = {}
+        for library_id, plan_name, duration_days in entries:
+            if plan_name not in ['Free', 'Money', 'Premium']:
+                return [], [], f"❌ Noto'g'ri tarif nomi: {plan_name}"
+            requested[library_id] = (plan_name, duration_days)
+
+        if not requested:
+            return [], [], None
+
         session = self.get_session()
 
         try:
-            query = session.query(User)
-
-            if active_only:
-                query = query.filter_by(is_active=True)
+            rows = session.query(
+                User.id, User.library_id, User.first_name, User.last_name,
+                User.phone_number, User.telegram_id
+            ).filter(User.library_id.in_(list(requested))).all()
+
+            now = datetime.now()
+            mappings = []
+            updated = []
+
+            for row in rows:
+                plan_name, duration_days = requested[row.library_id]
+                days = duration_days or 30
+                end_date = None if plan_name == 'Free' else now + timedelta(days=days)
+
+                mappings.append({
+                    'b_id': row.id,
+                    'b_plan': plan_name,
+                    'b_end_date': end_date,
+                    'b_updated_at': now
+                })
+                updated.append({
+                    'library_id': row.library_id,
+                    'full_name': f"{row.first_name} {row.last_name}",
+                    'phone_number': row.phone_number,
+                    'telegram_id': row.telegram_id,
+                    'plan_name': plan_name,
+                    'duration_days': None if plan_name == 'Free' else days,
+                    'subscription_end_date': end_date
+                })
+
+            found = {row.library_id for row in rows}
+            not_found = [library_id for library_id in requested if library_id not in found]
+
+            if mappings:
+                # executemany, version atomar oshadi (parallel yangilanishlar yo'qolmaydi)
+                stmt = (
+                    update(User.__table__)
+                    .where(User.__table__.c.id == bindparam('b_id'))
+                    .values(
+                        subscription_plan=bindparam('b_plan'),
+                        subscription_end_date=bindparam('b_end_date'),
+                        updated_at=bindparam('b_updated_at'),
+                        version=User.__table__.c.version + 1
+                    )
+                )
+                session.connection().execute(stmt, mappings)
+            session.commit()
 
-            users = query.order_by(User.registered_date.desc()).all()
+            logger.info(f"✅ Obunalar yangilandi (bulk): {len(updated)} ta, topilmadi: {len(not_found)} ta")
+            return updated, not_found, None
 
-            # Session dan detach qilish
-            for user in users:
-                session.expunge(user)
+        except Exception as e:
+            session.rollback()
+            logger.error(f"❌ Bulk obuna yangilashda xato: {e}")
+            return [], [], f"❌ Xatolik: {str(e)}"
 
-            return users
         finally:
             session.close()
 
+    def get_all_users(self, active_only: bool = True) -> List[UserView]:
+        """Barcha foydalanuvchilarni olish"""
+        stmt = select(*USER_VIEW_COLUMNS)
+
+        if active_only:
+            stmt = stmt.where(User.is_active == True)
+
+        return self._get_user_views(stmt.order_by(User.registered_date.desc()))
+
+    @staticmethod
+    def user_search_filters(search_id: str = "", search_name: str = "", plan: str = "Barchasi",
+                            telegram: str = "Barchasi", active_only: bool = True) -> list:
+        """
+        Dashboard foydalanuvchilar sahifasi filtrlari (database tomonida, katta-kichik harf farqlanmaydi)
+
+        Args:
+            search_id: Library ID qismi
+            search_name: Ism yoki familiya qismi
+            plan: Tarif yoki "Barchasi"
+            telegram: "Bog'langan", "Bog'lanmagan" yoki "Barchasi"
+            active_only: Faqat faol foydalanuvchilar
+        """
+        filters = []
+
+        if active_only:
+            filters.append(User.is_active == True)
+        if search_id.strip():
+            filters.append(User.library_id.ilike(f"%{search_id.strip()}%"))
+        if search_name.strip():
+            pattern = f"%{search_name.strip()}%"
+            filters.append(User.first_name.ilike(pattern) | User.last_name.ilike(pattern))
+        if plan != "Barchasi":
+            filters.append(User.subscription_plan == plan)
+        if telegram == "Bog'langan":
+            filters.append(User.telegram_id.isnot(None))
+        elif telegram == "Bog'lanmagan":
+            filters.append(User.telegram_id.is_(None))
+
+        return filters
+
+    def get_users_page(self, filters: Optional[list] = None, page: int = 1,
+                       page_size: int = 100) -> List[UserView]:
+        """
+        Foydalanuvchilar sahifasi (yangi ro'yxatdan o'tganlar birinchi)
+
+        Args:
+            filters: SQLAlchemy shartlari (user_search_filters)
+            page: Sahifa raqami (1 dan)
+            page_size: Sahifadagi qatorlar soni
+        """
+        stmt = (
+            select(*USER_VIEW_COLUMNS)
+            .where(*(filters or []))
+            .order_by(User.registered_date.desc(), User.id.desc())
+            .offset((max(page, 1) - 1) * page_size)
+            .limit(page_size)
+        )
+        return self._get_user_views(stmt)
+
     def get_statistics(self) -> dict:
         """Statistika olish"""
         session = self.get_session()
@@ -306,84 +542,137 @@ class DatabaseManager:
         finally:
             session.close()
 
-    def get_users_expiring_soon(self, warning_days: int = 3) -> List[User]:
+    @staticmethod
+    def expiring_soon_filters(warning_days: int = 3) -> list:
+        """Obunasi `warning_days` ichida tugaydigan faol pullik foydalanuvchilar sharti"""
+        now = datetime.now()
+        return [
+            User.subscription_end_date.isnot(None),
+            User.subscription_end_date <= now + timedelta(days=warning_days),
+            User.subscription_end_date > now,
+            User.subscription_plan.in_(['Money', 'Premium']),
+            User.is_active == True
+        ]
+
+    @staticmethod
+    def expired_filters() -> list:
+        """Muddati o'tgan faol pullik obunalar sharti"""
+        return [
+            User.subscription_end_date.isnot(None),
+            User.subscription_end_date < datetime.now(),
+            User.subscription_plan.in_(['Money', 'Premium']),
+            User.is_active == True
+        ]
+
+    def get_users_expiring_soon(self, warning_days: int = 3) -> List[UserView]:
         """Obunasi tez orada tugaydigan foydalanuvchilar"""
-        session = self.get_session()
+        return self._get_user_views(select(*USER_VIEW_COLUMNS).where(*self.expiring_soon_filters(warning_days)))
 
-        try:
-            warning_date = datetime.now() + timedelta(days=warning_days)
+    def get_expired_subscriptions(self) -> List[UserView]:
+        """Muddati o'tgan obunalar"""
+        return self._get_user_views(select(*USER_VIEW_COLUMNS).where(*self.expired_filters()))
 
-            users = session.query(User).filter(
-                User.subscription_end_date.isnot(None),
-                User.subscription_end_date <= warning_date,
-                User.subscription_end_date > datetime.now(),
-                User.subscription_plan.in_(['Money', 'Premium']),
-                User.is_active == True
-            ).all()
+    def iter_users(self, filters: Optional[list] = None, batch_size: int = 1000,
+                   limit: Optional[int] = None) -> Iterator[UserView]:
+        """
+        Foydalanuvchilarni bo'laklab o'qish (xotira foydalanuvchilar soniga bog'liq emas)
 
-            for user in users:
-                session.expunge(user)
+        ORM obyektlari yaratilmaydi - UserView tuple lar qaytadi
+        (user.library_id, user.full_name ...). PostgreSQL da server-side cursor
+        (stream_results) ishlatiladi, bir vaqtda faqat `batch_size` qator xotirada bo'ladi.
 
-            return users
-        finally:
-            session.close()
+        MUHIM: Generator oxirigacha o'qilmaguncha (yoki yopilmaguncha) bitta connection band.
+        Iteratsiya orasida await / uzoq ish bo'lsa iter_user_batches ishlating.
 
-    def get_expired_subscriptions(self) -> List[User]:
-        """Muddati o'tgan obunalar"""
-        session = self.get_session()
+        Args:
+            filters: SQLAlchemy shartlari, masalan [User.is_active == True]
+            batch_size: Bitta fetch dagi qatorlar soni
+            limit: Maksimal qatorlar soni
 
-        try:
-            users = session.query(User).filter(
-                User.subscription_end_date.isnot(None),
-                User.subscription_end_date < datetime.now(),
-                User.subscription_plan.in_(['Money', 'Premium']),
-                User.is_active == True
-            ).all()
+        Yields:
+            UserView (id bo'yicha tartiblangan)
+        """
+        stmt = select(*USER_VIEW_COLUMNS).where(*(filters or [])).order_by(User.id)
+        if limit is not None:
+            stmt = stmt.limit(limit)
 
-            for user in users:
-                session.expunge(user)
+        with self.engine.connect() as connection:
+            result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(stmt)
+            yield from user_views(result)
 
-            return users
-        finally:
-            session.close()
+    def iter_user_batches(self, filters: Optional[list] = None,
+                          batch_size: int = 1000) -> Iterator[List[UserView]]:
+        """
+        Foydalanuvchilarni keyset bo'laklarida o'qish (User.id > oxirgi_id LIMIT batch_size)
 
-    def search_users(self, query: str) -> List[User]:
-        """Foydalanuvchilarni qidirish"""
-        session = self.get_session()
+        iter_users dan farqi: har bir bo'lak alohida qisqa connection da o'qiladi va
+        connection bo'lak qaytarilishidan oldin pool ga qaytadi. Bo'laklar orasida uzoq
+        ish (xabar yuborish, pauza, yangilash) bo'lsa shu usul ishlatiladi - server-side
+        cursor tranzaksiyani ochiq ushlab turmaydi.
 
-        try:
-            search_pattern = f"%{query}%"
+        Args:
+            filters: SQLAlchemy shartlari
+            batch_size: Bitta bo'lakdagi qatorlar soni
+
+        Yields:
+            UserView ro'yxati (id bo'yicha tartiblangan)
+        """
+        last_id = 0
+
+        while True:
+            stmt = (
+                select(*USER_VIEW_COLUMNS)
+                .where(User.id > last_id, *(filters or []))
+                .order_by(User.id)
+                .limit(batch_size)
+            )
+            with self.engine.connect() as connection:
+                batch = list(user_views(connection.execute(stmt)))
 
-            users = session.query(User).filter(
-                (User.library_id.ilike(search_pattern) |
-                 User.first_name.ilike(search_pattern) |
-                 User.last_name.ilike(search_pattern) |
-                 User.phone_number.ilike(search_pattern)),
-                User.is_active == True
-            ).order_by(User.registered_date.desc()).limit(50).all()
+            if not batch:
+                return
 
-            for user in users:
-                session.expunge(user)
+            last_id = batch[-1].id
+            yield batch
 
-            return users
+    def count_users(self, filters: Optional[list] = None) -> int:
+        """Shartga mos foydalanuvchilar soni"""
+        session = self.get_session()
+
+        try:
+            return session.query(func.count(User.id)).filter(*(filters or [])).scalar() or 0
         finally:
             session.close()
 
-    def deactivate_user(self, library_id: str) -> Tuple[bool, str]:
+    def search_users(self, query: str) -> List[UserView]:
+        """Foydalanuvchilarni qidirish"""
+        search_pattern = f"%{query}%"
+
+        stmt = select(*USER_VIEW_COLUMNS).where(
+            (User.library_id.ilike(search_pattern) |
+             User.first_name.ilike(search_pattern) |
+             User.last_name.ilike(search_pattern) |
+             User.phone_number.ilike(search_pattern)),
+            User.is_active == True
+        ).order_by(User.registered_date.desc()).limit(50)
+
+        return self._get_user_views(stmt)
+
+    def deactivate_user(self, library_id: str,
+                        expected_version: Optional[int] = None) -> Tuple[bool, str]:
         """Foydalanuvchini deaktiv qilish"""
         session = self.get_session()
 
         try:
-            user = session.query(User).filter_by(library_id=library_id).first()
-            if not user:
-                return False, f"❌ {library_id} ID li foydalanuvchi topilmadi!"
-
-            user.is_active = False
-            user.updated_at = datetime.now()
+            row = self._conditional_update(session, library_id, {'is_active': False}, expected_version)
+            if not row:
+                session.rollback()
+                _, error = self._update_failure(session, library_id, expected_version)
+                return False, error or f"❌ {library_id} ID li foydalanuvchi topilmadi!"
 
             session.commit()
             logger.info(f"✅ Foydalanuvchi deaktiv qilindi: {library_id}")
-            return True, f"✅ Foydalanuvchi deaktiv qilindi: {user.full_name}"
+            return True, f"✅ Foydalanuvchi deaktiv qilindi: {row.first_name} {row.last_name}"
 
         except Exception as e:
             session.rollback()
@@ -393,17 +682,17 @@ class DatabaseManager:
         finally:
             session.close()
 
-    def activate_user(self, library_id: str) -> Tuple[bool, str]:
+    def activate_user(self, library_id: str,
+                      expected_version: Optional[int] = None) -> Tuple[bool, str]:
         """Foydalanuvchini aktiv qilish"""
         session = self.get_session()
 
         try:
-            user = session.query(User).filter_by(library_id=library_id).first()
-            if not user:
-                return False, f"❌ {library_id} ID li foydalanuvchi topilmadi!"
-
-            user.is_active = True
-            user.updated_at = datetime.now()
+            row = self._conditional_update(session, library_id, {'is_active': True}, expected_version)
+            if not row:
+                session.rollback()
+                _, error = self._update_failure(session, library_id, expected_version)
+                return False, error or f"❌ {library_id} ID li foydalanuvchi topilmadi!"
 
             session.commit()
             logger.info(f"✅ Foydalanuvchi aktiv qilindi: {library_id}")
@@ -419,9 +708,13 @@ class DatabaseManager:
 
 
     def close(self):
-        """Engine ni yopish"""
-        self.engine.dispose()
-        logger.info("🔒 Database connection yopildi")
+        """
+        Manager ni yopish
+
+        Engine jarayon bo'yicha umumiy, shuning uchun pool bu yerda yopilmaydi.
+        Pool'larni yopish: database.engine.dispose_engines()
+        """
+        logger.debug("🔒 Database Manager yopildi")
 
 
 # Test uchun
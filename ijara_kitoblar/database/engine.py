@@ -0,0 +1,223 @@
+"""
+Database Engine - SQLAlchemy engine va connection pool sozlamalari
+Bitta jarayonda har bir database URL uchun bitta umumiy engine (pool) ishlatiladi,
+shuning uchun DatabaseManager va AdminManager nusxalari connection'larni ko'paytirmaydi.
+SQLite URL (sqlite:///library.db) uchun WAL rejimidagi alohida engine yaratiladi.
+"""
+import logging
+import threading
+from typing import Dict, List
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
+
+from ijara_kitoblar.config import (
+    DB_POOL_MODE, POOL_SIZE, MAX_OVERFLOW, POOL_TIMEOUT, POOL_RECYCLE,
+    POOL_PRE_PING, POOL_USE_LIFO, SQLITE_BUSY_TIMEOUT, SQLITE_MMAP_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+# Pool rejimlari:
+#   queue     - QueuePool (oddiy PostgreSQL ulanish)
+#   pgbouncer - NullPool, pgbouncer transaction pooling uchun
+POOL_MODES = ('queue', 'pgbouncer')
+
+_engines: Dict[str, Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def _pgbouncer_connect_args(database_url: str) -> dict:
+    """
+    pgbouncer (transaction pooling) uchun driver sozlamalari
+
+    Transaction pooling rejimida server tomonidagi prepared statement'lar
+    boshqa client connection'iga tushib qolishi mumkin, shuning uchun o'chiriladi.
+    psycopg2 prepared statement ishlatmaydi, qo'shimcha sozlama kerak emas.
+    """
+    driver = make_url(database_url).get_driver_name()
+
+    if driver == 'psycopg':
+        return {'prepare_threshold': None}
+    if driver == 'asyncpg':
+        return {'statement_cache_size': 0, 'prepared_statement_cache_size': 0}
+    return {}
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Har bir yangi SQLite connection uchun PRAGMA sozlamalari
+
+    WAL - o'quvchilar yozuvchini kutmaydi, synchronous=NORMAL WAL da xavfsiz
+    va har bir commit da fsync qilmaydi.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT}")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def _build_sqlite_engine(database_url: str, pool_size: int, max_overflow: int,
+                         **engine_kwargs) -> Engine:
+    """
+    SQLite engine (WAL rejimi, har bir thread uchun alohida connection)
+
+    Fayl database - QueuePool: checkout qilingan connection faqat bitta thread
+    da ishlatiladi (eski sqlite3 implementatsiyasidagi umumiy cursor muammosi yo'q).
+    SingletonThreadPool ishlatilmaydi - thread'lar ko'payganda boshqa thread'ning
+    connection'ini yopib yuborishi mumkin (asyncio.to_thread, Streamlit).
+    Xotiradagi database (sqlite://) - StaticPool, aks holda har bir connection
+    o'zining bo'sh database'ini ko'radi.
+    """
+    connect_args = {
+        # Connection pool orqali thread'dan thread'ga o'tadi, lekin bir vaqtda bitta thread ishlatadi
+        'check_same_thread': False,
+        'timeout': SQLITE_BUSY_TIMEOUT / 1000
+    }
+    connect_args.update(engine_kwargs.pop('connect_args', {}))
+
+    if make_url(database_url).database in (None, '', ':memory:'):
+        pool_kwargs = {'poolclass': StaticPool}
+    else:
+        pool_kwargs = {
+            'poolclass': QueuePool,
+            'pool_size': pool_size,
+            'max_overflow': max_overflow,
+            'pool_timeout': POOL_TIMEOUT
+        }
+
+    engine = create_engine(
+        database_url,
+        connect_args=connect_args,
+        echo=False,
+        **pool_kwargs,
+        **engine_kwargs
+    )
+    event.listen(engine, 'connect', _set_sqlite_pragmas)
+    return engine
+
+
+def build_engine(database_url: str, pool_mode: str = DB_POOL_MODE,
+                 pool_size: int = POOL_SIZE, max_overflow: int = MAX_OVERFLOW,
+                 use_lifo: bool = POOL_USE_LIFO, pre_ping: bool = POOL_PRE_PING,
+                 **engine_kwargs) -> Engine:
+    """
+    Yangi engine yaratish (keshlanmaydi)
+
+    Args:
+        database_url: Database connection URL
+        pool_mode: 'queue' yoki 'pgbouncer' (SQLite uchun e'tiborga olinmaydi)
+        pool_size: Doimiy ochiq connection'lar soni (queue, SQLite)
+        max_overflow: Qo'shimcha connection'lar soni (queue, SQLite)
+        use_lifo: Oxirgi qaytarilgan connection'ni birinchi olish (queue)
+        pre_ping: Connection'ni olishdan oldin tekshirish (queue)
+
+    Returns:
+        SQLAlchemy Engine
+    """
+    if make_url(database_url).get_backend_name() == 'sqlite':
+        return _build_sqlite_engine(database_url, pool_size, max_overflow, **engine_kwargs)
+
+    if pool_mode not in POOL_MODES:
+        raise ValueError(f"Noto'g'ri pool rejimi: {pool_mode} (mumkin: {', '.join(POOL_MODES)})")
+
+    if pool_mode == 'pgbouncer':
+        # Pool ni pgbouncer boshqaradi - har bir checkout yangi client connection
+        connect_args = _pgbouncer_connect_args(database_url)
+        connect_args.update(engine_kwargs.pop('connect_args', {}))
+
+        return create_engine(
+            database_url,
+            poolclass=NullPool,
+            connect_args=connect_args,
+            echo=False,
+            **engine_kwargs
+        )
+
+    return create_engine(
+        database_url,
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        pool_pre_ping=pre_ping,
+        pool_use_lifo=use_lifo,
+        echo=False,
+        **engine_kwargs
+    )
+
+
+def get_engine(database_url: str) -> Engine:
+    """
+    Database URL uchun umumiy engine ni olish (kerak bo'lsa yaratish)
+
+    Args:
+        database_url: Database connection URL
+
+    Returns:
+        Jarayon bo'yicha yagona Engine
+    """
+    engine = _engines.get(database_url)
+    if engine is not None:
+        return engine
+
+    with _engines_lock:
+        engine = _engines.get(database_url)
+        if engine is None:
+            engine = build_engine(database_url)
+            _engines[database_url] = engine
+            if engine.dialect.name == 'sqlite':
+                logger.info(f"🔌 SQLite engine yaratildi (WAL): {engine.url.database or ':memory:'}")
+            else:
+                logger.info(
+                    f"🔌 Database engine yaratildi (pool: {DB_POOL_MODE}, "
+                    f"size: {POOL_SIZE}, overflow: {MAX_OVERFLOW})"
+                )
+        return engine
+
+
+def dispose_engines():
+    """Barcha umumiy engine'larni yopish (jarayon tugaganda)"""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+    logger.info("🔒 Database connection pool'lar yopildi")
+
+
+def pool_status() -> List[dict]:
+    """
+    Umumiy engine'lar pool holati (monitoring uchun)
+
+    Returns:
+        Har bir engine uchun: database (parolsiz URL), pool turi, size, checked_in,
+        checked_out, overflow. NullPool (pgbouncer) da son ko'rsatkichlari bo'lmaydi.
+    """
+    with _engines_lock:
+        engines = list(_engines.values())
+
+    result = []
+    for engine in engines:
+        pool = engine.pool
+        status = {
+            'database': engine.url.render_as_string(hide_password=True),
+            'pool': type(pool).__name__
+        }
+        if isinstance(pool, QueuePool):
+            status.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                checked_out=pool.checkedout(),
+                overflow=max(0, pool.overflow())
+            )
+        result.append(status)
+
+    return result
@@ -0,0 +1,128 @@
+"""
+Database Migrations - Alembic migratsiyalarini boshqarish
+Sxema versiyasi alembic_version jadvalida saqlanadi, jadvallar faqat migratsiya orqali o'zgaradi
+"""
+import logging
+import os
+import threading
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from ijara_kitoblar.config import DATABASE_URL
+from ijara_kitoblar.database.engine import get_engine
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ALEMBIC_INI = os.path.join(PROJECT_DIR, 'alembic.ini')
+MIGRATIONS_DIR = os.path.join(PROJECT_DIR, 'migrations')
+
+# Versiyasiz (create_all bilan yaratilgan) database lar shu revision deb belgilanadi
+BASELINE_REVISION = '0001'
+
+# Versiyasi tekshirilgan engine'lar
+_checked = set()
+_checked_lock = threading.Lock()
+
+
+def get_alembic_config(database_url: str = None) -> Config:
+    """Alembic Config (URL config.py dan yoki berilgan qiymatdan)"""
+    config = Config(ALEMBIC_INI)
+    config.set_main_option('script_location', MIGRATIONS_DIR)
+    # ConfigParser '%' ni interpolatsiya qiladi
+    config.set_main_option('sqlalchemy.url', (database_url or DATABASE_URL).replace('%', '%%'))
+    config.attributes['configure_logger'] = False
+    return config
+
+
+def head_revision() -> str:
+    """Migratsiyalardagi oxirgi revision"""
+    return ScriptDirectory.from_config(get_alembic_config()).get_current_head()
+
+
+def current_revision(engine: Engine) -> Optional[str]:
+    """Database dagi joriy revision (versiyasiz bo'lsa None)"""
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+
+def upgrade_database(database_url: str = None, revision: str = 'head'):
+    """
+    Database ni oxirgi (yoki berilgan) versiyaga yangilash
+
+    Args:
+        database_url: Database connection URL
+        revision: Maqsad revision (default: head)
+    """
+    database_url = database_url or DATABASE_URL
+    config = get_alembic_config(database_url)
+    engine = get_engine(database_url)
+
+    # Umumiy engine connection'i env.py ga beriladi
+    with engine.connect() as connection:
+        config.attributes['connection'] = connection
+
+        # Eski create_all bilan yaratilgan database - boshlang'ich sxema allaqachon bor
+        unversioned = (MigrationContext.configure(connection).get_current_revision() is None
+                       and inspect(connection).has_table('users'))
+        # Alembic tranzaksiyani o'zi boshqaradi (autocommit_block uchun shart)
+        connection.commit()
+
+        if unversioned:
+            logger.info(f"📌 Versiyasiz database {BASELINE_REVISION} revision bilan belgilandi")
+            command.stamp(config, BASELINE_REVISION)
+
+        command.upgrade(config, revision)
+        connection.commit()
+
+    with _checked_lock:
+        _checked.discard(engine.url.render_as_string(hide_password=False))
+
+    logger.info(f"✅ Database sxemasi yangilandi: {current_revision(engine)}")
+
+
+def check_schema_version(engine: Engine) -> bool:
+    """
+    Sxema versiyasini tekshirish (faqat startup da, jarayon bo'yicha bir marta)
+
+    Args:
+        engine: SQLAlchemy Engine
+
+    Returns:
+        True - database oxirgi versiyada
+    """
+    key = engine.url.render_as_string(hide_password=False)
+    if key in _checked:
+        return True
+
+    current = current_revision(engine)
+    head = head_revision()
+
+    if current != head:
+        logger.error(
+            f"❌ Database sxemasi eskirgan: {current or 'versiyasiz'} (kerak: {head})\n"
+            f"💡 Yangilash: python init_database.py migrate"
+        )
+        return False
+
+    with _checked_lock:
+        _checked.add(key)
+
+    logger.info(f"✅ Database sxemasi: {current}")
+
+    # 0003 dan keyin to'ldirilmagan (dublikat / noto'g'ri) raqamlar - dublikat tekshiruvidan chetda
+    with engine.connect() as conn:
+        unfilled = conn.execute(text("SELECT COUNT(*) FROM users WHERE phone_normalized IS NULL")).scalar()
+    if unfilled:
+        logger.warning(
+            f"⚠️ phone_normalized to'ldirilmagan: {unfilled} ta foydalanuvchi (dublikat yoki noto'g'ri raqam)\n"
+            f"💡 Tuzatib, so'ng: python init_database.py backfill-phones"
+        )
+
+    return True
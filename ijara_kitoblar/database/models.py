@@ -1,8 +1,8 @@
 """
-Database Models - PostgreSQL
-SQLAlchemy ORM modellari - faqat PostgreSQL uchun
+Database Models - PostgreSQL / SQLite
+SQLAlchemy ORM modellari - ikkala backend uchun bir xil sxema
 """
-from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Boolean, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -32,6 +32,8 @@ class User(Base):
     first_name = Column(String(100), nullable=False)
     last_name = Column(String(100), nullable=False)
     phone_number = Column(String(20), nullable=False, index=True)
+    # E.164 ko'rinishi (database/phone.py) - dublikatlar va qidiruv shu ustun bo'yicha
+    phone_normalized = Column(String(16), nullable=True)
     birth_year = Column(Integer, nullable=False)
     study_place = Column(String(200), nullable=False)
 
@@ -42,12 +44,23 @@ class User(Base):
     # Status
     is_active = Column(Boolean, default=True, nullable=False)
 
+    # Optimistic locking - har bir UPDATE da 1 ga oshadi (db_manager._conditional_update)
+    version = Column(Integer, default=1, server_default='1', nullable=False)
+
     # Vaqt belgilari
     registered_date = Column(DateTime, default=datetime.now, nullable=False)
     created_at = Column(DateTime, default=datetime.now, nullable=False)
     last_warning_sent = Column(DateTime, nullable=True)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
+    # Qo'shimcha index'lar (migrations/versions/0002, 0003 da CONCURRENTLY yaratiladi)
+    __table_args__ = (
+        Index('idx_users_subscription_plan', 'subscription_plan'),
+        Index('idx_users_is_active', 'is_active'),
+        Index('idx_users_subscription_end', 'subscription_end_date'),
+        Index('uq_users_phone_normalized', 'phone_normalized', unique=True),
+    )
+
     def __repr__(self):
         return f"<User(library_id='{self.library_id}', name='{self.first_name} {self.last_name}')>"
 
@@ -128,26 +141,49 @@ class Notification(Base):
     sent_date = Column(DateTime, default=datetime.now, nullable=False)
     is_read = Column(Boolean, default=False, nullable=False)
 
+    __table_args__ = (
+        Index('idx_notifications_sent_date', 'sent_date'),
+    )
+
     def __repr__(self):
         return f"<Notification(library_id='{self.library_id}', type='{self.notification_type}')>"
 
 
-# Index'lar avtomatik yaratiladi yuqorida index=True orqali
-# Agar qo'shimcha index kerak bo'lsa:
-"""
-CREATE INDEX idx_users_subscription_plan ON users(subscription_plan);
-CREATE INDEX idx_users_is_active ON users(is_active);
-CREATE INDEX idx_users_subscription_end ON users(subscription_end_date);
-CREATE INDEX idx_notifications_sent_date ON notifications(sent_date);
-"""
+class AdminAudit(Base):
+    """
+    Admin harakatlari jurnali
+    Tarif tasdiqlash, admin qo'shish/o'chirish, foydalanuvchi qo'shish va dashboard
+    o'zgarishlari. Bot bu jadvalga bot/utils/audit.py navbati orqali bo'laklab yozadi.
+    """
+    __tablename__ = 'admin_audit'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    created_at = Column(DateTime, default=datetime.now, nullable=False)  # Harakat vaqti
+    source = Column(String(20), default='bot', nullable=False)  # 'bot', 'dashboard'
+    actor_telegram_id = Column(BigInteger, nullable=True)  # Dashboard da Telegram ID yo'q
+    action = Column(String(50), nullable=False)  # 'approve', 'add_admin', 'remove_admin', 'add_user'...
+    target_library_id = Column(String(10), nullable=True)
+    success = Column(Boolean, default=True, nullable=False)
+    details = Column(Text, nullable=True)  # JSON
+
+    __table_args__ = (
+        # Vaqt oralig'i bo'yicha so'rovlar (viewer) uchun
+        Index('idx_admin_audit_created_at', 'created_at'),
+        Index('idx_admin_audit_actor_created', 'actor_telegram_id', 'created_at'),
+        Index('idx_admin_audit_target_created', 'target_library_id', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f"<AdminAudit(action='{self.action}', target='{self.target_library_id}')>"
+
+
+# Jadval va index'lar migratsiyalar orqali yaratiladi:
+#   python init_database.py migrate
 
 
 if __name__ == "__main__":
-    from sqlalchemy import create_engine
-    from ijara_kitoblar.config import DATABASE_URL
+    from ijara_kitoblar.database.migrations import upgrade_database
 
-    # Test - jadvallarni yaratish
-    engine = create_engine(DATABASE_URL, echo=True)
-    Base.metadata.create_all(engine)
+    # Test - jadvallarni migratsiya orqali yaratish
+    upgrade_database()
     print("✅ PostgreSQL jadvallar yaratildi!")
-    engine.dispose()
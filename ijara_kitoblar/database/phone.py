@@ -0,0 +1,143 @@
+"""
+Phone Utils - Telefon raqamlarni E.164 formatiga keltirish
+"+998 90 123-45-67", "998901234567", "90 123 45 67", "8 90 123 45 67" va "00998901234567" -> "+998901234567"
+
+Barcha yozish va qidirish shu funksiya orqali o'tadi, shuning uchun users.phone_normalized
+ustunidagi qiymatlar bir xil formatda va UNIQUE index bilan solishtiriladi.
+"""
+import re
+from typing import List, Optional, Tuple
+
+import sqlalchemy as sa
+
+DEFAULT_COUNTRY_CODE = '998'
+LOCAL_NUMBER_LENGTH = 9  # 90 123 45 67
+TRUNK_PREFIX = '8'  # Eski ichki format: 8 90 123 45 67
+
+_NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_phone(phone_number: Optional[str]) -> Optional[str]:
+    """
+    Telefon raqamni E.164 ko'rinishiga keltirish
+
+    Args:
+        phone_number: Foydalanuvchi kiritgan raqam (probel, tire, qavslar bo'lishi mumkin)
+
+    Returns:
+        "+998901234567" yoki None (raqam noto'g'ri bo'lsa)
+    """
+    if not phone_number:
+        return None
+
+    raw = phone_number.strip()
+    digits = _NON_DIGITS.sub('', raw)
+
+    if not raw.startswith('+'):
+        if digits.startswith('00'):
+            # Xalqaro prefiks: 00998...
+            digits = digits[2:]
+        elif len(digits.lstrip('0')) == LOCAL_NUMBER_LENGTH:
+            # Mahalliy raqam: 901234567 yoki 0901234567
+            digits = DEFAULT_COUNTRY_CODE + digits.lstrip('0')
+        elif digits.startswith(TRUNK_PREFIX):
+            # "+" siz 8 - mamlakat kodi emas, ichki prefiks. Undan keyin faqat
+            # mahalliy raqam bo'lishi mumkin, aks holda raqam noaniq (+8... emas)
+            if len(digits) != len(TRUNK_PREFIX) + LOCAL_NUMBER_LENGTH:
+                return None
+            digits = DEFAULT_COUNTRY_CODE + digits[len(TRUNK_PREFIX):]
+
+    # E.164: 15 tagacha raqam, mamlakat kodi 0 bilan boshlanmaydi
+    if not 8 <= len(digits) <= 15 or digits.startswith('0'):
+        return None
+
+    # O'zbekiston raqamlari: 998 + 9 xonali raqam
+    if digits.startswith(DEFAULT_COUNTRY_CODE) and len(digits) != len(DEFAULT_COUNTRY_CODE) + LOCAL_NUMBER_LENGTH:
+        return None
+
+    return f"+{digits}"
+
+
+# Migratsiya (0003) va init_database.py uchun - ORM modeliga bog'liq emas, chunki
+# migratsiya paytida users jadvalida keyingi versiyalardagi ustunlar hali yo'q
+_users = sa.table(
+    'users',
+    sa.column('id', sa.Integer),
+    sa.column('library_id', sa.String),
+    sa.column('phone_number', sa.String),
+    sa.column('phone_normalized', sa.String),
+)
+
+
+def backfill_phone_normalized(connection, batch_size: int = 1000,
+                              commit: bool = True) -> Tuple[int, List[str], List[str]]:
+    """
+    phone_normalized NULL bo'lgan yozuvlarni bo'laklab to'ldirish
+
+    Bo'laklar id bo'yicha keyset (id > oxirgi_id LIMIT batch_size), har biri alohida
+    qisqa tranzaksiya - jadval bloklanmaydi. Bir xil raqamli yozuvlardan eng eskisi
+    (kichik id) raqamni oladi; dublikat va noto'g'ri raqamlar NULL qoladi.
+
+    Args:
+        connection: SQLAlchemy Connection
+        batch_size: Bitta bo'lakdagi yozuvlar soni
+        commit: Har bir bo'lakdan keyin commit (AUTOCOMMIT connection uchun False)
+
+    Returns:
+        (to'ldirilganlar soni, dublikat Library ID lar, noto'g'ri raqamli Library ID lar)
+    """
+    updated = 0
+    duplicates = []
+    invalid = []
+    last_id = 0
+
+    update = (
+        _users.update()
+        .where(_users.c.id == sa.bindparam('row_id'))
+        .values(phone_normalized=sa.bindparam('value'))
+    )
+
+    while True:
+        rows = connection.execute(
+            sa.select(_users.c.id, _users.c.library_id, _users.c.phone_number)
+            .where(_users.c.phone_normalized.is_(None), _users.c.id > last_id)
+            .order_by(_users.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        last_id = rows[-1].id
+
+        candidates = {}
+        for row in rows:
+            normalized_phone = normalize_phone(row.phone_number)
+            if not normalized_phone:
+                invalid.append(row.library_id)
+            elif normalized_phone in candidates:
+                duplicates.append(row.library_id)
+            else:
+                candidates[normalized_phone] = row
+
+        # Oldingi bo'laklarda yoki yangi yozuvlarda band bo'lgan raqamlar
+        taken = set()
+        if candidates:
+            taken = set(connection.execute(
+                sa.select(_users.c.phone_normalized)
+                .where(_users.c.phone_normalized.in_(list(candidates)))
+            ).scalars())
+
+        mappings = []
+        for normalized_phone, row in candidates.items():
+            if normalized_phone in taken:
+                duplicates.append(row.library_id)
+            else:
+                mappings.append({'row_id': row.id, 'value': normalized_phone})
+
+        if mappings:
+            connection.execute(update, mappings)
+        if commit:
+            connection.commit()
+        updated += len(mappings)
+
+    return updated, duplicates, invalid
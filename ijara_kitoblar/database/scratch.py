@@ -0,0 +1,58 @@
+"""
+Scratch Run - testlar va benchmark uchun vaqtinchalik yozuvlar
+Bitta backend (SQLite / PostgreSQL) uchun managerlar, boshqa ma'lumotlar bilan
+to'qnashmaydigan telefon / Telegram ID lar va ularni oxirida tozalash
+"""
+import uuid
+
+from sqlalchemy.engine import make_url
+
+from ijara_kitoblar.database.db_manager import DatabaseManager
+from ijara_kitoblar.database.admin_manager import AdminManager
+from ijara_kitoblar.database.audit_manager import AuditManager
+from ijara_kitoblar.database.models import User, Admin, AdminAudit
+
+
+class BackendRun:
+    """Bitta backend uchun managerlar va shu ishga tushirishda yaratilgan yozuvlar"""
+
+    def __init__(self, database_url: str):
+        self.database_url = database_url
+        self.backend = make_url(database_url).get_backend_name()
+        self.db = DatabaseManager(database_url)
+        self.admins = AdminManager(database_url)
+        self.audit = AuditManager(database_url)
+
+        # Boshqa ma'lumotlar bilan to'qnashmasligi uchun noyob prefiks
+        self.tag = uuid.uuid4().int % 10 ** 6
+        self.phone_prefix = f"+99877{self.tag % 1000:03d}"
+        self.telegram_base = 9_000_000_000 + self.tag * 10_000
+
+    def phone(self, n: int) -> str:
+        # +998 77 ttt nnnn - to'g'ri O'zbekiston raqami (12 xona)
+        return f"{self.phone_prefix}{n % 10_000:04d}"
+
+    def spaced_phone(self, n: int) -> str:
+        """Xuddi shu raqam boshqa yozilishda: 998 77 ttt-nn-nn"""
+        digits = self.phone(n)[1:]
+        return f"{digits[:3]} {digits[3:5]} {digits[5:8]}-{digits[8:10]}-{digits[10:]}"
+
+    def cleanup(self):
+        """Yaratilgan foydalanuvchi va adminlarni o'chirish"""
+        session = self.db.get_session()
+        try:
+            library_ids = [
+                row.library_id for row in
+                session.query(User.library_id).filter(User.phone_number.like(f"{self.phone_prefix}%"))
+            ]
+            if library_ids:
+                session.query(Admin).filter(Admin.library_id.in_(library_ids)).delete(synchronize_session=False)
+            session.query(AdminAudit).filter(
+                AdminAudit.actor_telegram_id == self.telegram_base
+            ).delete(synchronize_session=False)
+            session.query(User).filter(
+                User.phone_number.like(f"{self.phone_prefix}%")
+            ).delete(synchronize_session=False)
+            session.commit()
+        finally:
+            session.close()
@@ -0,0 +1,118 @@
+"""
+Database Views - O'qish uchun yengil, o'zgarmas DTO lar
+Getter'lar ORM obyektlari o'rniga shu NamedTuple larni qaytaradi:
+- identity map / instrumentation yo'q, session dan detach qilish shart emas
+- age, full_name, days_until_expiry, is_subscription_expired bir marta (o'qilgan paytda) hisoblanadi
+
+Maydon nomlari User / Admin modellari bilan bir xil, shuning uchun handler'lar
+`user.full_name`, `user.age` kabi murojaatlarni o'zgartirmasdan ishlatadi.
+"""
+from datetime import datetime
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from ijara_kitoblar.database.models import User, Admin, AdminAudit
+
+
+class UserView(NamedTuple):
+    """Foydalanuvchi (faqat o'qish uchun)"""
+    id: int
+    library_id: str
+    telegram_id: Optional[int]
+    first_name: str
+    last_name: str
+    phone_number: str
+    phone_normalized: Optional[str]
+    birth_year: int
+    study_place: str
+    subscription_plan: str
+    subscription_end_date: Optional[datetime]
+    is_active: bool
+    registered_date: datetime
+    created_at: datetime
+    version: int
+    # O'qilgan paytda hisoblanadi
+    full_name: str
+    age: int
+    days_until_expiry: Optional[int]
+    is_subscription_expired: bool
+
+
+class AdminView(NamedTuple):
+    """Admin (faqat o'qish uchun)"""
+    admin_id: int
+    telegram_id: int
+    library_id: str
+    full_name: str
+    is_super_admin: bool
+    added_date: datetime
+    added_by: Optional[int]
+    is_active: bool
+
+
+class AuditView(NamedTuple):
+    """Admin harakati yozuvi (faqat o'qish uchun)"""
+    id: int
+    created_at: datetime
+    source: str
+    actor_telegram_id: Optional[int]
+    action: str
+    target_library_id: Optional[str]
+    success: bool
+    details: Optional[str]
+
+
+# select() uchun ustunlar - tartibi UserView / AdminView / AuditView maydonlari bilan bir xil
+USER_VIEW_COLUMNS = (
+    User.id, User.library_id, User.telegram_id, User.first_name, User.last_name,
+    User.phone_number, User.phone_normalized, User.birth_year, User.study_place,
+    User.subscription_plan, User.subscription_end_date, User.is_active,
+    User.registered_date, User.created_at, User.version
+)
+
+ADMIN_VIEW_COLUMNS = (
+    Admin.admin_id, Admin.telegram_id, Admin.library_id, Admin.full_name,
+    Admin.is_super_admin, Admin.added_date, Admin.added_by, Admin.is_active
+)
+
+AUDIT_VIEW_COLUMNS = (
+    AdminAudit.id, AdminAudit.created_at, AdminAudit.source, AdminAudit.actor_telegram_id,
+    AdminAudit.action, AdminAudit.target_library_id, AdminAudit.success, AdminAudit.details
+)
+
+
+def user_view(row, now: Optional[datetime] = None) -> UserView:
+    """
+    USER_VIEW_COLUMNS qatoridan UserView yaratish
+
+    Args:
+        row: select(*USER_VIEW_COLUMNS) natijasidagi qator (tuple)
+        now: Hisoblash vaqti (ro'yxatlar uchun bir marta olinadi)
+    """
+    now = now or datetime.now()
+    plan, end_date = row[9], row[10]
+
+    if plan == 'Free' or not end_date:
+        days_until_expiry = None
+        expired = False
+    else:
+        days_until_expiry = max(0, (end_date - now).days)
+        expired = now > end_date
+
+    return UserView(*row, f"{row[3]} {row[4]}", now.year - row[7], days_until_expiry, expired)
+
+
+def user_views(rows: Iterable) -> Iterator[UserView]:
+    """Qatorlardan UserView lar (datetime.now() bir marta)"""
+    now = datetime.now()
+    for row in rows:
+        yield user_view(row, now)
+
+
+def user_view_from_model(user: User) -> UserView:
+    """ORM User obyektidan UserView (masalan, yangi yaratilgan foydalanuvchi uchun)"""
+    return user_view(tuple(getattr(user, column.key) for column in USER_VIEW_COLUMNS))
+
+
+def admin_view(row) -> AdminView:
+    """ADMIN_VIEW_COLUMNS qatoridan AdminView yaratish"""
+    return AdminView(*row)
@@ -11,6 +11,9 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from database.db_manager import DatabaseManager
 from database.admin_manager import AdminManager
+from database.migrations import upgrade_database, current_revision, head_revision
+from database.engine import get_engine
+from ijara_kitoblar.config import DATABASE_URL, DB_TYPE, DATABASE_PATH
 
 
 def init_database():
@@ -20,17 +23,17 @@ def init_database():
     print("=" * 50)
     
     try:
-        # 1. User database yaratish
-        print("\n1️⃣ Users database yaratilmoqda...")
+        # 1. Migratsiyalarni bajarish (users, admins, notifications + index'lar)
+        print("\n1️⃣ Migratsiyalar bajarilmoqda...")
+        upgrade_database()
+        print("   ✅ Jadvallar yaratildi!")
+        
+        # 2. Managerlarni tekshirish
+        print("\n2️⃣ Ulanish tekshirilmoqda...")
         db = DatabaseManager()
-        print("   ✅ Users jadval yaratildi!")
+        db.get_statistics()
         db.close()
-        
-        # 2. Admin database yaratish
-        print("\n2️⃣ Admins database yaratilmoqda...")
-        admin_manager = AdminManager()
-        print("   ✅ Admins jadval yaratildi!")
-        admin_manager.close()
+        print("   ✅ Database tayyor!")
         
         print("\n" + "=" * 50)
         print("✅ DATABASE MUVAFFAQIYATLI YARATILDI!")
@@ -47,14 +50,73 @@ def init_database():
         return False
 
 
+def migrate():
+    """Database sxemasini oxirgi versiyaga yangilash"""
+    print("=" * 50)
+    print("🔄 DATABASE MIGRATION")
+    print("=" * 50)
+    
+    try:
+        engine = get_engine(DATABASE_URL)
+        current = current_revision(engine)
+        head = head_revision()
+        
+        print(f"\n📌 Joriy versiya: {current or 'versiyasiz'}")
+        print(f"🎯 Oxirgi versiya: {head}")
+        
+        if current == head:
+            print("\n✅ Database allaqachon oxirgi versiyada!")
+            return True
+        
+        upgrade_database()
+        
+        print(f"\n✅ Database yangilandi: {current_revision(engine)}")
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ Migratsiya xatosi: {e}")
+        return False
+
+
+def backfill_phones(batch_size: int = 1000):
+    """Eski yozuvlar uchun phone_normalized ni bo'laklab to'ldirish (jadval bloklanmaydi)"""
+    print("=" * 50)
+    print("📞 TELEFON RAQAMLARNI NORMALLASHTIRISH")
+    print("=" * 50)
+    
+    try:
+        db = DatabaseManager()
+        updated, duplicates, invalid = db.backfill_phone_numbers(batch_size)
+        db.close()
+        
+        print(f"\n✅ To'ldirildi: {updated} ta")
+        
+        if duplicates:
+            print(f"\n⚠️  Dublikat raqamlar ({len(duplicates)} ta) - qo'lda birlashtiring:")
+            print("   " + ", ".join(duplicates[:50]) + (" ..." if len(duplicates) > 50 else ""))
+        
+        if invalid:
+            print(f"\n⚠️  Noto'g'ri raqamlar ({len(invalid)} ta) - qo'lda tuzating:")
+            print("   " + ", ".join(invalid[:50]) + (" ..." if len(invalid) > 50 else ""))
+        
+        return True
+    
+    except Exception as e:
+        print(f"\n❌ To'ldirishda xato: {e}")
+        return False
+
+
 def check_database():
     """Database mavjudligini tekshirish"""
-    if os.path.exists('../library.db'):
-        print("\n⚠️  DIQQAT: library.db allaqachon mavjud!")
+    if DB_TYPE == 'sqlite' and os.path.exists(DATABASE_PATH):
+        print(f"\n⚠️  DIQQAT: {DATABASE_PATH} allaqachon mavjud!")
         response = input("Qaytadan yaratishni xohlaysizmi? (y/n): ")
         
         if response.lower() == 'y':
-            os.remove('../library.db')
+            # WAL rejimidagi yordamchi fayllar ham o'chiriladi
+            for path in (DATABASE_PATH, f"{DATABASE_PATH}-wal", f"{DATABASE_PATH}-shm"):
+                if os.path.exists(path):
+                    os.remove(path)
             print("✅ Eski database o'chirildi")
             return True
         else:
@@ -69,10 +131,13 @@ def show_info():
     print("📋 DATABASE MA'LUMOTLARI")
     print("=" * 50)
     
-    if os.path.exists('../library.db'):
-        size = os.path.getsize('../library.db')
-        print(f"\n📁 Fayl: library.db")
-        print(f"📊 Hajm: {size} bytes")
+    print(f"\n🗄️ Database: {DB_TYPE}")
+    
+    if DB_TYPE != 'sqlite' or os.path.exists(DATABASE_PATH):
+        if DB_TYPE == 'sqlite':
+            size = os.path.getsize(DATABASE_PATH)
+            print(f"📁 Fayl: {DATABASE_PATH}")
+            print(f"📊 Hajm: {size} bytes")
         
         # Statistika
         try:
@@ -106,11 +171,18 @@ def main():
         if sys.argv[1] == '--info':
             show_info()
             return
+        elif sys.argv[1] == 'migrate':
+            sys.exit(0 if migrate() else 1)
+        elif sys.argv[1] == 'backfill-phones':
+            batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+            sys.exit(0 if backfill_phones(batch_size) else 1)
         elif sys.argv[1] == '--help':
             print("\n📖 ISHLATISH:")
-            print("  python init_database.py        - Database yaratish")
-            print("  python init_database.py --info - Ma'lumot ko'rish")
-            print("  python init_database.py --help - Yordam")
+            print("  python init_database.py         - Database yaratish")
+            print("  python init_database.py migrate - Sxemani oxirgi versiyaga yangilash")
+            print("  python init_database.py backfill-phones [bo'lak] - phone_normalized ni to'ldirish")
+            print("  python init_database.py --info  - Ma'lumot ko'rish")
+            print("  python init_database.py --help  - Yordam")
             print()
             return
     
@@ -1,18 +1,42 @@
 """
 Main Bot File - Botning asosiy ishga tushirish fayli
+
+Ishlatish:
+    python main.py
+    python main.py --profile-startup   # Import va ishga tushish bosqichlari vaqti
 """
 import asyncio
 import logging
-from aiogram import Bot, Dispatcher
-from aiogram.client.default import DefaultBotProperties
-from aiogram.enums import ParseMode
-from aiogram.fsm.storage.memory import MemoryStorage
+import sys
+
+from bot.utils.profiling import StartupProfiler
+
+# Profil rejimi - har bir bosqich vaqtini o'lchab, oxirida jadval chiqaradi
+profiler = StartupProfiler(enabled='--profile-startup' in sys.argv)
+
+with profiler.phase("import aiogram"):
+    from aiogram import Bot, Dispatcher
+    from aiogram.client.default import DefaultBotProperties
+    from aiogram.enums import ParseMode
+    from aiogram.fsm.storage.memory import MemoryStorage
 
-from ijara_kitoblar.config import BOT_TOKEN, SUPER_ADMIN_ID
-from bot.handlers import registration, subscription, admin
-from bot.utils.notification import send_expiry_warnings, check_expired_subscriptions
-from ijara_kitoblar.database.admin_manager import AdminManager
-from ijara_kitoblar.database.db_manager import DatabaseManager
+with profiler.phase("import config (.env)"):
+    from ijara_kitoblar.config import BOT_TOKEN, SUPER_ADMIN_ID, TELEGRAM_API_URL, DATABASE_URL
+
+# Handlerlar SQLAlchemy, manager'lar va notification modulini baribir import qiladi,
+# shuning uchun ular shu yerda - funksiyalar ichida kechiktirishdan foyda yo'q
+with profiler.phase("import handlers (+SQLAlchemy)"):
+    from bot.handlers import registration, subscription, admin
+    from ijara_kitoblar.database.admin_manager import AdminManager
+    from ijara_kitoblar.database.db_manager import DatabaseManager
+    from ijara_kitoblar.database.engine import get_engine, dispose_engines
+    from ijara_kitoblar.database.migrations import check_schema_version
+
+with profiler.phase("import utils"):
+    from bot.utils.tracing import install_tracing, report_latency
+    from bot.utils.notification import send_expiry_warnings, check_expired_subscriptions, install_retry
+    from bot.utils.audit import audit_queue
+    from bot.utils.metrics import install_metrics, start_metrics_server, stop_metrics_server
 
 # Logging sozlash
 logging.basicConfig(
@@ -22,13 +46,22 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Bot va Dispatcher yaratish
-bot = Bot(
-    token=BOT_TOKEN,
-    default=DefaultBotProperties(parse_mode=ParseMode.HTML)
-)
+with profiler.phase("create bot/dispatcher"):
+    session = None
+    if TELEGRAM_API_URL:
+        # Lokal Bot API server (masalan, load test uchun fake server)
+        from aiogram.client.session.aiohttp import AiohttpSession
+        from aiogram.client.telegram import TelegramAPIServer
+        session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL))
+    
+    bot = Bot(
+        token=BOT_TOKEN,
+        session=session,
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+    )
 
-storage = MemoryStorage()
-dp = Dispatcher(storage=storage)
+    storage = MemoryStorage()
+    dp = Dispatcher(storage=storage)
 
 
 async def init_super_admin():
@@ -40,10 +73,11 @@ async def init_super_admin():
             logger.warning("⚠️ SUPER_ADMIN_ID .env faylda belgilanmagan!")
             return
         
-        admin_manager = AdminManager()
+        # Database chaqiruvlari event loop ni bloklamasligi uchun thread da bajariladi
+        admin_manager = await asyncio.to_thread(AdminManager)
         
         # Super admin borligini tekshirish
-        super_admin = admin_manager.get_super_admin()
+        super_admin = await asyncio.to_thread(admin_manager.get_super_admin)
         
         if super_admin:
             logger.info(f"✅ Super Admin mavjud: {super_admin.full_name} ({super_admin.library_id})")
@@ -56,11 +90,12 @@ async def init_super_admin():
         # Super Admin ning Library ID sini tekshirish
         super_admin_library_id = "ID0000"  # Super Admin uchun maxsus ID
         
-        existing_user = db.get_user_by_library_id(super_admin_library_id)
+        existing_user = await asyncio.to_thread(db.get_user_by_library_id, super_admin_library_id)
         
         if not existing_user:
             # Super Admin userini yaratish
-            user, error = db.create_user(
+            user, error = await asyncio.to_thread(
+                db.create_user,
                 first_name="Abdulaziz",
                 last_name="Abduhakimov",
                 phone_number="+998998832501",
@@ -89,7 +124,8 @@ async def init_super_admin():
             super_admin_info = await bot.get_chat(int(SUPER_ADMIN_ID))
             full_name = super_admin_info.full_name or "Super Admin"
             
-            success, msg = admin_manager.add_super_admin(
+            success, msg = await asyncio.to_thread(
+                admin_manager.add_super_admin,
                 telegram_id=int(SUPER_ADMIN_ID),
                 library_id=super_admin_library_id,
                 full_name=full_name
@@ -120,33 +156,86 @@ async def init_super_admin():
         logger.error(f"❌ Super Admin yaratishda xato: {e}")
 
 
+async def warm_up_database():
+    """Connection pool ochish va sxema versiyasini tekshirish (thread da, faqat startup da)"""
+    with profiler.phase("database warm-up (pool + schema version)"):
+        await asyncio.to_thread(check_schema_version, get_engine(DATABASE_URL))
+
+
+async def bootstrap():
+    """
+    Database warm-up va Super Admin yaratish
+
+    Polling bilan parallel ishlaydi, shuning uchun birinchi update kutib qolmaydi.
+    """
+    try:
+        await warm_up_database()
+        with profiler.phase("super admin bootstrap"):
+            await init_super_admin()
+    except Exception as e:
+        logger.error(f"❌ Bootstrap xatosi: {e}")
+    finally:
+        profiler.mark("bootstrap tugadi")
+
+
+async def mark_first_update(handler, event, data):
+    """Profil rejimida birinchi update kelgan vaqtni belgilash"""
+    if not profiler.has_mark("birinchi update"):
+        profiler.mark("birinchi update")
+        profiler.print_report()
+    return await handler(event, data)
+
+
 async def on_startup():
     """Bot ishga tushganda"""
     logger.info("🚀 Bot ishga tushmoqda...")
     
-    # Super Admin yaratish
-    await init_super_admin()
+    # Super Admin yaratish - polling ni to'xtatmasdan fonda
+    asyncio.create_task(bootstrap())
     
     logger.info("✅ Bot muvaffaqiyatli ishga tushdi!")
     
     # Background tasklar - bildirishnomalar
     asyncio.create_task(send_expiry_warnings(bot))
     asyncio.create_task(check_expired_subscriptions(bot))
+    asyncio.create_task(report_latency())
+    
+    # Admin harakatlari jurnali (bo'laklab yozish)
+    audit_queue.start()
+    
+    # Prometheus /metrics endpoint
+    await start_metrics_server()
+    
+    profiler.mark("polling boshlandi")
 
 
 async def on_shutdown():
     """Bot to'xtaganda"""
     logger.info("⏹️ Bot to'xtatilmoqda...")
+    await stop_metrics_server()
+    await audit_queue.stop()
     await bot.session.close()
+    dispose_engines()
     logger.info("✅ Bot to'xtatildi!")
 
 
 async def main():
     """Asosiy funksiya"""
-    # Handlerlarni ro'yxatdan o'tkazish
-    dp.include_router(registration.router)
-    dp.include_router(subscription.router)
-    dp.include_router(admin.router)
+    with profiler.phase("register routers"):
+        # Handlerlarni ro'yxatdan o'tkazish
+        dp.include_router(registration.router)
+        dp.include_router(subscription.router)
+        dp.include_router(admin.router)
+        
+        # Handler latency tracing (update -> handler -> DB -> Telegram API)
+        # Session middleware tartibi: tracing (kutishlar bilan jami vaqt) -> 429 da
+        # qayta yuborish -> metrics (har bir 429 alohida hisoblanadi)
+        install_tracing(dp, bot)
+        install_retry(bot)
+        install_metrics(bot)
+        
+        if profiler.enabled:
+            dp.update.outer_middleware(mark_first_update)
     
     # Startup va shutdown eventlari
     dp.startup.register(on_startup)
@@ -160,6 +249,7 @@ async def main():
         logger.error(f"❌ Botda xato: {e}")
     finally:
         await bot.session.close()
+        profiler.print_report()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,78 @@
+"""
+Alembic Environment - database/models.py dagi modellar bilan bog'langan
+Database URL config.py (.env) dan yoki get_alembic_config() orqali olinadi
+"""
+import os
+import sys
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+# ijara_kitoblar package import qilinishi uchun
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from ijara_kitoblar.config import DATABASE_URL
+from ijara_kitoblar.database.models import Base
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get('configure_logger', True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def get_url() -> str:
+    """Database URL (alembic.ini da berilmagan bo'lsa config.py dan)"""
+    return config.get_main_option('sqlalchemy.url') or DATABASE_URL
+
+
+def run_migrations_offline():
+    """SQL skript ko'rinishida migratsiya (--sql)"""
+    context.configure(
+        url=get_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={'paramstyle': 'named'}
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations(connection):
+    """Berilgan connection orqali migratsiyalarni bajarish"""
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        compare_type=True,
+        # SQLite ALTER TABLE cheklangan - jadval nusxalash orqali o'zgartiriladi
+        render_as_batch=connection.dialect.name == 'sqlite'
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """Database ga ulanib migratsiya qilish"""
+    # upgrade_database() umumiy engine connection'ini beradi (xotiradagi SQLite uchun shart)
+    connection = config.attributes.get('connection')
+    if connection is not None:
+        run_migrations(connection)
+        return
+
+    connectable = create_engine(get_url(), poolclass=NullPool)
+
+    with connectable.connect() as connection:
+        run_migrations(connection)
+
+    connectable.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,74 @@
+"""Boshlang'ich sxema: users, admins, notifications
+
+create_all bilan yaratilgan mavjud database lar shu revision bilan belgilanadi
+(init_database.py migrate buni avtomatik bajaradi).
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-10-20
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('library_id', sa.String(length=10), nullable=False),
+        sa.Column('telegram_id', sa.BigInteger(), nullable=True),
+        sa.Column('first_name', sa.String(length=100), nullable=False),
+        sa.Column('last_name', sa.String(length=100), nullable=False),
+        sa.Column('phone_number', sa.String(length=20), nullable=False),
+        sa.Column('birth_year', sa.Integer(), nullable=False),
+        sa.Column('study_place', sa.String(length=200), nullable=False),
+        sa.Column('subscription_plan', sa.String(length=20), nullable=False),
+        sa.Column('subscription_end_date', sa.DateTime(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('registered_date', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('last_warning_sent', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_users_library_id', 'users', ['library_id'], unique=True)
+    op.create_index('ix_users_telegram_id', 'users', ['telegram_id'], unique=True)
+    op.create_index('ix_users_phone_number', 'users', ['phone_number'])
+
+    op.create_table(
+        'admins',
+        sa.Column('admin_id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('telegram_id', sa.BigInteger(), nullable=False),
+        sa.Column('library_id', sa.String(length=10), nullable=False),
+        sa.Column('full_name', sa.String(length=200), nullable=False),
+        sa.Column('is_super_admin', sa.Boolean(), nullable=False),
+        sa.Column('added_date', sa.DateTime(), nullable=False),
+        sa.Column('added_by', sa.BigInteger(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+    )
+    op.create_index('ix_admins_telegram_id', 'admins', ['telegram_id'], unique=True)
+    op.create_index('ix_admins_library_id', 'admins', ['library_id'], unique=True)
+
+    op.create_table(
+        'notifications',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('library_id', sa.String(length=10), nullable=False),
+        sa.Column('telegram_id', sa.BigInteger(), nullable=True),
+        sa.Column('notification_type', sa.String(length=50), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('sent_date', sa.DateTime(), nullable=False),
+        sa.Column('is_read', sa.Boolean(), nullable=False),
+    )
+    op.create_index('ix_notifications_library_id', 'notifications', ['library_id'])
+    op.create_index('ix_notifications_telegram_id', 'notifications', ['telegram_id'])
+
+
+def downgrade():
+    op.drop_table('notifications')
+    op.drop_table('admins')
+    op.drop_table('users')
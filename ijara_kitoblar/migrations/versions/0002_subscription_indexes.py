@@ -0,0 +1,36 @@
+"""Obuna va bildirishnoma so'rovlari uchun index'lar
+
+Index'lar PostgreSQL da CREATE INDEX CONCURRENTLY bilan yaratiladi - jadval
+yozish uchun bloklanmaydi. CONCURRENTLY tranzaksiya ichida ishlamaydi,
+shuning uchun autocommit_block ishlatiladi.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-10-20
+"""
+from alembic import op
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('idx_users_subscription_plan', 'users', ['subscription_plan']),
+    ('idx_users_is_active', 'users', ['is_active']),
+    ('idx_users_subscription_end', 'users', ['subscription_end_date']),
+    ('idx_notifications_sent_date', 'notifications', ['sent_date']),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
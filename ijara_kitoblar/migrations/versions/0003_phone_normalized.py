@@ -0,0 +1,56 @@
+"""users.phone_normalized ustuni va UNIQUE index
+
+Ustun NULL bilan qo'shiladi - PostgreSQL da jadval qayta yozilmaydi (faqat katalog
+o'zgaradi). Mavjud yozuvlar shu migratsiya ichida, index dan oldin to'ldiriladi
+(AUTOCOMMIT, id bo'yicha keyset bo'laklar - jadval bloklanmaydi): create_user faqat
+phone_normalized bo'yicha tekshiradi, shuning uchun to'ldirilmagan eski yozuv bilan
+bir xil raqamli yangi ro'yxatdan o'tish oynasi qolmaydi. UNIQUE index CONCURRENTLY
+bilan yaratiladi, NULL qiymatlar (dublikat / noto'g'ri raqamlar) to'qnashmaydi.
+Ular qo'lda tuzatilgandan keyin:
+
+    python init_database.py backfill-phones
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-10-27
+"""
+import logging
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from ijara_kitoblar.database.phone import backfill_phone_normalized
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade():
+    op.add_column('users', sa.Column('phone_normalized', sa.String(length=16), nullable=True))
+
+    with op.get_context().autocommit_block():
+        # --sql (offline) rejimida ma'lumot yo'q - faqat DDL
+        if not context.is_offline_mode():
+            updated, duplicates, invalid = backfill_phone_normalized(
+                op.get_bind(), BACKFILL_BATCH_SIZE, commit=False)
+            logger.info(f"phone_normalized to'ldirildi: {updated} ta, dublikat: {len(duplicates)} ta, "
+                        f"noto'g'ri: {len(invalid)} ta")
+
+        op.create_index('uq_users_phone_normalized', 'users', ['phone_normalized'], unique=True,
+                        if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_users_phone_normalized', table_name='users', if_exists=True,
+                      postgresql_concurrently=True)
+
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('phone_normalized')
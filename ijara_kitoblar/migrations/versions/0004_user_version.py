@@ -0,0 +1,28 @@
+"""users.version ustuni (optimistic locking)
+
+update_subscription, link_telegram_account, activate_user va deactivate_user
+bitta UPDATE ... WHERE version = :expected RETURNING bilan ishlaydi.
+
+Doimiy DEFAULT bilan ustun qo'shish PostgreSQL 11+ da jadvalni qayta yozmaydi.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-10-28
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,47 @@
+"""admin_audit jadvali (admin harakatlari jurnali)
+
+Jadval yangi va bo'sh, shuning uchun index'lar oddiy CREATE INDEX bilan
+shu tranzaksiyada yaratiladi (CONCURRENTLY shart emas).
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-10-29
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('idx_admin_audit_created_at', ['created_at']),
+    ('idx_admin_audit_actor_created', ['actor_telegram_id', 'created_at']),
+    ('idx_admin_audit_target_created', ['target_library_id', 'created_at']),
+]
+
+
+def upgrade():
+    op.create_table(
+        'admin_audit',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('source', sa.String(length=20), nullable=False),
+        sa.Column('actor_telegram_id', sa.BigInteger(), nullable=True),
+        sa.Column('action', sa.String(length=50), nullable=False),
+        sa.Column('target_library_id', sa.String(length=10), nullable=True),
+        sa.Column('success', sa.Boolean(), nullable=False),
+        sa.Column('details', sa.Text(), nullable=True),
+    )
+
+    for name, columns in INDEXES:
+        op.create_index(name, 'admin_audit', columns)
+
+
+def downgrade():
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name='admin_audit')
+
+    op.drop_table('admin_audit')
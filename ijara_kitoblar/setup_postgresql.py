@@ -13,8 +13,7 @@ from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from ijara_kitoblar.config import POSTGRES_HOST, POSTGRES_PORT, POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD
-from database.models import Base
-from sqlalchemy import create_engine
+from database.migrations import upgrade_database
 
 
 def check_postgres_connection():
@@ -74,13 +73,9 @@ def create_database():
 
 
 def create_tables():
-    """Jadvallarni yaratish (SQLAlchemy orqali)"""
+    """Jadvallarni yaratish (Alembic migratsiyalari orqali)"""
     try:
-        from ijara_kitoblar.config import DATABASE_URL
-
-        engine = create_engine(DATABASE_URL, echo=False)
-        Base.metadata.create_all(engine)
-        engine.dispose()
+        upgrade_database()
 
         print("✅ Barcha jadvallar yaratildi")
         return True, None
@@ -6,7 +6,7 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime
+from datetime import datetime, time, timedelta
 import sys
 import os
 
@@ -14,7 +14,13 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.db_manager import DatabaseManager
 from database.admin_manager import AdminManager
-from ijara_kitoblar.config import SUBSCRIPTION_PLANS
+from database.audit_manager import AuditManager, AUDIT_ACTIONS, MAX_AUDIT_ROWS
+from database.migrations import check_schema_version
+from ijara_kitoblar.config import SUBSCRIPTION_PLANS, DB_TYPE, DATABASE_PATH
+from ijara_kitoblar.dashboard_data import (
+    count_new_users, plan_share, age_group_counts, expiring_user_rows,
+    user_table_rows, export_users_csv, write_export_file, audit_rows
+)
 
 # Sahifa konfiguratsiyasi
 st.set_page_config(
@@ -131,7 +137,7 @@ with st.sidebar:
     page = st.radio(
         "📋 Bo'limlar",
         ["🏠 Dashboard", "👥 Foydalanuvchilar", "👨‍💼 Adminlar",
-         "➕ Yangi Foydalanuvchi", "⚙️ Sozlamalar"]
+         "➕ Yangi Foydalanuvchi", "📜 Audit jurnali", "⚙️ Sozlamalar"]
     )
 
     st.markdown("---")
@@ -145,6 +151,12 @@ with st.sidebar:
 
 db = DatabaseManager()
 admin_manager = AdminManager()
+audit_manager = AuditManager()
+
+# Sxema versiyasi (jarayon bo'yicha bir marta tekshiriladi)
+if not check_schema_version(db.engine):
+    st.error("❌ Database sxemasi eskirgan! Yangilash: `python init_database.py migrate`")
+    st.stop()
 
 # ========================================
 # DASHBOARD (Asosiy sahifa)
@@ -165,28 +177,28 @@ if page == "🏠 Dashboard":
         st.metric(
             label="👥 Jami Foydalanuvchilar",
             value=stats['total_users'],
-            delta=f"+{len([u for u in all_users if (datetime.now() - u.created_at).days < 7])} (7 kun)"
+            delta=f"+{count_new_users(all_users)} (7 kun)"
         )
 
     with col2:
         st.metric(
             label="📗 Free",
             value=stats['free_users'],
-            delta=f"{round(stats['free_users'] / stats['total_users'] * 100 if stats['total_users'] > 0 else 0)}%"
+            delta=f"{plan_share(stats, 'free_users')}%"
         )
 
     with col3:
         st.metric(
             label="📘 Money",
             value=stats['money_users'],
-            delta=f"{round(stats['money_users'] / stats['total_users'] * 100 if stats['total_users'] > 0 else 0)}%"
+            delta=f"{plan_share(stats, 'money_users')}%"
         )
 
     with col4:
         st.metric(
             label="📕 Premium",
             value=stats['premium_users'],
-            delta=f"{round(stats['premium_users'] / stats['total_users'] * 100 if stats['total_users'] > 0 else 0)}%"
+            delta=f"{plan_share(stats, 'premium_users')}%"
         )
 
     with col5:
@@ -243,13 +255,7 @@ if page == "🏠 Dashboard":
     # Yosh guruhlari
     if all_users:
         st.subheader("📊 Yosh Guruhlari Taqsimoti")
-        ages = [user.age for user in all_users]
-        age_groups = pd.cut(ages, bins=[0, 18, 25, 35, 50, 100],
-                            labels=['0-18', '19-25', '26-35', '36-50', '50+'])
-        age_df = pd.DataFrame({
-            'Yosh guruhi': age_groups.value_counts().index,
-            'Soni': age_groups.value_counts().values
-        })
+        age_df = pd.DataFrame(age_group_counts(all_users))
 
         fig_age = px.bar(
             age_df,
@@ -270,19 +276,7 @@ if page == "🏠 Dashboard":
     warning_users = db.get_users_expiring_soon(warning_days=3)
 
     if warning_users:
-        warning_data = []
-        for user in warning_users:
-            days_left = (user.subscription_end_date - datetime.now()).days
-            warning_data.append({
-                "🆔 Library ID": user.library_id,
-                "👤 Ism": user.full_name,
-                "📞 Telefon": user.phone_number,
-                "📋 Tarif": user.subscription_plan,
-                "⏰ Qolgan kunlar": days_left,
-                "📅 Tugash sanasi": user.subscription_end_date.strftime("%d.%m.%Y"),
-                "📱 Telegram": "✅" if user.telegram_id else "❌"
-            })
-
+        warning_data = expiring_user_rows(warning_users)
         warning_df = pd.DataFrame(warning_data)
         st.dataframe(
             warning_df,
@@ -300,9 +294,9 @@ if page == "🏠 Dashboard":
 elif page == "👥 Foydalanuvchilar":
     st.header("👥 Foydalanuvchilar Ro'yxati")
 
-    all_users = db.get_all_users()
-
-    if all_users:
+    # Jadval sahifalab ko'rsatiladi, eksportlar database dan faylga oqim bilan yoziladi -
+    # hech qayerda barcha foydalanuvchilar xotiraga yuklanmaydi
+    if db.count_users(db.user_search_filters()):
         # Filtrlar
         col1, col2, col3, col4 = st.columns(4)
 
@@ -324,85 +318,69 @@ elif page == "👥 Foydalanuvchilar":
                 ["Barchasi", "Bog'langan", "Bog'lanmagan"]
             )
 
-        # Ma'lumotlarni DataFrame ga aylantirish
-        users_data = []
-        for user in all_users:
-            status = "✅" if user.is_active else "❌"
-            telegram_status = "✅" if user.telegram_id else "❌"
-            days_left = ""
-
-            if user.subscription_end_date and user.subscription_plan != 'Free':
-                days = (user.subscription_end_date - datetime.now()).days
-                days_left = f"{days} kun" if days > 0 else "⚠️ Tugagan"
-
-            users_data.append({
-                "Status": status,
-                "Library ID": user.library_id,
-                "Ism": user.first_name,
-                "Familiya": user.last_name,
-                "Yosh": user.age,
-                "Telefon": user.phone_number,
-                "O'quv joyi": user.study_place,
-                "Tarif": user.subscription_plan,
-                "Qolgan muddat": days_left if days_left else "Cheksiz",
-                "Telegram": telegram_status,
-                "Ro'yxatdan o'tgan": user.created_at.strftime("%d.%m.%Y")
-            })
+        # Filtrlash database da
+        filters = db.user_search_filters(search_id, search_name, filter_plan, filter_telegram)
+        total = db.count_users(filters)
 
-        df = pd.DataFrame(users_data)
+        # Sahifalash
+        col1, col2 = st.columns(2)
 
-        # Filtrlash
-        if search_id:
-            df = df[df['Library ID'].str.contains(search_id, case=False, na=False)]
+        with col1:
+            page_size = st.selectbox("📄 Sahifadagi qatorlar", [50, 100, 200, 500], index=1)
 
-        if search_name:
-            df = df[
-                df['Ism'].str.contains(search_name, case=False, na=False) |
-                df['Familiya'].str.contains(search_name, case=False, na=False)
-                ]
+        with col2:
+            page_count = max(1, -(-total // page_size))
+            page_number = st.number_input("Sahifa", min_value=1, max_value=page_count, value=1, step=1)
 
-        if filter_plan != "Barchasi":
-            df = df[df['Tarif'] == filter_plan]
+        page_users = db.get_users_page(filters, int(page_number), page_size)
 
-        if filter_telegram == "Bog'langan":
-            df = df[df['Telegram'] == "✅"]
-        elif filter_telegram == "Bog'lanmagan":
-            df = df[df['Telegram'] == "❌"]
+        # Admin ko'rgan versiyalar - tugma bosilganda sahifa qayta yuklanadi,
+        # shuning uchun oldingi render dagi qiymatlar ishlatiladi (optimistic locking)
+        seen_versions = st.session_state.get('user_versions', {})
+        st.session_state['user_versions'] = {u.library_id: u.version for u in page_users}
 
         # Natijalar soni
-        st.info(f"📊 Jami: {len(df)} ta foydalanuvchi")
+        st.info(f"📊 Jami: {total} ta foydalanuvchi (sahifa {int(page_number)}/{page_count})")
 
         # Jadvalni ko'rsatish
         st.dataframe(
-            df,
+            pd.DataFrame(user_table_rows(page_users)),
             use_container_width=True,
             height=500,
             hide_index=True
         )
 
-        # Export tugmalari
-        col1, col2, col3 = st.columns(3)
-
-        with col1:
-            csv = df.to_csv(index=False).encode('utf-8-sig')
-            st.download_button(
-                label="📥 CSV yuklab olish",
-                data=csv,
-                file_name=f"kutubxona_users_{datetime.now().strftime('%Y%m%d')}.csv",
-                mime="text/csv",
-                use_container_width=True
-            )
+        # Export tugmalari - faqat so'ralganda, vaqtinchalik faylga yoziladi
+        # (session_state da fayl yo'li saqlanadi, tarkibi emas)
+        exports = st.session_state.setdefault('exports', {})
+        today = datetime.now().strftime('%Y%m%d')
+        export_options = [
+            ("csv", "📥 CSV", ",", filters, ".csv", f"kutubxona_users_{today}.csv", "text/csv"),
+            ("excel", "📊 Excel", "\t", filters, ".xls", f"kutubxona_users_{today}.xls",
+             "application/vnd.ms-excel"),
+            # Barcha foydalanuvchilar (nofaollar ham)
+            ("full", "📦 To'liq CSV", ",", None, ".csv", f"kutubxona_users_full_{today}.csv", "text/csv"),
+        ]
+
+        for column, (key, label, sep, export_filters, suffix, file_name, mime) in zip(
+                st.columns(len(export_options)), export_options):
+            with column:
+                if st.button(f"{label} tayyorlash", key=f"prepare_{key}", use_container_width=True):
+                    exports[key] = write_export_file(
+                        export_users_csv(db, sep=sep, filters=export_filters),
+                        suffix=suffix, previous=exports.get(key)
+                    )
 
-        with col2:
-            # Excel format
-            excel_data = df.to_csv(index=False, sep='\t').encode('utf-8-sig')
-            st.download_button(
-                label="📊 Excel yuklab olish",
-                data=excel_data,
-                file_name=f"kutubxona_users_{datetime.now().strftime('%Y%m%d')}.xls",
-                mime="application/vnd.ms-excel",
-                use_container_width=True
-            )
+                if exports.get(key) and os.path.exists(exports[key]):
+                    with open(exports[key], 'rb') as export_file:
+                        st.download_button(
+                            label=f"{label} yuklab olish",
+                            data=export_file,
+                            file_name=file_name,
+                            mime=mime,
+                            key=f"download_{key}",
+                            use_container_width=True
+                        )
 
         st.markdown("---")
 
@@ -413,12 +391,7 @@ elif page == "👥 Foydalanuvchilar":
             col1, col2, col3 = st.columns(3)
 
             with col1:
-                user_id_to_update = st.selectbox(
-                    "Foydalanuvchi",
-                    options=[""] + [u.library_id for u in all_users],
-                    format_func=lambda
-                        x: x if x == "" else f"{x} - {next((u.full_name for u in all_users if u.library_id == x), '')}"
-                )
+                user_id_to_update = st.text_input("Library ID", placeholder="ID0001").strip().upper()
 
             with col2:
                 new_plan = st.selectbox("Yangi tarif", ["Free", "Money", "Premium"])
@@ -432,7 +405,18 @@ elif page == "👥 Foydalanuvchilar":
                 user = db.get_user_by_library_id(user_id_to_update)
 
                 if user:
-                    success, msg = db.update_subscription(user_id_to_update, new_plan)
+                    # Oraliqda bot orqali o'zgargan bo'lsa rad etiladi
+                    success, msg = db.update_subscription(
+                        user_id_to_update, new_plan,
+                        expected_version=seen_versions.get(user_id_to_update, user.version)
+                    )
+
+                    audit_manager.record(
+                        'approve', target_library_id=user_id_to_update,
+                        details={'plan': new_plan, 'old_plan': user.subscription_plan}
+                        if success else {'plan': new_plan, 'error': msg},
+                        success=success
+                    )
 
                     if success:
                         st.success(
@@ -521,24 +505,23 @@ elif page == "➕ Yangi Foydalanuvchi":
             elif len(first_name) < 2 or len(last_name) < 2:
                 st.error("❌ Ism va familiya kamida 2 ta harfdan iborat bo'lishi kerak!")
             else:
-                # Telefon raqamni formatlash
-                phone = phone_number.strip()
-                if not phone.startswith('+'):
-                    if phone.startswith('998'):
-                        phone = '+' + phone
-                    else:
-                        phone = '+998' + phone.lstrip('0')
-
-                # Foydalanuvchini yaratish
+                # Foydalanuvchini yaratish (telefon raqam create_user da normallashtiriladi)
                 user, error = db.create_user(
                     first_name=first_name.strip(),
                     last_name=last_name.strip(),
-                    phone_number=phone,
+                    phone_number=phone_number,
                     birth_year=birth_year,
                     study_place=study_place.strip(),
                     telegram_id=None  # Dashboard dan qo'shilgan
                 )
 
+                audit_manager.record(
+                    'add_user', target_library_id=user.library_id if user else None,
+                    details={'phone': phone_number, 'plan': initial_plan}
+                    if user else {'phone': phone_number, 'error': error},
+                    success=user is not None
+                )
+
                 if error:
                     st.error(f"❌ Xatolik: {error}")
                 else:
@@ -556,6 +539,75 @@ elif page == "➕ Yangi Foydalanuvchi":
                     st.balloons()
 
 
+# ========================================
+# AUDIT JURNALI
+# ========================================
+
+elif page == "📜 Audit jurnali":
+    st.header("📜 Admin Harakatlari Jurnali")
+
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        today = datetime.now().date()
+        date_range = st.date_input("📅 Sana oralig'i", value=(today - timedelta(days=7), today))
+
+    with col2:
+        audit_action = st.selectbox(
+            "Harakat", ["Barchasi"] + list(AUDIT_ACTIONS),
+            format_func=lambda x: AUDIT_ACTIONS.get(x, x)
+        )
+
+    with col3:
+        audit_target = st.text_input("📚 Library ID", placeholder="ID0001")
+
+    with col4:
+        audit_actor = st.text_input("👨‍💼 Admin Telegram ID", placeholder="123456789")
+
+    # Sana tanlanayotganda faqat bitta qiymat bo'lishi mumkin
+    if isinstance(date_range, (list, tuple)):
+        if not date_range:
+            st.stop()
+        start_date, end_date = date_range[0], date_range[-1]
+    else:
+        start_date = end_date = date_range
+
+    # Oraliq: [start 00:00, end + 1 kun 00:00) - created_at index bo'yicha
+    audit_start = datetime.combine(start_date, time.min)
+    audit_end = datetime.combine(end_date + timedelta(days=1), time.min)
+
+    if audit_actor and not audit_actor.strip().isdigit():
+        st.error("❌ Telegram ID faqat raqamlardan iborat bo'lishi kerak!")
+        st.stop()
+
+    counts = audit_manager.count_by_action(audit_start, audit_end)
+    metric_columns = st.columns(len(AUDIT_ACTIONS))
+    for column, (action, label) in zip(metric_columns, AUDIT_ACTIONS.items()):
+        column.metric(label, counts.get(action, 0))
+
+    entries = audit_manager.get_entries(
+        audit_start, audit_end,
+        action=None if audit_action == "Barchasi" else audit_action,
+        actor_telegram_id=int(audit_actor) if audit_actor.strip() else None,
+        target_library_id=audit_target.strip().upper() or None,
+        limit=MAX_AUDIT_ROWS
+    )
+
+    if entries:
+        admin_names = {admin.telegram_id: admin.full_name for admin in admin_manager.get_all_admins()}
+        st.dataframe(
+            pd.DataFrame(audit_rows(entries, admin_names, AUDIT_ACTIONS)),
+            use_container_width=True, hide_index=True
+        )
+
+        if len(entries) >= MAX_AUDIT_ROWS:
+            st.info(f"💡 Eng yangi {MAX_AUDIT_ROWS} ta yozuv ko'rsatildi - oraliqni toraytiring")
+        else:
+            st.info(f"📊 Jami: {len(entries)} ta yozuv")
+    else:
+        st.info("📂 Bu oraliqda yozuvlar yo'q")
+
+
 # ========================================
 # SOZLAMALAR
 # ========================================
@@ -577,24 +629,34 @@ elif page == "⚙️ Sozlamalar":
 
     with tab2:
         st.subheader("🔐 Xavfsizlik")
-        st.info("🔒 Database: SQLite (Local)")
-        st.info("📁 Database fayl: library.db")
-
-        if st.button("💾 Database Backup yaratish"):
-            import shutil
-
-            backup_name = f"backup_library_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-            try:
-                shutil.copy('library.db', backup_name)
-                st.success(f"✅ Backup yaratildi: {backup_name}")
-            except Exception as e:
-                st.error(f"❌ Xato: {e}")
+        if DB_TYPE == 'sqlite':
+            st.info("🔒 Database: SQLite (Local, WAL)")
+            st.info(f"📁 Database fayl: {DATABASE_PATH}")
+
+            if st.button("💾 Database Backup yaratish"):
+                import sqlite3
+
+                backup_name = f"backup_library_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+                try:
+                    # WAL rejimida faylni nusxalash -wal dagi o'zgarishlarni yo'qotadi
+                    source = sqlite3.connect(DATABASE_PATH)
+                    target = sqlite3.connect(backup_name)
+                    with target:
+                        source.backup(target)
+                    target.close()
+                    source.close()
+                    st.success(f"✅ Backup yaratildi: {backup_name}")
+                except Exception as e:
+                    st.error(f"❌ Xato: {e}")
+        else:
+            st.info("🔒 Database: PostgreSQL")
+            st.info("💾 Backup: pg_dump orqali")
 
     with tab3:
         st.subheader("ℹ️ Tizim Ma'lumotlari")
         st.write("**Versiya:** 2.0.0")
         st.write("**Yangilanish sanasi:** 2025-10-14")
-        st.write("**Database:** SQLite")
+        st.write(f"**Database:** {'SQLite' if DB_TYPE == 'sqlite' else 'PostgreSQL'}")
         st.write("**Bot Framework:** Aiogram 3.13.1")
         st.write("**Dashboard:** Streamlit")
 
@@ -604,6 +666,7 @@ elif page == "⚙️ Sozlamalar":
 
 db.close()
 admin_manager.close()
+audit_manager.close()
 
 # ========================================
 # FOOTER
@@ -0,0 +1,77 @@
+"""
+parse_approval_lines - ommaviy /approve qatorlari (xabar va CSV fayl)
+"""
+from bot.handlers.admin import parse_approval_lines
+
+
+def test_valid_lines():
+    entries, errors = parse_approval_lines(
+        "/approve ID0001 Money\n"
+        "id0002 premium 60\n"
+        "ID0003 Free"
+    )
+    assert errors == []
+    assert entries == [
+        ("ID0001", 'Money', 30),
+        ("ID0002", 'Premium', 60),
+        ("ID0003", 'Free', None)
+    ]
+
+
+def test_bad_plan():
+    entries, errors = parse_approval_lines("ID0001 Gold\nID0002 Money")
+    assert entries == [("ID0002", 'Money', 30)]
+    assert errors == ["1-qator: noto'g'ri tarif 'Gold'"]
+
+
+def test_bad_library_id():
+    entries, errors = parse_approval_lines("0001 Money\nUSER1 Premium\nID12 Money")
+    assert entries == []
+    assert [error.split(":")[0] for error in errors] == ["1-qator", "2-qator", "3-qator"]
+    assert all("Library ID" in error for error in errors)
+
+
+def test_bad_days_and_format():
+    entries, errors = parse_approval_lines("ID0001 Money 0\nID0002 Money abc\nID0003\nID0004 Money 30 x")
+    assert entries == []
+    assert errors == [
+        "1-qator: noto'g'ri kunlar soni '0'",
+        "2-qator: noto'g'ri kunlar soni 'abc'",
+        "3-qator: noto'g'ri format",
+        "4-qator: noto'g'ri format"
+    ]
+
+
+def test_blank_and_comment_lines():
+    entries, errors = parse_approval_lines(
+        "\n"
+        "   \n"
+        "# yanvar to'lovlari\n"
+        "  # ID0009 Money\n"
+        "ID0001 Money\n"
+        "/approve\n"
+    )
+    assert errors == []
+    assert entries == [("ID0001", 'Money', 30)]
+
+
+def test_csv_input():
+    entries, errors = parse_approval_lines(
+        "library_id,plan,days\r\n"
+        "ID0001,Money,30\r\n"
+        "ID0002;Premium;90\r\n"
+        "ID0003, free\r\n"
+    )
+    assert errors == []
+    assert entries == [
+        ("ID0001", 'Money', 30),
+        ("ID0002", 'Premium', 90),
+        ("ID0003", 'Free', None)
+    ]
+
+
+def test_duplicates_kept_in_order():
+    # Oxirgisi hisobga olinadi - bulk_update_subscriptions da
+    entries, errors = parse_approval_lines("ID0001 Money\nID0001 Premium 60")
+    assert errors == []
+    assert entries == [("ID0001", 'Money', 30), ("ID0001", 'Premium', 60)]
@@ -0,0 +1,133 @@
+"""
+AuditQueue - bo'laklab yozish: hajm va vaqt chegarasi, to'xtashda qolganlar, to'la navbat
+"""
+import asyncio
+import time
+
+from bot.utils.audit import AuditQueue
+
+
+class RecordingWriter:
+    """write_batch o'rniga - bo'laklar va ularning vaqtini eslab qoladi"""
+
+    def __init__(self):
+        self.batches = []
+        self.started = time.monotonic()
+
+    def __call__(self, batch):
+        self.batches.append(([record['action'] for record in batch], time.monotonic() - self.started))
+        return len(batch)
+
+    @property
+    def sizes(self):
+        return [len(actions) for actions, _ in self.batches]
+
+
+def record_many(queue: AuditQueue, count: int, prefix: str = 'approve'):
+    for i in range(count):
+        queue.record(f"{prefix}_{i}", 1, f"ID{i:04d}")
+
+
+def test_flush_at_batch_size():
+    async def scenario():
+        writer = RecordingWriter()
+        queue = AuditQueue(writer, flush_interval_ms=10_000, batch_size=3, max_size=100)
+        queue.start()
+        record_many(queue, 7)
+        await asyncio.sleep(0.2)
+
+        # To'lgan bo'laklar interval tugashini kutmaydi, oxirgi yozuv kutib turadi
+        assert writer.sizes == [3, 3]
+        assert queue.written == 6 and queue.depth == 0
+
+        await queue.stop()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert writer.sizes == [3, 3, 1]
+    assert [actions for actions, _ in writer.batches][0] == ['approve_0', 'approve_1', 'approve_2']
+
+
+def test_flush_at_interval():
+    async def scenario():
+        writer = RecordingWriter()
+        queue = AuditQueue(writer, flush_interval_ms=100, batch_size=100, max_size=100)
+        queue.start()
+        record_many(queue, 3)
+
+        await asyncio.sleep(0.03)
+        assert writer.batches == []
+
+        await asyncio.sleep(0.3)
+        assert writer.sizes == [3]
+        assert 0.08 <= writer.batches[0][1] < 0.3
+
+        await queue.stop()
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert queue.written == 3 and queue.failed == 0
+
+
+def test_stop_flushes_pending():
+    async def scenario():
+        writer = RecordingWriter()
+        queue = AuditQueue(writer, flush_interval_ms=10_000, batch_size=100, max_size=100)
+        queue.start()
+        record_many(queue, 5)
+        await asyncio.sleep(0)
+
+        started = time.monotonic()
+        await queue.stop()
+        # Interval (10 s) kutilmaydi
+        assert time.monotonic() - started < 1
+        return writer, queue
+
+    writer, queue = asyncio.run(scenario())
+    assert writer.sizes == [5]
+    assert queue.written == 5 and queue.depth == 0
+
+
+def test_full_queue_drops_without_blocking():
+    async def scenario():
+        writer = RecordingWriter()
+        # Yozuvchi task ishga tushmagan - navbat bo'shamaydi
+        queue = AuditQueue(writer, flush_interval_ms=10, batch_size=10, max_size=5)
+
+        started = time.monotonic()
+        record_many(queue, 1000)
+        elapsed = time.monotonic() - started
+
+        assert queue.depth == 5
+        assert queue.dropped == 995
+        assert elapsed < 1
+
+        # Ishga tushganda navbatdagilar yoziladi
+        queue.start()
+        await queue.stop()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert writer.sizes == [5]
+
+
+def test_writer_error_does_not_stop_queue():
+    calls = []
+
+    def flaky_writer(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise RuntimeError("database yo'q")
+        return len(batch)
+
+    async def scenario():
+        queue = AuditQueue(flaky_writer, flush_interval_ms=10_000, batch_size=2, max_size=100)
+        queue.start()
+        record_many(queue, 4)
+        await asyncio.sleep(0.2)
+        await queue.stop()
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert calls == [2, 2]
+    assert queue.failed == 2 and queue.written == 2
@@ -0,0 +1,195 @@
+"""
+DatabaseManager, AdminManager va AuditManager - SQLite va PostgreSQL da bir xil xatti-harakat
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from ijara_kitoblar.database.audit_manager import audit_record
+from ijara_kitoblar.database.models import User
+
+
+def set_end_date(run, library_id, end_date):
+    session = run.db.get_session()
+    try:
+        session.query(User).filter_by(library_id=library_id).update({'subscription_end_date': end_date})
+        session.commit()
+    finally:
+        session.close()
+
+
+def test_create_user(user):
+    assert user.library_id.startswith("ID")
+    assert user.subscription_plan == 'Free'
+
+
+def test_create_user_duplicate_phone(run, user):
+    created, error = run.db.create_user("Aziz", "Karimov", run.phone(1), 2000, "TATU")
+    assert created is None and error
+
+    # Boshqa formatdagi bir xil raqam ham dublikat
+    created, error = run.db.create_user("Aziz", "Karimov", run.spaced_phone(1), 2000, "TATU")
+    assert created is None and error
+
+
+def test_getters(run, user):
+    assert run.db.get_user_by_library_id(user.library_id).phone_number == run.phone(1)
+    assert run.db.get_user_by_phone(run.phone(1)).library_id == user.library_id
+    assert run.db.get_user_by_phone(run.spaced_phone(1)).library_id == user.library_id
+    assert run.db.get_user_by_library_id("ID_YOQ") is None
+
+
+def test_link_telegram_account(run, user):
+    success, message = run.db.link_telegram_account(user.library_id, run.telegram_base)
+    assert success, message
+    assert run.db.get_user_by_telegram_id(run.telegram_base).library_id == user.library_id
+
+    success, _ = run.db.link_telegram_account(user.library_id, run.telegram_base + 1)
+    assert not success
+
+
+def test_update_subscription(run, user):
+    success, message = run.db.update_subscription(user.library_id, 'Money', 30)
+    assert success, message
+    updated = run.db.get_user_by_library_id(user.library_id)
+    assert updated.subscription_plan == 'Money'
+    assert abs((updated.subscription_end_date - datetime.now()).days - 30) <= 1
+
+    success, _ = run.db.update_subscription(user.library_id, 'Gold', 30)
+    assert not success
+
+
+def test_update_subscription_version_conflict(run, user):
+    version = user.version
+    success, message = run.db.update_subscription(user.library_id, 'Premium', 30, expected_version=version)
+    assert success, message
+
+    # Eski versiya bilan ikkinchi yozuv rad etiladi (lost update yo'q)
+    success, message = run.db.update_subscription(user.library_id, 'Free', expected_version=version)
+    assert not success and "versiya" in message
+
+    updated = run.db.get_user_by_library_id(user.library_id)
+    assert updated.subscription_plan == 'Premium' and updated.version == version + 1
+
+
+def test_change_subscription_returns_user(run, user):
+    assert run.db.link_telegram_account(user.library_id, run.telegram_base)[0]
+
+    changed, message = run.db.change_subscription(user.library_id, 'Money', 30)
+    assert changed is not None, message
+    assert changed['old_plan'] == 'Free'
+    assert changed['full_name'] == "Aziz Karimov"
+    assert changed['phone_number'] == run.phone(1)
+    assert changed['telegram_id'] == run.telegram_base
+    assert changed['version'] == user.version + 2
+
+    changed, _ = run.db.change_subscription(user.library_id, 'Premium', 30)
+    assert changed['old_plan'] == 'Money'
+
+    changed, message = run.db.change_subscription("ID_YOQ", 'Money', 30)
+    assert changed is None and "topilmadi" in message
+
+
+def test_bulk_update_subscriptions(run, user):
+    updated, not_found, error = run.db.bulk_update_subscriptions([
+        (user.library_id, 'Premium', 10),
+        ("ID_YOQ", 'Money', None)
+    ])
+    assert error is None, error
+    assert [u['library_id'] for u in updated] == [user.library_id]
+    assert not_found == ["ID_YOQ"]
+    assert run.db.get_user_by_library_id(user.library_id).subscription_plan == 'Premium'
+
+
+def test_search_users_case_insensitive(run, user):
+    assert any(u.library_id == user.library_id for u in run.db.search_users("kARIMOV"))
+    assert any(u.library_id == user.library_id for u in run.db.search_users(run.phone(1)))
+
+
+def test_expiry_scans(run, user):
+    assert run.db.update_subscription(user.library_id, 'Money', 30)[0]
+
+    set_end_date(run, user.library_id, datetime.now() + timedelta(days=1))
+    assert user.library_id in {u.library_id for u in run.db.get_users_expiring_soon(3)}
+
+    set_end_date(run, user.library_id, datetime.now() - timedelta(days=1))
+    assert user.library_id in {u.library_id for u in run.db.get_expired_subscriptions()}
+    assert user.library_id in {
+        u.library_id for batch in run.db.iter_user_batches(run.db.expired_filters(), batch_size=1)
+        for u in batch
+    }
+
+
+def test_deactivate_activate(run, user):
+    assert run.db.deactivate_user(user.library_id)[0]
+    assert run.db.get_user_by_library_id(user.library_id).is_active is False
+    assert not any(u.library_id == user.library_id for u in run.db.search_users(run.phone(1)))
+
+    assert run.db.activate_user(user.library_id)[0]
+    assert run.db.get_user_by_library_id(user.library_id).is_active is True
+
+
+def test_statistics(run, user):
+    assert run.db.update_subscription(user.library_id, 'Premium', 30)[0]
+
+    stats = run.db.get_statistics()
+    assert stats['total_users'] >= 1
+    assert stats['premium_users'] >= 1
+
+
+def test_admins(run, user):
+    super_admin = run.admins.get_super_admin()
+    if super_admin is None:
+        success, message = run.admins.add_super_admin(run.telegram_base, user.library_id, "Aziz Karimov")
+        assert success, message
+        super_admin = run.admins.get_super_admin()
+    assert run.admins.is_super_admin(super_admin.telegram_id)
+
+    other, error = run.db.create_user("Dilnoza", "Rahimova", run.phone(2), 2001, "O'zMU")
+    assert error is None, error
+    telegram_id = run.telegram_base + 2
+
+    before = run.admins.get_admin_count()
+    success, message = run.admins.add_admin(telegram_id, other.library_id, "Dilnoza Rahimova",
+                                             super_admin.telegram_id)
+    assert success, message
+    assert run.admins.is_admin(telegram_id)
+    assert not run.admins.is_super_admin(telegram_id)
+
+    after = run.admins.get_admin_count()
+    assert after['total'] == before['total'] + 1
+    assert after['regular'] == before['regular'] + 1
+    assert after['super_admin'] == 1
+
+    assert run.admins.remove_admin(other.library_id, super_admin.telegram_id)[0]
+    assert not run.admins.is_admin(telegram_id)
+
+
+def test_audit_log(run, user):
+    records = [
+        audit_record('approve', run.telegram_base, user.library_id, {'plan': 'Money'}),
+        audit_record('add_admin', run.telegram_base, user.library_id, {'error': "❌"}, success=False)
+    ]
+    assert run.audit.write_batch(records) == 2
+
+    start = datetime.now() - timedelta(minutes=5)
+    end = datetime.now() + timedelta(minutes=5)
+    entries = run.audit.get_entries(start, end, actor_telegram_id=run.telegram_base)
+    assert [entry.action for entry in entries] == ['add_admin', 'approve']
+    assert not entries[0].success and '"plan": "Money"' in entries[1].details
+
+    assert len(run.audit.get_entries(start, end, action='approve', target_library_id=user.library_id)) >= 1
+    assert run.audit.get_entries(end, end + timedelta(minutes=5), actor_telegram_id=run.telegram_base) == []
+    assert run.audit.count_by_action(start, end).get('approve', 0) >= 1
+
+
+def test_sqlite_pragmas(run):
+    if run.backend != 'sqlite':
+        pytest.skip("faqat SQLite")
+
+    with run.db.engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() in ('wal', 'memory')
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() > 0
@@ -0,0 +1,40 @@
+"""
+/metrics - bot_handler_latency_seconds summary (quantile, _sum, _count)
+"""
+import time
+
+from bot.utils import metrics
+from bot.utils.tracing import LatencyTracer, UpdateSpan
+
+
+def parse_samples(text: str) -> dict:
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_handler_latency_summary(monkeypatch):
+    tracer = LatencyTracer(buffer_size=4)
+    monkeypatch.setattr(metrics, "tracer", tracer)
+
+    # 10, 20, ..., 100 ms - buferda faqat oxirgi 4 tasi qoladi
+    for i in range(1, 11):
+        span = UpdateSpan()
+        span.handler = "cmd_start"
+        span.started = time.perf_counter() - i / 100
+        tracer.record(span)
+
+    samples = parse_samples(metrics.MetricsCollector._render_latency())
+    labels = '{handler="cmd_start"}'
+
+    assert samples[f"bot_handler_latency_seconds_count{labels}"] == 10
+    # _sum hamma kuzatuvlar bo'yicha (rate(_sum) / rate(_count) - o'rtacha)
+    assert abs(samples[f"bot_handler_latency_seconds_sum{labels}"] - 0.55) < 0.01
+    # Kvantillar oxirgi oyna bo'yicha (70..100 ms)
+    p50 = samples['bot_handler_latency_seconds{handler="cmd_start",quantile="0.5"}']
+    p99 = samples['bot_handler_latency_seconds{handler="cmd_start",quantile="0.99"}']
+    assert 0.08 <= p50 < 0.09
+    assert 0.1 <= p99 < 0.11
@@ -0,0 +1,54 @@
+"""
+normalize_phone - users.phone_normalized UNIQUE index shu qiymat bilan ishlaydi
+"""
+import pytest
+
+from ijara_kitoblar.database.phone import normalize_phone
+
+EXPECTED = "+998901234567"
+
+
+@pytest.mark.parametrize("raw", [
+    "901234567",
+    "0901234567",
+    "90 123 45 67",
+    "998901234567",
+    "+998901234567",
+    "00998901234567",
+    "+998 (90) 123-45-67",
+    " 998-90-123-45-67 ",
+    "+998.90.123.45.67",
+    "8 90 123 45 67",
+    "8(90)1234567",
+])
+def test_uzbek_formats(raw):
+    assert normalize_phone(raw) == EXPECTED
+
+
+@pytest.mark.parametrize("raw", [None, "", "   ", "---", "abc"])
+def test_empty(raw):
+    assert normalize_phone(raw) is None
+
+
+@pytest.mark.parametrize("raw", [
+    "8 901 234 5678",      # 8 + 10 xona - mahalliy raqam emas, +8... ham emas
+    "89012345678",
+    "9989012345",          # 998 + qisqa raqam
+    "+99890123456789",     # 998 + uzun raqam
+    "1234567",             # juda qisqa
+    "+1234567890123456",   # 15 xonadan uzun
+    "+0901234567",         # mamlakat kodi 0 bilan boshlanmaydi
+])
+def test_invalid(raw):
+    assert normalize_phone(raw) is None
+
+
+def test_other_countries_keep_country_code():
+    assert normalize_phone("+7 901 234-56-78") == "+79012345678"
+    assert normalize_phone("0044 20 7946 0958") == "+442079460958"
+
+
+def test_same_number_same_value():
+    # UNIQUE index: boshqa yozilishdagi bir xil raqam dublikat bo'ladi
+    variants = {"+998 90 123 45 67", "998901234567", "90-123-45-67", "8 90 123-45-67"}
+    assert {normalize_phone(v) for v in variants} == {EXPECTED}
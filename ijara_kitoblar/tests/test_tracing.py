@@ -0,0 +1,74 @@
+"""
+RingBuffer va percentiles - handler latency eksporti (p50/p95/p99)
+"""
+from bot.utils.tracing import RingBuffer, LatencyTracer, UpdateSpan, percentiles
+
+
+def test_ring_buffer_before_wraparound():
+    buffer = RingBuffer(4)
+    for value in (1.0, 2.0, 3.0):
+        buffer.append(value)
+
+    assert buffer.count == 3
+    assert buffer.snapshot() == [1.0, 2.0, 3.0]
+
+
+def test_ring_buffer_wraparound_keeps_latest():
+    buffer = RingBuffer(4)
+    for value in range(1, 11):
+        buffer.append(float(value))
+
+    # Eng eski qiymatlar ustiga yozilgan, hajm o'smaydi
+    assert buffer.count == 10
+    assert sorted(buffer.snapshot()) == [7.0, 8.0, 9.0, 10.0]
+    # Yig'indi buferdan chiqib ketganlarni ham o'z ichiga oladi (summary _sum)
+    assert buffer.sum == 55.0
+
+
+def test_ring_buffer_snapshot_is_copy():
+    buffer = RingBuffer(2)
+    buffer.append(1.0)
+    snapshot = buffer.snapshot()
+    buffer.append(2.0)
+    assert snapshot == [1.0]
+
+
+def test_percentiles_nearest_rank():
+    # 1..100 ms, tartibsiz
+    values = [((i * 37) % 100 + 1) / 1000 for i in range(100)]
+    assert percentiles(values) == {"p50": 50.0, "p95": 95.0, "p99": 99.0, "max": 100.0}
+
+
+def test_percentiles_small_samples():
+    assert percentiles([]) == {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    assert percentiles([0.005]) == {"p50": 5.0, "p95": 5.0, "p99": 5.0, "max": 5.0}
+    assert percentiles([0.001, 0.002, 0.003, 0.004]) == {"p50": 2.0, "p95": 4.0, "p99": 4.0, "max": 4.0}
+
+
+def test_percentiles_after_wraparound():
+    buffer = RingBuffer(10)
+    # Birinchi 1000 ta sekin qiymat buferdan chiqib ketadi
+    for _ in range(1000):
+        buffer.append(1.0)
+    for value in range(1, 11):
+        buffer.append(value / 1000)
+
+    assert percentiles(buffer.snapshot()) == {"p50": 5.0, "p95": 10.0, "p99": 10.0, "max": 10.0}
+
+
+def test_tracer_snapshot():
+    tracer = LatencyTracer(buffer_size=8)
+    for i in range(20):
+        span = UpdateSpan()
+        span.handler = "cmd_start"
+        span.handler_time = (i + 1) / 1000
+        span.db_calls = 2
+        span.api_calls = 1
+        tracer.record(span)
+
+    stats = tracer.snapshot()["handlers"]["cmd_start"]
+    assert stats["count"] == 20
+    # Faqat oxirgi 8 ta (13..20 ms) hisobga olinadi
+    assert stats["handler"] == {"p50": 16.0, "p95": 20.0, "p99": 20.0, "max": 20.0}
+    assert stats["db_calls_per_update"] == 2
+    assert stats["api_calls_per_update"] == 1
@@ -12,13 +12,14 @@ DATA_DIR = BASE_DIR / "data"
 RAW_DATA_DIR = DATA_DIR / "raw"
 PROCESSED_DATA_DIR = DATA_DIR / "processed"
 TRAIN_TEST_DIR = DATA_DIR / "train_test_split"
+FEATURES_DIR = DATA_DIR / "features"  # Feature extraction keshi (model_training.py)
 
 MODELS_DIR = BASE_DIR / "models"
 CHECKPOINTS_DIR = MODELS_DIR / "checkpoints"
 FINAL_MODEL_DIR = MODELS_DIR / "final_model"
 
 # Papkalarni yaratish
-for directory in [RAW_DATA_DIR, PROCESSED_DATA_DIR, TRAIN_TEST_DIR, 
+for directory in [RAW_DATA_DIR, PROCESSED_DATA_DIR, TRAIN_TEST_DIR, FEATURES_DIR,
                   CHECKPOINTS_DIR, FINAL_MODEL_DIR]:
     directory.mkdir(parents=True, exist_ok=True)
 
@@ -35,8 +36,17 @@ class ModelConfig:
     USE_CPU = True
     NUM_WORKERS = 2  # CPU core'lar soni (laptop uchun 2-4)
     
+    # Feature extraction (training oldidan, FEATURES_DIR da keshlanadi)
+    FEATURE_NUM_PROC = max(1, (os.cpu_count() or 2) - 1)
+    FEATURE_BATCH_SIZE = 32
+    
     # Training parametrlari
     BATCH_SIZE = 4  # CPU uchun kichik batch size
+    
+    # Uzunlik bo'yicha guruhlash (src/sampler.py) - BATCH_SIZE o'rniga audio soniyalari
+    GROUP_BY_DURATION = True
+    MAX_BATCH_SECONDS = 60  # Padding bilan bitta batchdagi maksimal audio (soniya)
+    BUCKET_SIZE = 50        # Bitta tartiblanadigan bo'lakdagi batch'lar soni
     LEARNING_RATE = 3e-4
     NUM_EPOCHS = 10
     WARMUP_STEPS = 500
@@ -67,6 +77,10 @@ class AudioConfig:
     # Audio normalizatsiya
     NORMALIZE_AUDIO = True
     
+    # Qayta ishlangan datasetda audio saqlash formati (src/audio_storage.py)
+    # "float32" - eng katta, "int16" - 2x kichik, "flac" - eng kichik, decode sekinroq
+    STORAGE_FORMAT = "int16"
+    
     # Augmentation (kerak bo'lsa)
     USE_AUGMENTATION = False
     AUGMENTATION_PROB = 0.5
@@ -77,7 +91,9 @@ class DataConfig:
     """Ma'lumotlar bilan ishlash sozlamalari"""
     
     # Parquet fayl nomi (siz yuklaysiz)
+    # Fayl, papka (ichidagi barcha *.parquet) yoki glob ("part-*.parquet") bo'lishi mumkin
     PARQUET_FILE = "your_data.parquet"
+    PARQUET_BATCH_SIZE = 64  # Parquet dan bir martada o'qiladigan qatorlar
     
     # Ma'lumotlar ustunlari (Parquet fayldagi ustun nomlari)
     AUDIO_COLUMN = "audio"  # Audio fayl yo'li yoki bytes
@@ -93,6 +109,16 @@ class DataConfig:
     
     # Maksimal matn uzunligi
     MAX_TEXT_LENGTH = 500
+    
+    # Parallel qayta ishlash (audio decode/resample/normalizatsiya)
+    NUM_PROC = max(1, (os.cpu_count() or 2) - 1)  # Worker jarayonlar soni (1 = parallel emas)
+    CHUNK_SIZE = 16          # Bitta worker ga bir martada beriladigan qatorlar
+    MAX_IN_FLIGHT = 2        # Har bir worker uchun navbatdagi bo'laklar (xotira chegarasi)
+    
+    # Arrow fayllarga yozish
+    WRITER_BATCH_SIZE = 200  # Xotirada yig'ilib, bir martada yoziladigan misollar
+    MAX_SHARD_SIZE = "500MB" # save_to_disk dagi bitta Arrow fayl (shard) hajmi
+    CACHE_DIR = PROCESSED_DATA_DIR / "cache"
 
 
 # ===== BAHOLASH SOZLAMALARI =====
@@ -104,6 +130,29 @@ class EvalConfig:
     
     # Test batch size
     TEST_BATCH_SIZE = 8
+    
+    # Metrikalar (src/asr_metrics.py)
+    METRICS_NUM_PROC = max(1, (os.cpu_count() or 2) - 1)  # Katta test to'plamlari uchun
+    TOP_CONFUSIONS = 20  # Hisobotdagi eng ko'p chalkashtirilgan so'z juftliklari
+
+
+# ===== INFERENCE SOZLAMALARI =====
+class InferenceConfig:
+    """Yangi audio fayllarni transkripsiya qilish (src/inference.py)"""
+    
+    # Batch transkripsiya - fayllar davomiylik bo'yicha guruhlanadi
+    BATCH_SECONDS = 120    # Padding bilan bitta batchdagi maksimal audio (soniya)
+    MAX_BATCH_SIZE = 16    # Bitta batchdagi maksimal fayllar
+    LOAD_THREADS = 4       # Audio yuklash (decode/resample) thread'lari
+    PREFETCH_BATCHES = 2   # Oldindan yuklanadigan batch'lar (xotira chegarasi)
+    
+    # Uzun audio - bo'laklab transkripsiya (MAX_AUDIO_LENGTH cheklovi yo'q)
+    CHUNK_LENGTH_S = 20    # Bitta bo'lak (soniya); bundan uzun fayllar bo'laklanadi
+    STRIDE_LENGTH_S = 4    # Bo'lakning har ikki chetidagi kontekst (soniya), natijadan tashlanadi
+    CHUNK_BATCH_SIZE = 8   # Bitta forward pass dagi bo'laklar
+    
+    # Natijalar (har bir fayl tayyor bo'lishi bilan bitta JSON qator)
+    OUTPUT_FILE = "transcriptions.jsonl"
 
 
 # ===== LOGGING VA MONITORING =====
@@ -141,6 +190,7 @@ def get_config():
         "audio": AudioConfig,
         "data": DataConfig,
         "eval": EvalConfig,
+        "inference": InferenceConfig,
         "log": LogConfig,
         "optimization": OptimizationConfig
     }
@@ -0,0 +1,127 @@
+"""
+ASR metrikalari - bitta o'tishda
+Har bir misol uchun so'z va harf darajasida bittadan alignment (jiwer / rapidfuzz,
+C da) bajariladi va undan barcha natijalar olinadi: misol WER/CER, almashtirish /
+qo'shish / o'chirish soni, korpus bo'yicha yig'indilar va eng ko'p chalkashtirilgan
+so'z juftliklari. Katta test to'plamlarida bo'laklar worker jarayonlarda hisoblanadi.
+
+Ishlatish:
+    from asr_metrics import score_transcripts
+    metrics = score_transcripts(references, predictions)
+    metrics["wer"], metrics["samples"][0]["wer"], metrics["confusions"][:5]
+"""
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import jiwer
+
+from config import EvalConfig
+
+
+def align_sample(reference, prediction):
+    """
+    Bitta misol: so'z va harf alignment'i
+
+    Args:
+        reference: Asl matn
+        prediction: Model javobi
+
+    Returns:
+        (misol metrikalari dict, so'z chalkashliklari Counter)
+    """
+    reference = reference or ""
+    prediction = prediction or ""
+    confusions = Counter()
+
+    # jiwer bo'sh reference ni qabul qilmaydi - bunda hamma so'z qo'shilgan hisoblanadi
+    if not reference.strip():
+        inserted_words = len(prediction.split())
+        inserted_chars = len(" ".join(prediction.split()))
+        return {
+            'wer': float(inserted_words > 0), 'cer': float(inserted_chars > 0),
+            'hits': 0, 'substitutions': 0, 'deletions': 0, 'insertions': inserted_words,
+            'ref_words': 0, 'char_errors': inserted_chars, 'ref_chars': 0
+        }, confusions
+
+    words = jiwer.process_words(reference, prediction)
+    chars = jiwer.process_characters(reference, prediction)
+
+    ref_words, hyp_words = words.references[0], words.hypotheses[0]
+    for chunk in words.alignments[0]:
+        if chunk.type == 'substitute':
+            confusions.update(zip(ref_words[chunk.ref_start_idx:chunk.ref_end_idx],
+                                  hyp_words[chunk.hyp_start_idx:chunk.hyp_end_idx]))
+
+    char_errors = chars.substitutions + chars.deletions + chars.insertions
+    ref_chars = chars.hits + chars.substitutions + chars.deletions
+
+    return {
+        'wer': words.wer,
+        'cer': chars.cer,
+        'hits': words.hits,
+        'substitutions': words.substitutions,
+        'deletions': words.deletions,
+        'insertions': words.insertions,
+        'ref_words': words.hits + words.substitutions + words.deletions,
+        'char_errors': char_errors,
+        'ref_chars': ref_chars
+    }, confusions
+
+
+def align_chunk(pairs):
+    """Bo'lakdagi (reference, prediction) juftliklari (worker jarayonda)"""
+    samples = []
+    confusions = Counter()
+
+    for reference, prediction in pairs:
+        sample, sample_confusions = align_sample(reference, prediction)
+        samples.append(sample)
+        confusions.update(sample_confusions)
+
+    return samples, confusions
+
+
+def score_transcripts(references, predictions, num_proc=EvalConfig.METRICS_NUM_PROC,
+                      chunk_size=500, top_confusions=EvalConfig.TOP_CONFUSIONS):
+    """
+    Korpus va misol metrikalari (har bir misol bir marta align qilinadi)
+
+    Args:
+        references: Asl matnlar
+        predictions: Model javoblari (xuddi shu tartibda)
+        num_proc: Worker jarayonlar (misollar chunk_size dan ko'p bo'lsa)
+        chunk_size: Bitta worker vazifasidagi misollar
+        top_confusions: Nechta eng ko'p chalkashtirilgan juftlik
+
+    Returns:
+        dict: wer, cer, hits/substitutions/deletions/insertions, ref_words, ref_chars,
+              samples (misollar bo'yicha), confusions ([((asl, javob), soni), ...])
+    """
+    pairs = list(zip(references, predictions))
+    chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+
+    if num_proc > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=min(num_proc, len(chunks))) as executor:
+            results = list(executor.map(align_chunk, chunks))
+    else:
+        results = [align_chunk(chunk) for chunk in chunks]
+
+    samples = []
+    confusions = Counter()
+    for chunk_samples, chunk_confusions in results:
+        samples.extend(chunk_samples)
+        confusions.update(chunk_confusions)
+
+    totals = {key: sum(sample[key] for sample in samples)
+              for key in ('hits', 'substitutions', 'deletions', 'insertions',
+                          'ref_words', 'char_errors', 'ref_chars')}
+    word_errors = totals['substitutions'] + totals['deletions'] + totals['insertions']
+
+    return {
+        'wer': word_errors / totals['ref_words'] if totals['ref_words'] else 0.0,
+        'cer': totals['char_errors'] / totals['ref_chars'] if totals['ref_chars'] else 0.0,
+        **totals,
+        'samples': samples,
+        'confusions': confusions.most_common(top_confusions)
+    }
@@ -0,0 +1,167 @@
+"""
+Audio saqlash formatlari
+Qayta ishlangan datasetda audio float32, int16 PCM yoki FLAC bytes ko'rinishida
+saqlanadi va o'qilganda (set_transform orqali) float32 ga decode qilinadi.
+
+Formatlar (AudioConfig.STORAGE_FORMAT):
+- float32 - eski format, eng katta (4 bayt/sample), decode kerak emas
+- int16   - 2 bayt/sample, decode = bitta ko'paytirish
+- flac    - ~1 bayt/sample (nutqda), decode sekinroq (soundfile)
+"""
+
+import io
+from functools import partial
+
+import numpy as np
+import soundfile as sf
+from datasets import Features, Sequence, Value, load_from_disk
+
+from config import AudioConfig
+
+
+STORAGE_FORMATS = ("float32", "int16", "flac")
+
+INT16_SCALE = 32767.0
+
+
+def audio_features(storage=AudioConfig.STORAGE_FORMAT):
+    """
+    Qayta ishlangan dataset ustunlari
+
+    Args:
+        storage: Saqlash formati (STORAGE_FORMATS)
+
+    Returns:
+        Features: audio, text, sampling_rate, duration
+    """
+    if storage not in STORAGE_FORMATS:
+        raise ValueError(f"Noma'lum saqlash formati: {storage} ({', '.join(STORAGE_FORMATS)})")
+
+    audio = {
+        "float32": Sequence(Value('float32')),
+        "int16": Sequence(Value('int16')),
+        "flac": Value('binary')
+    }[storage]
+
+    return Features({
+        'audio': audio,
+        'text': Value('string'),
+        'sampling_rate': Value('int32'),
+        'duration': Value('float32')
+    })
+
+
+def encode_audio(audio, sample_rate, storage=AudioConfig.STORAGE_FORMAT):
+    """
+    float32 audio ni saqlash formatiga o'tkazish
+
+    Args:
+        audio: float32 signal ([-1, 1] oralig'ida)
+        sample_rate: Sample rate
+        storage: Saqlash formati
+
+    Returns:
+        numpy array yoki bytes
+    """
+    if storage == "float32":
+        return np.asarray(audio, dtype=np.float32)
+
+    if storage == "int16":
+        return (np.clip(audio, -1.0, 1.0) * INT16_SCALE).astype(np.int16)
+
+    if storage == "flac":
+        buffer = io.BytesIO()
+        sf.write(buffer, np.clip(audio, -1.0, 1.0), sample_rate, format='FLAC', subtype='PCM_16')
+        return buffer.getvalue()
+
+    raise ValueError(f"Noma'lum saqlash formati: {storage}")
+
+
+def storage_format(dataset):
+    """Dataset audio ustunining saqlash formati (features bo'yicha)"""
+    feature = dataset.features['audio']
+
+    if feature == Value('binary'):
+        return "flac"
+    return "int16" if feature.feature.dtype == 'int16' else "float32"
+
+
+def to_float_audio(value, storage=None):
+    """
+    Saqlangan audio ni float32 ga decode qilish
+
+    Args:
+        value: FLAC bytes, int16 yoki float massiv / ro'yxat
+        storage: Saqlash formati (None - qiymat turidan aniqlanadi; python
+            ro'yxatdagi int16 qiymatlar uchun "int16" berilishi kerak)
+
+    Returns:
+        numpy array: float32 signal
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        audio, _ = sf.read(io.BytesIO(value), dtype='float32')
+        return audio
+
+    audio = np.asarray(value)
+    if storage == "int16" or audio.dtype == np.int16:
+        return audio.astype(np.float32) / INT16_SCALE
+
+    return audio.astype(np.float32, copy=False)
+
+
+def decode_batch(batch, storage=None):
+    """set_transform uchun: faqat audio ustuni decode qilinadi, qolganlari o'zgarmaydi"""
+    batch['audio'] = [to_float_audio(value, storage) for value in batch['audio']]
+    return batch
+
+
+def load_audio_dataset(path):
+    """
+    Qayta ishlangan datasetni yuklash (audio kirish paytida, lazy decode qilinadi)
+
+    Disk dagi ma'lumot o'zgarmaydi - decode faqat dataset[i] / iteratsiya /
+    map paytida, kerakli qatorlar uchun bajariladi.
+
+    Args:
+        path: save_to_disk papkasi
+
+    Returns:
+        Dataset: audio ustuni float32 numpy massiv sifatida qaytadi
+    """
+    dataset = load_from_disk(str(path))
+    dataset.set_transform(partial(decode_batch, storage=storage_format(dataset)))
+    return dataset
+
+
+def convert_storage(dataset, storage, num_proc=None):
+    """
+    Mavjud datasetni boshqa saqlash formatiga o'tkazish
+
+    Args:
+        dataset: Qayta ishlangan dataset (istalgan formatda)
+        storage: Yangi format
+        num_proc: Jarayonlar soni
+
+    Returns:
+        Dataset: Yangi formatdagi dataset
+    """
+    source_storage = storage_format(dataset)
+
+    def convert(batch):
+        audio = [to_float_audio(value, source_storage) for value in batch['audio']]
+        return {
+            'audio': [encode_audio(signal, sr, storage) for signal, sr in zip(audio, batch['sampling_rate'])],
+            'text': batch['text'],
+            'sampling_rate': batch['sampling_rate'],
+            'duration': [len(signal) / sr for signal, sr in zip(audio, batch['sampling_rate'])]
+        }
+
+    return dataset.with_format(None).map(
+        convert,
+        batched=True,
+        batch_size=64,
+        features=audio_features(storage),
+        remove_columns=dataset.column_names,
+        num_proc=num_proc,
+        desc=f"{storage} ga o'tkazish"
+    )
@@ -0,0 +1,453 @@
+"""
+Benchmark'lar - ma'lumotlar pipeline'ini o'lchash
+
+Buyruqlar:
+    storage - audio saqlash formatlari (float32 / int16 / flac): disk hajmi,
+              yuklash vaqti, decode tezligi va DataLoader step tezligi
+    sampler - tasodifiy (BATCH_SIZE) va DurationBatchSampler batch'lari: padding
+              ulushi va training step tezligi (samples/s)
+    eval-memory - Trainer.evaluate da yig'iladigan predictions hajmi: to'liq
+              logits va logits_to_ids (token ID lar) bilan
+
+Ishlatish:
+    python benchmark.py storage                     # train split (yoki sintetik)
+    python benchmark.py storage --synthetic 500     # 500 ta sintetik clip
+    python benchmark.py storage --json natija.json
+    python benchmark.py sampler --steps 20
+    python benchmark.py eval-memory --samples 64
+"""
+
+import argparse
+import json
+import resource
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader
+from datasets import Dataset, load_from_disk
+
+from config import TRAIN_TEST_DIR, AudioConfig, EvalConfig, ModelConfig
+from audio_storage import (
+    STORAGE_FORMATS, audio_features, convert_storage, encode_audio, load_audio_dataset
+)
+from sampler import DurationBatchSampler, load_duration_index, padding_stats
+from model_training import logits_to_ids
+
+
+def synthetic_dataset(num_samples, seed=42):
+    """
+    Sintetik nutqqa o'xshash clip'lar (1-15 soniya, garmonikalar + shovqin)
+
+    Haqiqiy ma'lumot bo'lmaganda formatlarni solishtirish uchun; FLAC nutqni
+    bundan yaxshiroq siqadi.
+    """
+    rng = np.random.default_rng(seed)
+    sr = AudioConfig.SAMPLE_RATE
+
+    def clips():
+        for i in range(num_samples):
+            t = np.arange(int(rng.uniform(1, 15) * sr)) / sr
+            pitch = rng.uniform(90, 250)
+            envelope = 0.5 * (1 + np.sin(2 * np.pi * rng.uniform(2, 6) * t))
+            audio = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6)) * envelope
+            audio = audio + rng.normal(0, 0.02, len(t))
+            audio = (audio / np.abs(audio).max()).astype(np.float32)
+            yield {
+                'audio': encode_audio(audio, sr, "float32"),
+                'text': f"sintetik matn {i}",
+                'sampling_rate': sr,
+                'duration': len(audio) / sr
+            }
+
+    return Dataset.from_generator(clips, features=audio_features("float32"))
+
+
+def directory_size(path):
+    """Papkadagi fayllar hajmi (bayt)"""
+    return sum(file.stat().st_size for file in Path(path).rglob("*") if file.is_file())
+
+
+def collate_padded(batch):
+    """DataLoader uchun: audio ni eng uzun clip gacha padding qilib tensor yaratish"""
+    lengths = [len(item['audio']) for item in batch]
+    padded = np.zeros((len(batch), max(lengths)), dtype=np.float32)
+    for row, item in enumerate(batch):
+        padded[row, :len(item['audio'])] = item['audio']
+    return torch.from_numpy(padded), torch.tensor(lengths)
+
+
+def measure_storage(source, storage, work_dir, batch_size, num_workers):
+    """Bitta format uchun: saqlash, hajm, yuklash, decode va DataLoader tezligi"""
+    path = Path(work_dir) / storage
+    convert_storage(source, storage).save_to_disk(str(path))
+
+    started = time.perf_counter()
+    dataset = load_audio_dataset(path)
+    load_time = time.perf_counter() - started
+
+    audio_seconds = sum(dataset.with_format(None)['duration'])
+
+    # To'liq decode (bitta jarayon)
+    started = time.perf_counter()
+    for start in range(0, len(dataset), 64):
+        dataset[start:start + 64]
+    decode_time = time.perf_counter() - started
+
+    # DataLoader (worker'lar bilan) - training step ning ma'lumot qismi
+    loader = DataLoader(dataset, batch_size=batch_size, num_workers=num_workers,
+                        collate_fn=collate_padded, shuffle=True)
+    started = time.perf_counter()
+    steps = sum(1 for _ in loader)
+    loader_time = time.perf_counter() - started
+
+    return {
+        'disk_mb': round(directory_size(path) / 1024 ** 2, 2),
+        'load_s': round(load_time, 3),
+        'decode_samples_per_s': round(len(dataset) / max(decode_time, 1e-9), 1),
+        'decode_audio_x_realtime': round(audio_seconds / max(decode_time, 1e-9), 1),
+        'loader_steps_per_s': round(steps / max(loader_time, 1e-9), 2),
+        'loader_samples_per_s': round(len(dataset) / max(loader_time, 1e-9), 1)
+    }
+
+
+def run_storage(args):
+    """storage buyrug'i"""
+    if args.synthetic:
+        source = synthetic_dataset(args.synthetic)
+    else:
+        source = load_from_disk(str(args.source))
+        if args.limit:
+            source = source.select(range(min(args.limit, len(source))))
+
+    work_dir = tempfile.mkdtemp(prefix="stt_storage_")
+    try:
+        results = {
+            storage: measure_storage(source, storage, work_dir, args.batch_size, args.num_workers)
+            for storage in STORAGE_FORMATS
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"\n{'='*78}")
+    print(f"📊 AUDIO SAQLASH FORMATLARI ({len(source)} ta clip)")
+    print(f"{'='*78}")
+    print(f"{'Format':<10}{'Disk (MB)':>12}{'Yuklash (s)':>13}{'Decode/s':>12}"
+          f"{'x real':>10}{'Step/s':>10}{'Sample/s':>11}")
+    print("-" * 78)
+    for storage, stats in results.items():
+        print(f"{storage:<10}{stats['disk_mb']:>12.2f}{stats['load_s']:>13.3f}"
+              f"{stats['decode_samples_per_s']:>12.1f}{stats['decode_audio_x_realtime']:>10.1f}"
+              f"{stats['loader_steps_per_s']:>10.2f}{stats['loader_samples_per_s']:>11.1f}")
+    print(f"{'='*78}")
+
+    baseline = results['float32']['disk_mb']
+    for storage in ("int16", "flac"):
+        print(f"✓ {storage}: diskda {baseline / max(results[storage]['disk_mb'], 1e-9):.1f}x kichik")
+
+    return results
+
+
+def synthetic_durations(num_samples, seed=42):
+    """Nutq korpuslariga o'xshash davomiyliklar (log-normal, 1 - MAX_AUDIO_LENGTH soniya)"""
+    rng = np.random.default_rng(seed)
+    durations = rng.lognormal(mean=np.log(6), sigma=0.7, size=num_samples)
+    return np.clip(durations, 1, AudioConfig.MAX_AUDIO_LENGTH).astype(np.float32)
+
+
+def measure_train_steps(batches, durations, steps):
+    """
+    Training step tezligi: tasodifiy initsializatsiya qilingan Wav2Vec2ForCTC
+    (base arxitektura, yuklab olish shart emas) da forward + backward + optimizer
+
+    Audio va label'lar tasodifiy - faqat tensor shakllari (padding) muhim.
+    """
+    from transformers import Wav2Vec2Config, Wav2Vec2ForCTC
+
+    torch.manual_seed(0)
+    model = Wav2Vec2ForCTC(Wav2Vec2Config(vocab_size=32))
+    model.train()
+    optimizer = torch.optim.AdamW(model.parameters(), lr=ModelConfig.LEARNING_RATE)
+    sr = AudioConfig.SAMPLE_RATE
+
+    samples = 0
+    audio_seconds = 0.0
+    started = time.perf_counter()
+
+    for batch in batches[:steps]:
+        batch_durations = durations[batch]
+        lengths = (batch_durations * sr).astype(int)
+        input_values = torch.zeros(len(batch), int(lengths.max()))
+        attention_mask = torch.zeros_like(input_values, dtype=torch.long)
+        for row, length in enumerate(lengths):
+            input_values[row, :length] = torch.randn(length)
+            attention_mask[row, :length] = 1
+
+        # ~2 token/soniya, -100 - padding
+        label_lengths = np.maximum(1, (batch_durations * 2).astype(int))
+        labels = torch.full((len(batch), int(label_lengths.max())), -100)
+        for row, length in enumerate(label_lengths):
+            labels[row, :length] = torch.randint(1, 32, (length,))
+
+        loss = model(input_values, attention_mask=attention_mask, labels=labels).loss
+        loss.backward()
+        optimizer.step()
+        optimizer.zero_grad()
+
+        samples += len(batch)
+        audio_seconds += float(batch_durations.sum())
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    return {
+        'steps': min(steps, len(batches)),
+        'samples_per_s': round(samples / elapsed, 2),
+        'audio_x_realtime': round(audio_seconds / elapsed, 2)
+    }
+
+
+def run_sampler(args):
+    """sampler buyrug'i"""
+    durations = None
+    if not args.synthetic and args.source.exists():
+        durations = load_duration_index(args.source, load_from_disk(str(args.source)))
+    if durations is None:
+        durations = synthetic_durations(args.synthetic or 2000)
+
+    rng = np.random.default_rng(42)
+    order = rng.permutation(len(durations))
+    random_batches = [order[i:i + args.batch_size].tolist() for i in range(0, len(order), args.batch_size)]
+    bucketed_batches = DurationBatchSampler(durations, max_batch_seconds=args.max_batch_seconds).batches()
+
+    results = {}
+    for name, batches in (("random", random_batches), ("duration", bucketed_batches)):
+        stats = padding_stats(batches, durations)
+        stats['batches'] = len(batches)
+        stats['mean_batch_size'] = round(len(durations) / max(len(batches), 1), 2)
+        if args.steps:
+            stats.update(measure_train_steps(batches, durations, args.steps))
+        results[name] = stats
+
+    print(f"\n{'='*78}")
+    print(f"📊 BATCH SAMPLER ({len(durations)} ta clip, {durations.sum() / 3600:.2f} soat)")
+    print(f"{'='*78}")
+    print(f"{'Sampler':<10}{'Batch':>8}{'O`rt. hajm':>12}{'Padding':>10}{'Padded (s)':>13}"
+          f"{'Sample/s':>11}{'x real':>10}")
+    print("-" * 78)
+    for name, stats in results.items():
+        print(f"{name:<10}{stats['batches']:>8}{stats['mean_batch_size']:>12.2f}"
+              f"{stats['padding_ratio']*100:>9.1f}%{stats['padded_seconds']:>13.0f}"
+              f"{stats.get('samples_per_s', 0):>11.2f}{stats.get('audio_x_realtime', 0):>10.2f}")
+    print(f"{'='*78}")
+
+    if args.steps:
+        speedup = results['duration']['samples_per_s'] / max(results['random']['samples_per_s'], 1e-9)
+        print(f"⚡ duration / random: {speedup:.2f}x samples/s")
+
+    return results
+
+
+def frame_count(seconds):
+    """Wav2Vec2 chiqish kadrlari (~50 kadr/soniya, 320 sample qadam)"""
+    return int(seconds * AudioConfig.SAMPLE_RATE) // 320
+
+
+def accumulated_bytes(durations, vocab_size):
+    """
+    Trainer butun split bo'yicha yig'adigan predictions hajmi (hisoblab)
+
+    Trainer eval batch'larini eng uzun clip gacha padding qilib birlashtiradi:
+    N x max_kadr x vocab float32 (logits) yoki N x max_kadr int64 (token ID).
+    """
+    max_frames = frame_count(float(durations.max()))
+    return {
+        'logits_mb': round(len(durations) * max_frames * vocab_size * 4 / 1024 ** 2, 1),
+        'ids_mb': round(len(durations) * max_frames * 8 / 1024 ** 2, 1)
+    }
+
+
+class SyntheticEvalDataset(torch.utils.data.Dataset):
+    """Berilgan davomiyliklardagi tasodifiy audio va label'lar (Trainer.evaluate uchun)"""
+
+    def __init__(self, durations, vocab_size, seed=0):
+        self.durations = durations
+        self.vocab_size = vocab_size
+        self.seed = seed
+
+    def __len__(self):
+        return len(self.durations)
+
+    def __getitem__(self, idx):
+        generator = torch.Generator().manual_seed(self.seed + idx)
+        duration = float(self.durations[idx])
+        label_length = max(1, int(duration * 2))
+        return {
+            'input_values': torch.randn(int(duration * AudioConfig.SAMPLE_RATE), generator=generator),
+            'labels': torch.randint(1, self.vocab_size, (label_length,), generator=generator)
+        }
+
+
+def collate_eval(batch):
+    """input_values (0 bilan) va labels (-100 bilan) padding"""
+    return {
+        'input_values': torch.nn.utils.rnn.pad_sequence(
+            [item['input_values'] for item in batch], batch_first=True),
+        'labels': torch.nn.utils.rnn.pad_sequence(
+            [item['labels'] for item in batch], batch_first=True, padding_value=-100)
+    }
+
+
+def peak_rss_mb():
+    """Jarayonning eng yuqori RSS xotirasi (MB, Linux da ru_maxrss - KB)"""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def measure_eval_memory(durations, batch_size, reduce_logits, vocab_size=32):
+    """
+    Haqiqiy Trainer.evaluate: tasodifiy initsializatsiya qilingan Wav2Vec2ForCTC bilan
+
+    compute_metrics ga yetib kelgan predictions hajmi o'lchanadi (model_training.py
+    dagi compute_metrics aynan shu massivni oladi).
+    """
+    from transformers import Trainer, TrainingArguments, Wav2Vec2Config, Wav2Vec2ForCTC
+
+    torch.manual_seed(0)
+    model = Wav2Vec2ForCTC(Wav2Vec2Config(vocab_size=vocab_size))
+    captured = {}
+
+    def compute_metrics(pred):
+        captured['shape'] = list(pred.predictions.shape)
+        captured['dtype'] = str(pred.predictions.dtype)
+        captured['nbytes'] = pred.predictions.nbytes
+        return {}
+
+    output_dir = tempfile.mkdtemp(prefix="stt_eval_memory_")
+    try:
+        trainer = Trainer(
+            model=model,
+            args=TrainingArguments(output_dir=output_dir, per_device_eval_batch_size=batch_size,
+                                   report_to=[], use_cpu=True),
+            eval_dataset=SyntheticEvalDataset(durations, vocab_size),
+            data_collator=collate_eval,
+            compute_metrics=compute_metrics,
+            preprocess_logits_for_metrics=logits_to_ids if reduce_logits else None
+        )
+        started = time.perf_counter()
+        trainer.evaluate()
+        elapsed = time.perf_counter() - started
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    return {
+        'predictions_shape': captured['shape'],
+        'predictions_dtype': captured['dtype'],
+        'predictions_mb': round(captured['nbytes'] / 1024 ** 2, 2),
+        'peak_rss_mb': peak_rss_mb(),
+        'eval_s': round(elapsed, 2)
+    }
+
+
+def run_eval_memory(args):
+    """eval-memory buyrug'i"""
+    durations = None
+    if not args.synthetic and args.source.exists():
+        durations = load_duration_index(args.source, load_from_disk(str(args.source)))
+    if durations is None:
+        durations = synthetic_durations(args.synthetic or 500)
+
+    results = {
+        'split_samples': len(durations),
+        'split_hours': round(float(durations.sum()) / 3600, 2),
+        'split_estimate': accumulated_bytes(durations, args.vocab_size)
+    }
+
+    # Haqiqiy o'lchash - split boshidan --samples ta clip.
+    # ru_maxrss faqat o'sadi, shuning uchun avval ID lar, keyin to'liq logits.
+    subset = durations[:args.samples]
+    if args.samples:
+        results['measured_samples'] = len(subset)
+        results['ids'] = measure_eval_memory(subset, args.batch_size, True, args.vocab_size)
+        results['logits'] = measure_eval_memory(subset, args.batch_size, False, args.vocab_size)
+
+    estimate = results['split_estimate']
+    print(f"\n{'='*70}")
+    print(f"📊 EVAL XOTIRASI ({results['split_samples']} ta clip, {results['split_hours']} soat)")
+    print(f"{'='*70}")
+    print("Butun split bo'yicha yig'iladigan predictions (hisoblab):")
+    print(f"  logits (float32): {estimate['logits_mb']:>10.1f} MB")
+    print(f"  token ID (int64): {estimate['ids_mb']:>10.1f} MB")
+
+    if args.samples:
+        print(f"\nTrainer.evaluate ({results['measured_samples']} ta clip):")
+        print(f"{'Rejim':<10}{'Shakl':>22}{'Predictions (MB)':>18}{'Peak RSS (MB)':>15}{'Vaqt (s)':>10}")
+        print("-" * 70)
+        for name in ("ids", "logits"):
+            stats = results[name]
+            shape = "x".join(str(dim) for dim in stats['predictions_shape'])
+            print(f"{name:<10}{shape:>22}{stats['predictions_mb']:>18.2f}"
+                  f"{stats['peak_rss_mb']:>15.1f}{stats['eval_s']:>10.2f}")
+    print(f"{'='*70}")
+
+    print(f"✓ logits_to_ids: predictions {estimate['logits_mb'] / max(estimate['ids_mb'], 1e-9):.0f}x kichik")
+    return results
+
+
+def main():
+    """Asosiy funksiya"""
+    parser = argparse.ArgumentParser(description="Ma'lumotlar pipeline benchmark'lari")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    storage = subparsers.add_parser("storage", help="Audio saqlash formatlarini solishtirish")
+    storage.add_argument("--source", type=Path, default=TRAIN_TEST_DIR / "train",
+                         help="Qayta ishlangan dataset (save_to_disk papkasi)")
+    storage.add_argument("--synthetic", type=int, default=0,
+                         help="Dataset o'rniga N ta sintetik clip")
+    storage.add_argument("--limit", type=int, default=1000, help="Datasetdan olinadigan clip'lar")
+    storage.add_argument("--batch-size", type=int, default=ModelConfig.BATCH_SIZE)
+    storage.add_argument("--num-workers", type=int, default=ModelConfig.NUM_WORKERS)
+    storage.add_argument("--json", dest="json_path", help="Natijani JSON faylga yozish")
+    storage.set_defaults(func=run_storage)
+
+    sampler = subparsers.add_parser("sampler", help="Tasodifiy va uzunlik bo'yicha guruhlangan batch'lar")
+    sampler.add_argument("--source", type=Path, default=TRAIN_TEST_DIR / "train",
+                         help="Qayta ishlangan dataset (davomiylik indeksi shu yerdan)")
+    sampler.add_argument("--synthetic", type=int, default=0,
+                         help="Dataset o'rniga N ta sintetik davomiylik")
+    sampler.add_argument("--batch-size", type=int, default=ModelConfig.BATCH_SIZE,
+                         help="Tasodifiy sampler batch hajmi")
+    sampler.add_argument("--max-batch-seconds", type=float, default=ModelConfig.MAX_BATCH_SECONDS)
+    sampler.add_argument("--steps", type=int, default=10,
+                         help="Har bir sampler uchun o'lchanadigan training step'lar (0 - o'lchamaslik)")
+    sampler.add_argument("--json", dest="json_path", help="Natijani JSON faylga yozish")
+    sampler.set_defaults(func=run_sampler)
+
+    eval_memory = subparsers.add_parser("eval-memory", help="Evaluation da yig'iladigan predictions hajmi")
+    eval_memory.add_argument("--source", type=Path, default=TRAIN_TEST_DIR / "validation",
+                             help="Validation split (davomiylik indeksi shu yerdan)")
+    eval_memory.add_argument("--synthetic", type=int, default=0,
+                             help="Dataset o'rniga N ta sintetik davomiylik")
+    eval_memory.add_argument("--samples", type=int, default=64,
+                             help="Trainer.evaluate bilan o'lchanadigan clip'lar (0 - faqat hisoblash)")
+    eval_memory.add_argument("--batch-size", type=int, default=EvalConfig.TEST_BATCH_SIZE)
+    eval_memory.add_argument("--vocab-size", type=int, default=32, help="Tokenizer lug'at hajmi")
+    eval_memory.add_argument("--json", dest="json_path", help="Natijani JSON faylga yozish")
+    eval_memory.set_defaults(func=run_eval_memory)
+
+    args = parser.parse_args()
+
+    if args.command == "storage" and not args.synthetic and not args.source.exists():
+        print(f"⚠ Dataset topilmadi: {args.source} - sintetik 200 ta clip ishlatiladi")
+        args.synthetic = 200
+
+    results = args.func(args)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"💾 Natija saqlandi: {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,17 @@ Ma'lumotlarni tayyorlash va qayta ishlash
 Parquet fayldan audio va text ma'lumotlarni o'qish va tayorlash
 """
 
+import io
+import time
 import pandas as pd
 import numpy as np
 import librosa
 import soundfile as sf
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
 from tqdm import tqdm
 import torch
@@ -19,6 +26,224 @@ from config import (
     RAW_DATA_DIR, PROCESSED_DATA_DIR, TRAIN_TEST_DIR,
     ModelConfig, AudioConfig, DataConfig
 )
+from audio_storage import audio_features, encode_audio
+from sampler import save_duration_index
+
+
+def decode_audio(source, sample_rate=AudioConfig.SAMPLE_RATE,
+                 max_audio_length=AudioConfig.MAX_AUDIO_LENGTH,
+                 normalize=AudioConfig.NORMALIZE_AUDIO):
+    """
+    Audio ni decode qilish, resample, normalizatsiya va uzunlikni cheklash
+    Worker jarayonlarda ham ishlaydi (klass va processor ga bog'liq emas).
+    
+    Args:
+        source: Fayl yo'li, bytes yoki {'bytes', 'path'} dict
+        sample_rate: Kerakli sample rate
+        max_audio_length: Maksimal uzunlik (soniya), None - cheklanmaydi
+        normalize: Normalizatsiya qilish
+        
+    Returns:
+        numpy array: float32 audio signal (xato bo'lsa exception)
+    """
+    # Parquet dagi Audio struct ({'bytes': ..., 'path': ...})
+    if isinstance(source, dict):
+        source = source.get('bytes') or source.get('path')
+    
+    # Agar fayl yo'li bo'lsa
+    if isinstance(source, (str, Path)):
+        audio, sr = librosa.load(source, sr=sample_rate, mono=True)
+    # Agar bytes bo'lsa
+    elif isinstance(source, bytes):
+        audio, sr = sf.read(io.BytesIO(source), dtype='float32')
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1)
+        if sr != sample_rate:
+            audio = librosa.resample(audio, orig_sr=sr, target_sr=sample_rate)
+    else:
+        raise ValueError(f"Noma'lum audio format: {type(source)}")
+    
+    # Maksimal uzunlikni cheklash (normalizatsiyadan oldin - ortiqcha hisob yo'q)
+    if max_audio_length is not None:
+        max_samples = int(max_audio_length * sample_rate)
+        if len(audio) > max_samples:
+            audio = audio[:max_samples]
+    
+    # Audio normalizatsiya
+    if normalize:
+        audio = librosa.util.normalize(audio)
+    
+    return audio.astype(np.float32, copy=False)
+
+
+def clean_text(text, max_text_length=DataConfig.MAX_TEXT_LENGTH):
+    """Matnni tozalash: ortiqcha bo'shliqlar va uzunlik chegarasi"""
+    if not isinstance(text, str):
+        return ""
+    
+    # Bo'sh joylarni tozalash va ortiqcha bo'shliqlarni olib tashlash
+    text = " ".join(text.split())
+    
+    # Kichik harflarga o'tkazish (opsional)
+    # text = text.lower()
+    
+    return text[:max_text_length]
+
+
+def find_parquet_files(source):
+    """
+    Parquet fayllar ro'yxati
+    
+    Args:
+        source: Fayl, papka (ichidagi *.parquet), glob ("part-*.parquet") yoki ularning ro'yxati
+        
+    Returns:
+        list: Mavjud parquet fayllar (tartiblangan)
+    """
+    if isinstance(source, (list, tuple)):
+        return [path for item in source for path in find_parquet_files(item)]
+    
+    path = Path(source)
+    if path.is_dir():
+        return sorted(path.glob("*.parquet"))
+    if any(char in path.name for char in "*?["):
+        return sorted(path.parent.glob(path.name))
+    return [path] if path.exists() else []
+
+
+def parquet_fingerprint(files):
+    """
+    Fayllar (yo'l, hajm, o'zgartirilgan vaqt) - from_generator kesh kaliti uchun
+    Fayl o'zgarsa kesh qayta quriladi, DataFrame ni hash qilish kerak emas.
+    """
+    return [(str(path), path.stat().st_size, path.stat().st_mtime_ns) for path in map(Path, files)]
+
+
+def iter_parquet_rows(files, batch_size=DataConfig.PARQUET_BATCH_SIZE):
+    """
+    Parquet fayllardan qatorlarni record batch bo'yicha o'qish
+    
+    Faqat DataConfig.AUDIO_COLUMN va TEXT_COLUMN o'qiladi; xotirada bir vaqtda
+    bitta batch (va u tegishli row group ustunlari) turadi.
+    
+    Yields:
+        (qator raqami, audio, matn)
+    """
+    columns = [DataConfig.AUDIO_COLUMN, DataConfig.TEXT_COLUMN]
+    idx = 0
+    
+    for path in files:
+        parquet_file = pq.ParquetFile(path)
+        
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+            audio = batch.column(DataConfig.AUDIO_COLUMN).to_pylist()
+            texts = batch.column(DataConfig.TEXT_COLUMN).to_pylist()
+            
+            for source, text in zip(audio, texts):
+                yield idx, source, text
+                idx += 1
+
+
+def process_chunk(rows, settings):
+    """
+    Bo'lakdagi qatorlarni qayta ishlash (worker jarayonda)
+    
+    Args:
+        rows: (qator raqami, audio, matn) lar ro'yxati
+        settings: decode_audio / clean_text sozlamalari
+        
+    Returns:
+        list: (qator raqami, misol yoki None, xato matni yoki None)
+    """
+    results = []
+    
+    for idx, source, text in rows:
+        try:
+            # Matn birinchi - bo'sh matnli audio ni decode qilib o'tirmaslik uchun
+            text = clean_text(text, settings['max_text_length'])
+            if not text:
+                results.append((idx, None, "bo'sh matn"))
+                continue
+            
+            audio = decode_audio(source, settings['sample_rate'],
+                                 settings['max_audio_length'], settings['normalize'])
+            results.append((idx, {
+                'audio': encode_audio(audio, settings['sample_rate'], settings['storage']),
+                'text': text,
+                'sampling_rate': settings['sample_rate'],
+                'duration': len(audio) / settings['sample_rate']
+            }, None))
+            
+        except Exception as e:
+            results.append((idx, None, str(e)))
+    
+    return results
+
+
+def iter_processed(rows, settings, num_proc=DataConfig.NUM_PROC,
+                   chunk_size=DataConfig.CHUNK_SIZE, max_in_flight=DataConfig.MAX_IN_FLIGHT):
+    """
+    Qatorlarni worker jarayonlarda qayta ishlash (tartib saqlanadi)
+    
+    Bir vaqtda ko'pi bilan num_proc * max_in_flight bo'lak ishlanadi yoki
+    natijasi kutilmoqda - xotira dataset hajmiga emas, shu songa bog'liq.
+    
+    Args:
+        rows: (qator raqami, audio, matn) iteratori
+        settings: decode_audio / clean_text sozlamalari
+        num_proc: Worker jarayonlar soni (1 - shu jarayonda)
+        chunk_size: Bitta bo'lakdagi qatorlar
+        max_in_flight: Har bir worker uchun navbatdagi bo'laklar
+        
+    Yields:
+        (qator raqami, misol yoki None, xato matni yoki None)
+    """
+    rows = iter(rows)
+    chunks = iter(lambda: list(islice(rows, chunk_size)), [])
+    
+    if num_proc <= 1:
+        for chunk in chunks:
+            yield from process_chunk(chunk, settings)
+        return
+    
+    with ProcessPoolExecutor(max_workers=num_proc) as executor:
+        pending = deque()
+        
+        for chunk in chunks:
+            pending.append(executor.submit(process_chunk, chunk, settings))
+            if len(pending) >= num_proc * max_in_flight:
+                yield from pending.popleft().result()
+        
+        while pending:
+            yield from pending.popleft().result()
+
+
+def generate_examples(source, settings, num_proc, total=None):
+    """
+    Dataset.from_generator uchun generator - misollar Arrow fayllarga oqim bilan yoziladi
+    
+    Args:
+        source: parquet_fingerprint() natijasi yoki DataFrame (audio va matn ustunlari)
+        settings: decode_audio / clean_text sozlamalari
+        num_proc: Worker jarayonlar soni
+        total: Jami qatorlar (progress bar uchun)
+    """
+    if isinstance(source, pd.DataFrame):
+        rows = zip(source.index, source[DataConfig.AUDIO_COLUMN], source[DataConfig.TEXT_COLUMN])
+    else:
+        rows = iter_parquet_rows([path for path, _, _ in source])
+    failed = 0
+    
+    for idx, example, error in tqdm(iter_processed(rows, settings, num_proc),
+                                    total=total, desc="Processing", unit="clip"):
+        if example is None:
+            failed += 1
+            # Ko'p xato bo'lsa terminalni to'ldirmaslik uchun faqat birinchilari
+            if failed <= 20:
+                print(f"⚠ {idx}-qatorda xato: {error}")
+            continue
+        
+        yield example
 
 
 class DataPreprocessor:
@@ -38,30 +263,50 @@ class DataPreprocessor:
         
     def load_parquet(self, parquet_path):
         """
-        Parquet faylni yukash
+        Parquet fayl(lar)ni tekshirish - ma'lumotlar o'qilmaydi, faqat metadata
+        
+        Qatorlar process_dataset da record batch bo'yicha o'qiladi (iter_parquet_rows).
         
         Args:
-            parquet_path: Parquet fayl yo'li
+            parquet_path: Parquet fayl, papka, glob yoki ularning ro'yxati
             
         Returns:
-            DataFrame: Yuklangan ma'lumotlar
+            list: Parquet fayllar
         """
         print(f"\n{'='*50}")
-        print(f"Parquet fayl yuklanmoqda: {parquet_path}")
+        print(f"Parquet fayl tekshirilmoqda: {parquet_path}")
         print(f"{'='*50}")
         
-        df = pd.read_parquet(parquet_path)
+        files = find_parquet_files(parquet_path)
+        if not files:
+            raise FileNotFoundError(f"Parquet fayl topilmadi: {parquet_path}")
+        
+        metadata = [pq.ParquetFile(path).metadata for path in files]
+        columns = pq.ParquetFile(files[0]).schema_arrow.names
         
-        print(f"✓ Jami qatorlar: {len(df)}")
-        print(f"✓ Ustunlar: {list(df.columns)}")
-        print(f"\nBirinchi qator ko'rinishi:")
-        print(df.head(1))
+        for column in (DataConfig.AUDIO_COLUMN, DataConfig.TEXT_COLUMN):
+            if column not in columns:
+                raise ValueError(f"'{column}' ustuni topilmadi. Ustunlar: {columns}")
         
-        return df
+        print(f"✓ Fayllar: {len(files)} ta")
+        print(f"✓ Jami qatorlar: {sum(meta.num_rows for meta in metadata)}")
+        print(f"✓ Row group'lar: {sum(meta.num_row_groups for meta in metadata)}")
+        print(f"✓ Ustunlar: {columns}")
+        
+        # Birinchi qator matni (faqat matn ustuni o'qiladi)
+        first = next(pq.ParquetFile(files[0]).iter_batches(batch_size=1, columns=[DataConfig.TEXT_COLUMN]), None)
+        if first is not None and first.num_rows:
+            print(f"\nBirinchi qator matni: {first.column(DataConfig.TEXT_COLUMN)[0].as_py()}")
+        
+        return files
     
     def load_audio(self, audio_path_or_bytes):
         """
-        Audio faylni yuklash va qayta ishlash
+        Audio faylni yuklash va qayta ishlash (inference / uzun audio uchun)
+        
+        Uzunlik cheklanmaydi - MAX_AUDIO_LENGTH faqat training dataset uchun.
+        Uzun audio ni InferenceConfig.CHUNK_LENGTH_S bo'laklarga
+        SpeechToTextInference.transcribe_long ajratadi.
         
         Args:
             audio_path_or_bytes: Fayl yo'li yoki bytes
@@ -70,36 +315,7 @@ class DataPreprocessor:
             numpy array: Audio signal
         """
         try:
-            # Agar fayl yo'li bo'lsa
-            if isinstance(audio_path_or_bytes, (str, Path)):
-                audio, sr = librosa.load(
-                    audio_path_or_bytes, 
-                    sr=self.sample_rate,
-                    mono=True
-                )
-            # Agar bytes bo'lsa
-            elif isinstance(audio_path_or_bytes, bytes):
-                import io
-                audio, sr = sf.read(io.BytesIO(audio_path_or_bytes))
-                if sr != self.sample_rate:
-                    audio = librosa.resample(
-                        audio, 
-                        orig_sr=sr, 
-                        target_sr=self.sample_rate
-                    )
-            else:
-                raise ValueError(f"Noma'lum audio format: {type(audio_path_or_bytes)}")
-            
-            # Audio normalizatsiya
-            if AudioConfig.NORMALIZE_AUDIO:
-                audio = librosa.util.normalize(audio)
-            
-            # Maksimal uzunlikni cheklash
-            max_samples = int(self.max_audio_length * self.sample_rate)
-            if len(audio) > max_samples:
-                audio = audio[:max_samples]
-            
-            return audio
+            return decode_audio(audio_path_or_bytes, self.sample_rate, max_audio_length=None)
             
         except Exception as e:
             print(f"⚠ Audio yuklashda xato: {e}")
@@ -115,75 +331,87 @@ class DataPreprocessor:
         Returns:
             str: Tozalangan matn
         """
-        if not isinstance(text, str):
-            return ""
-        
-        # Bo'sh joylarni tozalash
-        text = text.strip()
-        
-        # Ortiqcha bo'shliqlarni olib tashlash
-        text = " ".join(text.split())
-        
-        # Kichik harflarga o'tkazish (opsional)
-        # text = text.lower()
-        
-        # Maksimal uzunlikni cheklash
-        if len(text) > self.max_text_length:
-            text = text[:self.max_text_length]
-        
-        return text
+        return clean_text(text, self.max_text_length)
     
-    def process_dataset(self, df):
+    def audio_settings(self):
+        """Worker jarayonlarga beriladigan sozlamalar"""
+        return {
+            'sample_rate': self.sample_rate,
+            'max_audio_length': self.max_audio_length,
+            'normalize': AudioConfig.NORMALIZE_AUDIO,
+            'max_text_length': self.max_text_length,
+            'storage': AudioConfig.STORAGE_FORMAT
+        }
+    
+    def process_dataset(self, source, num_proc=DataConfig.NUM_PROC):
         """
         Butun datasetni qayta ishlash
         
+        Parquet qatorlari record batch bo'yicha o'qiladi, audio worker jarayonlarda
+        parallel decode qilinadi va natijalar Dataset.from_generator orqali darhol
+        DataConfig.CACHE_DIR dagi Arrow keshga WRITER_BATCH_SIZE tadan yoziladi
+        (shard hajmi - datasets kutubxonasi default'i; MAX_SHARD_SIZE faqat
+        save_dataset dagi save_to_disk uchun) - na parquet, na qayta ishlangan
+        korpus xotiraga to'liq yuklanmaydi.
+        Audio AudioConfig.STORAGE_FORMAT da (float32 / int16 / flac) saqlanadi.
+        
         Args:
-            df: Pandas DataFrame
+            source: Parquet fayl(lar) (load_parquet natijasi) yoki Pandas DataFrame
+            num_proc: Worker jarayonlar soni
             
         Returns:
-            Dataset: Hugging Face Dataset
+            Dataset: Hugging Face Dataset (disk dagi Arrow fayllar)
         """
         print(f"\n{'='*50}")
-        print("Dataset qayta ishlanmoqda...")
+        print(f"Dataset qayta ishlanmoqda... ({num_proc} ta jarayon)")
         print(f"{'='*50}")
         
-        processed_data = []
-        
-        for idx, row in tqdm(df.iterrows(), total=len(df), desc="Processing"):
-            try:
-                # Audio yuklash
-                audio_data = self.load_audio(row[DataConfig.AUDIO_COLUMN])
-                if audio_data is None:
-                    continue
-                
-                # Matnni qayta ishlash
-                text = self.preprocess_text(row[DataConfig.TEXT_COLUMN])
-                if not text:
-                    continue
-                
-                # Ma'lumotni qo'shish
-                processed_data.append({
-                    'audio': audio_data,
-                    'text': text,
-                    'sampling_rate': self.sample_rate
-                })
-                
-            except Exception as e:
-                print(f"⚠ {idx}-qatorda xato: {e}")
-                continue
+        if isinstance(source, pd.DataFrame):
+            source = source[[DataConfig.AUDIO_COLUMN, DataConfig.TEXT_COLUMN]]
+            total = len(source)
+        else:
+            files = find_parquet_files(source)
+            total = sum(pq.ParquetFile(path).metadata.num_rows for path in files)
+            source = parquet_fingerprint(files)
+        
+        started = time.perf_counter()
+        
+        dataset = Dataset.from_generator(
+            generate_examples,
+            features=audio_features(AudioConfig.STORAGE_FORMAT),
+            cache_dir=str(DataConfig.CACHE_DIR),
+            writer_batch_size=DataConfig.WRITER_BATCH_SIZE,
+            gen_kwargs={
+                'source': source,
+                'settings': self.audio_settings(),
+                'num_proc': num_proc,
+                'total': total
+            }
+        )
         
-        print(f"\n✓ Muvaffaqiyatli qayta ishlandi: {len(processed_data)} ta")
-        print(f"✗ Xato bo'lgan: {len(df) - len(processed_data)} ta")
+        elapsed = time.perf_counter() - started
         
-        # Hugging Face Dataset ga o'tkazish
-        dataset = Dataset.from_dict({
-            'audio': [x['audio'] for x in processed_data],
-            'text': [x['text'] for x in processed_data],
-            'sampling_rate': [x['sampling_rate'] for x in processed_data]
-        })
+        print(f"\n✓ Muvaffaqiyatli qayta ishlandi: {len(dataset)} ta")
+        print(f"✗ Xato bo'lgan: {total - len(dataset)} ta")
+        self.report_throughput(dataset, elapsed)
         
         return dataset
     
+    def report_throughput(self, dataset, elapsed):
+        """
+        Qayta ishlash tezligi: clip/s va audio-soat/s
+        
+        Audio uzunligi duration ustunidan olinadi (audio o'qilmaydi).
+        """
+        audio_seconds = pc.sum(dataset.data.column('duration')).as_py() or 0
+        elapsed = max(elapsed, 1e-9)
+        
+        print(f"\n⏱ Vaqt: {elapsed:.1f} s")
+        print(f"  • Audio: {audio_seconds / 3600:.2f} soat")
+        print(f"  • Tezlik: {len(dataset) / elapsed:.1f} clip/s, "
+              f"{audio_seconds / 3600 / elapsed:.4f} audio-soat/s "
+              f"({audio_seconds / elapsed:.0f}x real vaqt)")
+    
     def prepare_dataset_for_training(self, batch):
         """
         Training uchun batchni tayyorlash
@@ -276,8 +504,11 @@ class DataPreprocessor:
         # Har bir split ni alohida saqlash
         for split_name, split_dataset in dataset_dict.items():
             split_path = output_dir / split_name
-            split_dataset.save_to_disk(str(split_path))
-            print(f"✓ {split_name} saqlandi: {split_path}")
+            split_dataset.save_to_disk(str(split_path), max_shard_size=DataConfig.MAX_SHARD_SIZE)
+            
+            # Davomiylik indeksi (uzunlik bo'yicha guruhlangan sampler uchun)
+            durations = save_duration_index(split_dataset, split_path)
+            print(f"✓ {split_name} saqlandi: {split_path} ({durations.sum() / 3600:.2f} soat audio)")
 
 
 def main():
@@ -292,20 +523,20 @@ def main():
     # Preprocessor yaratish
     preprocessor = DataPreprocessor()
     
-    # Parquet faylni yuklash
+    # Parquet fayl(lar)ni tekshirish
     parquet_path = RAW_DATA_DIR / DataConfig.PARQUET_FILE
     
-    if not parquet_path.exists():
+    if not find_parquet_files(parquet_path):
         print(f"⚠ XATO: Parquet fayl topilmadi: {parquet_path}")
         print(f"\nIltimos, Parquet faylni quyidagi papkaga joylashtiring:")
         print(f"  {RAW_DATA_DIR}/")
         print(f"\nYoki config.py faylda PARQUET_FILE nomini o'zgartiring")
         return
     
-    df = preprocessor.load_parquet(parquet_path)
+    parquet_files = preprocessor.load_parquet(parquet_path)
     
-    # Datasetni qayta ishlash
-    dataset = preprocessor.process_dataset(df)
+    # Datasetni qayta ishlash (batch bo'yicha o'qish)
+    dataset = preprocessor.process_dataset(parquet_files)
     
     # Train/valid/test ga bo'lish
     dataset_dict = preprocessor.split_dataset(dataset)
@@ -3,15 +3,110 @@ Inference - Yangi Audio Fayllarni Transkripsiya Qilish
 Train qilingan modeldan foydalanib yangi audio fayllarni matnга o'girish
 """
 
+import json
+import time
 import torch
 import librosa
 import soundfile as sf
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
 from pathlib import Path
 import warnings
 warnings.filterwarnings('ignore')
 
-from config import FINAL_MODEL_DIR, AudioConfig
+from config import FINAL_MODEL_DIR, AudioConfig, InferenceConfig
+
+
+def read_audio(audio_path, sample_rate=AudioConfig.SAMPLE_RATE):
+    """
+    Audio faylni o'qish, mono va sample_rate ga o'tkazish, normalizatsiya
+    
+    Args:
+        audio_path: Audio fayl yo'li
+        sample_rate: Kerakli sample rate
+        
+    Returns:
+        numpy array: float32 signal
+    """
+    audio, _ = librosa.load(audio_path, sr=sample_rate, mono=True)
+    
+    if AudioConfig.NORMALIZE_AUDIO and len(audio):
+        audio = librosa.util.normalize(audio)
+    
+    return audio
+
+
+def audio_duration(audio_path):
+    """Fayl davomiyligi (soniya) - faqat sarlavha o'qiladi, audio decode qilinmaydi"""
+    try:
+        return sf.info(str(audio_path)).duration
+    except RuntimeError:
+        # soundfile ochmaydigan formatlar (mp3/m4a eski libsndfile da)
+        return librosa.get_duration(path=str(audio_path))
+
+
+def duration_batches(durations, max_batch_seconds=InferenceConfig.BATCH_SECONDS,
+                     max_batch_size=InferenceConfig.MAX_BATCH_SIZE):
+    """
+    Fayllarni davomiylik bo'yicha (eng uzunlari birinchi) batch'larga ajratish
+    
+    Batch chegarasi: fayllar soni * eng uzun fayl <= max_batch_seconds va
+    fayllar soni <= max_batch_size. Yonma-yon fayllar uzunligi yaqin - padding kam.
+    
+    Args:
+        durations: Har bir fayl davomiyligi (soniya)
+        max_batch_seconds: Padding bilan batchdagi maksimal audio
+        max_batch_size: Batchdagi maksimal fayllar
+        
+    Returns:
+        list: Indekslar ro'yxatlari
+    """
+    order = sorted(range(len(durations)), key=lambda idx: -durations[idx])
+    batches = []
+    batch = []
+    
+    for idx in order:
+        # Tartib kamayuvchi - batchdagi birinchi fayl eng uzuni
+        longest = durations[batch[0]] if batch else durations[idx]
+        if batch and (len(batch) >= max_batch_size or longest * (len(batch) + 1) > max_batch_seconds):
+            batches.append(batch)
+            batch = []
+        batch.append(idx)
+    
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def chunk_spans(num_samples, chunk_samples, stride_samples):
+    """
+    Uzun audio ni bir-birini qoplaydigan bo'laklarga ajratish
+    
+    Har bir bo'lak chetlarida stride_samples kontekst bor (birinchi bo'lak boshi va
+    oxirgi bo'lak oxiridan tashqari). Chet kontekstlari tashlanganda qolgan qismlar
+    audio ni bo'shliqsiz va takrorlanmasdan qoplaydi.
+    
+    Args:
+        num_samples: Audio uzunligi (sample)
+        chunk_samples: Bo'lak uzunligi
+        stride_samples: Har bir chetdagi kontekst
+        
+    Returns:
+        list: (boshlanish, tugash, chap_kontekst, o'ng_kontekst) - sample larda
+    """
+    step = chunk_samples - 2 * stride_samples
+    if step <= 0:
+        raise ValueError("Bo'lak uzunligi 2 * stride dan katta bo'lishi kerak")
+    
+    spans = []
+    for start in range(0, num_samples, step):
+        end = min(start + chunk_samples, num_samples)
+        spans.append((start, end, stride_samples if start > 0 else 0,
+                      stride_samples if end < num_samples else 0))
+        if end >= num_samples:
+            break
+    return spans
 
 
 class SpeechToTextInference:
@@ -55,16 +150,8 @@ class SpeechToTextInference:
         """
         print(f"\n📂 Audio yuklanmoqda: {audio_path}")
         
-        # Audio yuklash
-        audio, sr = librosa.load(
-            audio_path,
-            sr=self.sample_rate,
-            mono=True
-        )
-        
-        # Normalizatsiya
-        if AudioConfig.NORMALIZE_AUDIO:
-            audio = librosa.util.normalize(audio)
+        # Audio yuklash va normalizatsiya
+        audio = read_audio(audio_path, self.sample_rate)
         
         print(f"✓ Audio yuklandi")
         print(f"  • Uzunligi: {len(audio)/self.sample_rate:.2f} soniya")
@@ -87,50 +174,215 @@ class SpeechToTextInference:
         
         # Processing
         print("\n🔄 Transkripsiya qilinmoqda...")
+        return self.transcribe_long(audio)
+    
+    def forward(self, audios):
+        """
+        Audio signallar uchun bitta padding qilingan forward pass
+        
+        Args:
+            audios: float32 signallar ro'yxati (sample_rate da)
+            
+        Returns:
+            (logits tensor, kadr/sample nisbati)
+        """
         inputs = self.processor(
-            audio,
+            audios,
             sampling_rate=self.sample_rate,
             return_tensors="pt",
             padding=True
         )
         
-        # Prediction
+        # Attention mask - processor qaytarsa (wav2vec2-base kabi modellar faqat
+        # nol bilan padding kutadi, shuning uchun batch'lar uzunlik bo'yicha tuziladi)
+        attention_mask = inputs.get("attention_mask")
+        
         with torch.no_grad():
             logits = self.model(
                 inputs.input_values.to(self.device),
-                attention_mask=inputs.attention_mask.to(self.device)
+                attention_mask=attention_mask.to(self.device) if attention_mask is not None else None
             ).logits
         
+        return logits, logits.shape[1] / inputs.input_values.shape[1]
+    
+    def transcribe_arrays(self, audios):
+        """
+        Audio signallarni bitta padding qilingan batch da transkripsiya qilish
+        
+        Args:
+            audios: float32 signallar ro'yxati (sample_rate da)
+            
+        Returns:
+            list: Transkripsiyalar (audios tartibida)
+        """
+        logits, _ = self.forward(audios)
+        
         # Decode
         predicted_ids = torch.argmax(logits, dim=-1)
-        transcription = self.processor.batch_decode(predicted_ids)[0]
+        return self.processor.batch_decode(predicted_ids)
+    
+    def transcribe_long(self, audio, chunk_length_s=InferenceConfig.CHUNK_LENGTH_S,
+                        stride_length_s=InferenceConfig.STRIDE_LENGTH_S,
+                        batch_size=InferenceConfig.CHUNK_BATCH_SIZE):
+        """
+        Istalgan uzunlikdagi audio ni bo'laklab transkripsiya qilish
+        
+        Audio chunk_length_s li, chetlarida stride_length_s kontekst bilan qoplanadigan
+        bo'laklarga ajratiladi va batch_size tadan forward qilinadi. Har bir bo'lak
+        logits'idan chet kontekst kadrlari tashlanadi, qolganlari ketma-ket ulanadi va
+        CTC decode bitta butun ketma-ketlikda bajariladi - bo'lak chegarasidagi so'zlar
+        kesilmaydi. Xotira bo'lak hajmi bilan cheklangan, vaqt audio uzunligiga chiziqli.
         
-        return transcription
+        Args:
+            audio: float32 signal (sample_rate da)
+            chunk_length_s: Bo'lak uzunligi (soniya)
+            stride_length_s: Har bir chetdagi kontekst (soniya)
+            batch_size: Bitta forward pass dagi bo'laklar
+            
+        Returns:
+            str: Transkripsiya
+        """
+        chunk_samples = int(chunk_length_s * self.sample_rate)
+        
+        if len(audio) <= chunk_samples:
+            return self.transcribe_arrays([audio])[0]
+        
+        spans = chunk_spans(len(audio), chunk_samples, int(stride_length_s * self.sample_rate))
+        pieces = []
+        
+        for start in range(0, len(spans), batch_size):
+            batch_spans = spans[start:start + batch_size]
+            logits, ratio = self.forward([audio[begin:end] for begin, end, _, _ in batch_spans])
+            
+            # Kadr bo'yicha argmax, so'ng kontekst kadrlarini tashlash - faqat token
+            # ID lar saqlanadi (logits ni kesib argmax qilish bilan bir xil natija)
+            predicted_ids = torch.argmax(logits, dim=-1)
+            for row, (begin, end, left, right) in enumerate(batch_spans):
+                frames = int(round((end - begin) * ratio))
+                first = int(round(left * ratio))
+                last = frames - int(round(right * ratio))
+                pieces.append(predicted_ids[row, first:last])
+        
+        # Ulangan ketma-ketlik bitta CTC decode (takrorlar va blank'lar chegarada ham birlashadi)
+        return self.processor.decode(torch.cat(pieces))
     
-    def transcribe_batch(self, audio_paths):
+    def transcribe_batch(self, audio_paths, output_file=None,
+                         max_batch_seconds=InferenceConfig.BATCH_SECONDS,
+                         max_batch_size=InferenceConfig.MAX_BATCH_SIZE,
+                         num_threads=InferenceConfig.LOAD_THREADS):
         """
-        Bir nechta audio faylni transkripsiya qilish
+        Bir nechta audio faylni batch bo'yicha transkripsiya qilish
+        
+        Fayllar davomiylik bo'yicha batch'larga guruhlanadi, audio thread pool da
+        oldindan yuklanadi (keyingi batch'lar model ishlayotganda tayyorlanadi) va
+        har bir batch bitta forward pass da transkripsiya qilinadi (CHUNK_LENGTH_S dan
+        uzun fayllar - transcribe_long bilan bo'laklab). output_file
+        berilsa, natijalar tayyor bo'lishi bilan JSONL qatorlari sifatida yoziladi.
         
         Args:
             audio_paths: Audio fayllar ro'yxati
+            output_file: JSONL fayl ({"file", "text", "duration"} yoki {"file", "error"})
+            max_batch_seconds: Padding bilan batchdagi maksimal audio (soniya)
+            max_batch_size: Batchdagi maksimal fayllar
+            num_threads: Audio yuklash thread'lari
             
         Returns:
-            list: Transkripsiya qilingan matnlar
+            list: Transkripsiya qilingan matnlar (audio_paths tartibida, xato bo'lsa None)
         """
+        audio_paths = [Path(path) for path in audio_paths]
+        
         print(f"\n{'='*60}")
         print(f"Batch transkripsiya: {len(audio_paths)} ta fayl")
         print(f"{'='*60}")
         
-        transcriptions = []
+        transcriptions = [None] * len(audio_paths)
+        chunk_samples = int(InferenceConfig.CHUNK_LENGTH_S * self.sample_rate)
+        audio_seconds = 0.0
+        done = failed = 0
+        started = time.perf_counter()
         
-        for i, audio_path in enumerate(audio_paths, 1):
-            print(f"\n[{i}/{len(audio_paths)}]")
-            transcription = self.transcribe(audio_path)
-            transcriptions.append(transcription)
-            print(f"✓ Natija: {transcription}")
+        output = open(output_file, 'w', encoding='utf-8') if output_file else None
+        
+        def write(record):
+            if output:
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        
+        try:
+            with ThreadPoolExecutor(max_workers=num_threads) as executor:
+                # Davomiyliklar (sarlavhadan) - o'qib bo'lmaydigan fayllar 0 soniya
+                durations = [duration or 0.0 for duration in executor.map(self._safe_duration, audio_paths)]
+                
+                batches = duration_batches(durations, max_batch_seconds, max_batch_size)
+                print(f"✓ {len(batches)} ta batch ({sum(durations):.1f} soniya audio)")
+                
+                # Audio yuklash: bir vaqtda PREFETCH_BATCHES ta batch navbatda
+                pending = deque()
+                batch_iter = iter(batches)
+                
+                def submit_next():
+                    indices = next(batch_iter, None)
+                    if indices is not None:
+                        pending.append((indices, [executor.submit(read_audio, audio_paths[idx], self.sample_rate)
+                                                  for idx in indices]))
+                
+                for _ in range(InferenceConfig.PREFETCH_BATCHES):
+                    submit_next()
+                
+                while pending:
+                    indices, futures = pending.popleft()
+                    submit_next()
+                    
+                    loaded = []
+                    for idx, future in zip(indices, futures):
+                        try:
+                            loaded.append((idx, future.result()))
+                        except Exception as e:
+                            failed += 1
+                            write({"file": str(audio_paths[idx]), "error": str(e)})
+                            print(f"❌ {audio_paths[idx].name}: {e}")
+                    
+                    if not loaded:
+                        continue
+                    
+                    # Qisqa fayllar - bitta forward pass, CHUNK_LENGTH_S dan uzunlari - bo'laklab
+                    short = [(idx, audio) for idx, audio in loaded if len(audio) <= chunk_samples]
+                    texts = dict(zip([idx for idx, _ in short],
+                                     self.transcribe_arrays([audio for _, audio in short]))) if short else {}
+                    
+                    for idx, audio in loaded:
+                        text = texts[idx] if idx in texts else self.transcribe_long(audio)
+                        transcriptions[idx] = text
+                        duration = len(audio) / self.sample_rate
+                        audio_seconds += duration
+                        write({"file": str(audio_paths[idx]), "text": text, "duration": round(duration, 2)})
+                    
+                    if output:
+                        output.flush()
+                    
+                    done += len(loaded)
+                    print(f"  [{done + failed}/{len(audio_paths)}] batch: {len(loaded)} ta fayl, "
+                          f"{max(len(audio) for _, audio in loaded) / self.sample_rate:.1f}s eng uzuni")
+        finally:
+            if output:
+                output.close()
+        
+        elapsed = time.perf_counter() - started
+        print(f"\n✓ Transkripsiya qilindi: {done} ta fayl, {audio_seconds:.1f} soniya audio, {elapsed:.1f}s")
+        if audio_seconds:
+            print(f"  • RTF: {elapsed / audio_seconds:.3f} (1 soniya audio uchun sarflangan vaqt)")
+        if failed:
+            print(f"⚠ Xato: {failed} ta fayl")
         
         return transcriptions
     
+    @staticmethod
+    def _safe_duration(audio_path):
+        """audio_duration, xato bo'lsa None (fayl keyin yuklashda xato sifatida yoziladi)"""
+        try:
+            return audio_duration(audio_path)
+        except Exception:
+            return None
+    
     def transcribe_from_microphone(self, duration=5):
         """
         Mikrofondan audio yozish va transkripsiya qilish
@@ -166,25 +418,7 @@ class SpeechToTextInference:
         
         # Processing
         print("\n🔄 Transkripsiya qilinmoqda...")
-        inputs = self.processor(
-            audio,
-            sampling_rate=self.sample_rate,
-            return_tensors="pt",
-            padding=True
-        )
-        
-        # Prediction
-        with torch.no_grad():
-            logits = self.model(
-                inputs.input_values.to(self.device),
-                attention_mask=inputs.attention_mask.to(self.device)
-            ).logits
-        
-        # Decode
-        predicted_ids = torch.argmax(logits, dim=-1)
-        transcription = self.processor.batch_decode(predicted_ids)[0]
-        
-        return transcription
+        return self.transcribe_long(audio)
 
 
 def demo_single_file():
@@ -238,16 +472,9 @@ def demo_batch():
     
     print(f"\n✓ Topildi: {len(audio_files)} ta audio fayl")
     
-    # Transkripsiya
-    transcriptions = inference.transcribe_batch(audio_files)
-    
-    # Natijalarni saqlash
-    output_file = folder_path / "transcriptions.txt"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        for audio_file, transcription in zip(audio_files, transcriptions):
-            f.write(f"File: {audio_file.name}\n")
-            f.write(f"Text: {transcription}\n")
-            f.write("-" * 60 + "\n")
+    # Transkripsiya - natijalar tayyor bo'lishi bilan faylga yoziladi
+    output_file = folder_path / InferenceConfig.OUTPUT_FILE
+    inference.transcribe_batch(audio_files, output_file=output_file)
     
     print(f"\n✓ Natijalar saqlandi: {output_file}")
 
@@ -3,16 +3,47 @@ Model Baholash va Test
 Train qilingan modelni test qilish va metrikalarni ko'rsatish
 """
 
+import time
 import torch
 import numpy as np
+from torch.utils.data import DataLoader
 from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
-from datasets import load_from_disk
-from jiwer import wer, cer
 from tqdm import tqdm
 import warnings
 warnings.filterwarnings('ignore')
 
-from config import TRAIN_TEST_DIR, FINAL_MODEL_DIR, ModelConfig
+from config import TRAIN_TEST_DIR, FINAL_MODEL_DIR, ModelConfig, EvalConfig, OptimizationConfig
+from audio_storage import load_audio_dataset
+from sampler import compute_durations
+from asr_metrics import score_transcripts
+
+
+class EvalCollator:
+    """
+    Baholash batch'i: audio ni processor bilan padding qilish (DataLoader worker'larida)
+    
+    Returns:
+        (input_values, attention_mask yoki None, batchdagi audio soniyalari)
+    """
+    
+    def __init__(self, processor):
+        self.processor = processor
+    
+    def __call__(self, samples):
+        inputs = self.processor(
+            [sample["audio"] for sample in samples],
+            sampling_rate=samples[0]["sampling_rate"],
+            return_tensors="pt",
+            padding=True
+        )
+        seconds = sum(len(sample["audio"]) / sample["sampling_rate"] for sample in samples)
+        return inputs.input_values, inputs.get("attention_mask"), seconds
+
+
+def length_sorted_batches(durations, batch_size):
+    """Indekslar davomiylik bo'yicha (eng uzunlari birinchi) batch'larga bo'lingan"""
+    order = np.argsort(-np.asarray(durations), kind='stable')
+    return [order[i:i + batch_size].tolist() for i in range(0, len(order), batch_size)]
 
 
 class ModelEvaluator:
@@ -54,7 +85,7 @@ class ModelEvaluator:
         print("Test dataset yuklanmoqda...")
         print(f"{'='*60}")
         
-        test_dataset = load_from_disk(str(TRAIN_TEST_DIR / "test"))
+        test_dataset = load_audio_dataset(TRAIN_TEST_DIR / "test")
         print(f"✓ Test samples: {len(test_dataset)}")
         
         return test_dataset
@@ -78,60 +109,97 @@ class ModelEvaluator:
             padding=True
         )
         
+        return self.transcribe_inputs(inputs.input_values, inputs.get("attention_mask"))[0]
+    
+    def transcribe_inputs(self, input_values, attention_mask=None):
+        """
+        Padding qilingan batch ni transkripsiya qilish (bitta forward pass)
+        
+        Args:
+            input_values: (batch, samples) tensor
+            attention_mask: Padding maskasi (processor qaytarsa)
+            
+        Returns:
+            list: Transkripsiyalar
+        """
         # Model bilan prediction
         with torch.no_grad():
             logits = self.model(
-                inputs.input_values.to(self.device),
-                attention_mask=inputs.attention_mask.to(self.device)
+                input_values.to(self.device),
+                attention_mask=attention_mask.to(self.device) if attention_mask is not None else None
             ).logits
         
         # Logits dan token IDs ni olish
         predicted_ids = torch.argmax(logits, dim=-1)
         
         # Decode qilish
-        transcription = self.processor.batch_decode(predicted_ids)[0]
-        
-        return transcription
+        return self.processor.batch_decode(predicted_ids)
     
-    def evaluate_dataset(self, dataset):
+    def evaluate_dataset(self, dataset, batch_size=EvalConfig.TEST_BATCH_SIZE,
+                         num_workers=ModelConfig.NUM_WORKERS):
         """
-        Butun datasetni baholash
+        Butun datasetni baholash (batch bo'yicha)
+        
+        Clip'lar davomiylik bo'yicha tartiblanib batch qilinadi (padding minimal -
+        attention mask qaytarmaydigan wav2vec2-base kabi modellar uchun ham muhim),
+        audio DataLoader worker'larida oldindan tayyorlanadi va natijalar asl
+        tartibga qaytariladi.
         
         Args:
             dataset: Test dataseti
+            batch_size: Batch hajmi
+            num_workers: DataLoader worker'lari (0 - shu jarayonda)
             
         Returns:
             dict: Metrikalar
         """
         print(f"\n{'='*60}")
-        print("Dataset baholanmoqda...")
+        print(f"Dataset baholanmoqda... (batch: {batch_size})")
         print(f"{'='*60}")
         
-        predictions = []
-        references = []
+        batches = length_sorted_batches(compute_durations(dataset), batch_size)
+        loader = DataLoader(
+            dataset,
+            batch_sampler=batches,
+            collate_fn=EvalCollator(self.processor),
+            num_workers=num_workers,
+            prefetch_factor=OptimizationConfig.PREFETCH_FACTOR if num_workers > 0 else None,
+            pin_memory=OptimizationConfig.PIN_MEMORY
+        )
         
-        for sample in tqdm(dataset, desc="Evaluating"):
-            # Audio transkripsiya qilish
-            pred_text = self.transcribe_audio(
-                sample["audio"],
-                sample["sampling_rate"]
-            )
-            
-            predictions.append(pred_text)
-            references.append(sample["text"])
+        predictions = [None] * len(dataset)
+        audio_seconds = 0.0
+        started = time.perf_counter()
         
-        # Metrikalarni hisoblash
-        wer_score = wer(references, predictions)
-        cer_score = cer(references, predictions)
+        for indices, (input_values, attention_mask, seconds) in zip(
+                batches, tqdm(loader, desc="Evaluating", unit="batch")):
+            for idx, pred_text in zip(indices, self.transcribe_inputs(input_values, attention_mask)):
+                predictions[idx] = pred_text
+            audio_seconds += seconds
         
-        results = {
-            "wer": wer_score,
-            "cer": cer_score,
-            "num_samples": len(dataset)
-        }
+        elapsed = time.perf_counter() - started
+        references = dataset.with_format(None)["text"]
+        
+        # Metrikalarni hisoblash (har bir misol bir marta align qilinadi)
+        results = score_transcripts(references, predictions)
+        results.update({
+            "num_samples": len(dataset),
+            "audio_seconds": audio_seconds,
+            "elapsed_seconds": elapsed,
+            # Real-time factor: 1 soniya audio uchun sarflangan vaqt (< 1 - real vaqtdan tez)
+            "rtf": elapsed / audio_seconds if audio_seconds else 0.0
+        })
         
         return results, predictions, references
     
+    @staticmethod
+    def sample_metrics(results, predictions, references, limit=None):
+        """Misollar bo'yicha metrikalar (evaluate_dataset natijasida bo'lsa - qayta hisoblanmaydi)"""
+        samples = results.get('samples')
+        if samples is not None and len(samples) == len(predictions):
+            return samples[:limit]
+        return score_transcripts(references[:limit], predictions[:limit])['samples']
+    
     def display_results(self, results, predictions=None, references=None, num_examples=5):
         """
         Natijalarni ko'rsatish
@@ -150,6 +218,18 @@ class ModelEvaluator:
         print(f"  • WER (Word Error Rate):      {results['wer']:.4f} ({results['wer']*100:.2f}%)")
         print(f"  • CER (Character Error Rate): {results['cer']:.4f} ({results['cer']*100:.2f}%)")
         print(f"  • Test samples:               {results['num_samples']}")
+        if 'rtf' in results:
+            print(f"  • Real-time factor (RTF):     {results['rtf']:.4f} "
+                  f"({results['audio_seconds']:.0f} s audio / {results['elapsed_seconds']:.1f} s)")
+        if 'substitutions' in results:
+            print(f"  • Xatolar (so'z):             almashtirish {results['substitutions']}, "
+                  f"o'chirish {results['deletions']}, qo'shish {results['insertions']} "
+                  f"/ {results['ref_words']} so'z")
+        
+        if results.get('confusions'):
+            print("\n🔀 Eng ko'p chalkashtirilgan so'zlar:")
+            for (ref_word, hyp_word), count in results['confusions'][:10]:
+                print(f"  • {ref_word} → {hyp_word}: {count}")
         
         # Natijalarni baholash
         if results['wer'] < 0.1:
@@ -169,14 +249,14 @@ class ModelEvaluator:
             print(f"MISOLLAR (birinchi {num_examples} ta):")
             print(f"{'='*60}")
             
-            for i in range(min(num_examples, len(predictions))):
+            count = min(num_examples, len(predictions))
+            samples = self.sample_metrics(results, predictions, references, limit=count)
+            
+            for i in range(count):
                 print(f"\n📝 Misol #{i+1}:")
                 print(f"  Asl matn:        {references[i]}")
                 print(f"  Model javobi:    {predictions[i]}")
-                
-                # WER ni hisoblash (bitta misol uchun)
-                sample_wer = wer([references[i]], [predictions[i]])
-                print(f"  WER:             {sample_wer:.4f} ({sample_wer*100:.2f}%)")
+                print(f"  WER:             {samples[i]['wer']:.4f} ({samples[i]['wer']*100:.2f}%)")
     
     def save_results(self, results, predictions, references, output_file="evaluation_results.txt"):
         """
@@ -200,17 +280,32 @@ class ModelEvaluator:
             f.write("📊 METRIKALAR:\n")
             f.write(f"  WER: {results['wer']:.4f} ({results['wer']*100:.2f}%)\n")
             f.write(f"  CER: {results['cer']:.4f} ({results['cer']*100:.2f}%)\n")
-            f.write(f"  Samples: {results['num_samples']}\n\n")
+            f.write(f"  Samples: {results['num_samples']}\n")
+            if 'rtf' in results:
+                f.write(f"  RTF: {results['rtf']:.4f}\n")
+            if 'substitutions' in results:
+                f.write(f"  S/D/I: {results['substitutions']}/{results['deletions']}/"
+                        f"{results['insertions']} ({results['ref_words']} so'z)\n")
+            f.write("\n")
+            
+            if results.get('confusions'):
+                f.write("🔀 CHALKASHTIRILGAN SO'ZLAR:\n")
+                for (ref_word, hyp_word), count in results['confusions']:
+                    f.write(f"  {ref_word} → {hyp_word}: {count}\n")
+                f.write("\n")
             
             f.write("="*60 + "\n")
             f.write("BARCHA NATIJALAR:\n")
             f.write("="*60 + "\n\n")
             
-            for i, (pred, ref) in enumerate(zip(predictions, references)):
+            samples = self.sample_metrics(results, predictions, references)
+            
+            for i, (pred, ref, sample) in enumerate(zip(predictions, references, samples)):
                 f.write(f"Sample #{i+1}:\n")
                 f.write(f"  Reference:   {ref}\n")
                 f.write(f"  Prediction:  {pred}\n")
-                f.write(f"  WER:         {wer([ref], [pred]):.4f}\n")
+                f.write(f"  WER:         {sample['wer']:.4f}  CER: {sample['cer']:.4f}  "
+                        f"S/D/I: {sample['substitutions']}/{sample['deletions']}/{sample['insertions']}\n")
                 f.write("\n")
         
         print(f"\n✓ Natijalar saqlandi: {output_path}")
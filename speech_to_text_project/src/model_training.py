@@ -3,32 +3,86 @@ Speech-to-Text Model O'qitish (CPU Optimized)
 CPU da samarali ishlash uchun optimallashtirilgan
 """
 
+import hashlib
+import json
 import torch
 import torch.nn as nn
+from functools import partial
+from torch.utils.data import DataLoader
 from transformers import (
     Wav2Vec2ForCTC,
     Wav2Vec2Processor,
     Trainer,
     TrainingArguments,
+    TrainerCallback,
     EarlyStoppingCallback
 )
-from datasets import load_from_disk
-import numpy as np
 from dataclasses import dataclass
 from typing import Dict, List, Union
 import warnings
 warnings.filterwarnings('ignore')
 
 from config import (
-    TRAIN_TEST_DIR, CHECKPOINTS_DIR, FINAL_MODEL_DIR,
+    TRAIN_TEST_DIR, CHECKPOINTS_DIR, FINAL_MODEL_DIR, FEATURES_DIR,
     ModelConfig, OptimizationConfig, LogConfig
 )
+from audio_storage import load_audio_dataset, to_float_audio
+from sampler import DurationBatchSampler, load_duration_index, padding_stats
+from asr_metrics import score_transcripts
 
 
 # CPU uchun PyTorch sozlamalari
 torch.set_num_threads(OptimizationConfig.TORCH_NUM_THREADS)
 
 
+def prepare_batch(processor, batch):
+    """
+    Batch uchun feature extraction va tokenizatsiya (dataset.map(batched=True) uchun)
+    
+    Modul darajasida - num_proc > 1 da worker'larga faqat processor yuboriladi, model emas.
+    
+    Args:
+        processor: Wav2Vec2Processor
+        batch: {'audio': [...], 'text': [...], 'sampling_rate': [...]}
+        
+    Returns:
+        dict: input_values va labels ro'yxatlari
+    """
+    # Saqlash formatidan qat'i nazar float32
+    audio = [to_float_audio(value) for value in batch["audio"]]
+    
+    return {
+        "input_values": processor(audio, sampling_rate=batch["sampling_rate"][0]).input_values,
+        "labels": processor(text=batch["text"]).input_ids
+    }
+
+
+def feature_cache_key(dataset, processor):
+    """
+    Feature kesh kaliti: (dataset fingerprint, processor sozlamalari, model nomi)
+    Biror narsa o'zgarsa kalit ham o'zgaradi va feature'lar qayta hisoblanadi.
+    """
+    processor_config = json.dumps({
+        "model": ModelConfig.MODEL_NAME,
+        "feature_extractor": processor.feature_extractor.to_dict(),
+        "vocab": processor.tokenizer.get_vocab()
+    }, sort_keys=True, default=str)
+    
+    return hashlib.sha256(f"{dataset._fingerprint}:{processor_config}".encode()).hexdigest()[:16]
+
+
+def logits_to_ids(logits, labels):
+    """
+    Trainer.preprocess_logits_for_metrics - har bir eval batch logits'i darhol token ID larga
+    
+    Trainer butun validation bo'yicha faqat int ID larni yig'adi (vocab marta kichik),
+    (vaqt x vocab) float32 logits emas.
+    """
+    if isinstance(logits, tuple):
+        logits = logits[0]
+    return torch.argmax(logits, dim=-1)
+
+
 @dataclass
 class DataCollatorCTCWithPadding:
     """
@@ -69,6 +123,49 @@ class DataCollatorCTCWithPadding:
         return batch
 
 
+class SamplerEpochCallback(TrainerCallback):
+    """
+    Har epoch boshida DurationBatchSampler.set_epoch
+
+    accelerate DataLoader.set_epoch ni batch_sampler ga uzatmaydi, shuning uchun
+    epoch shu yerdan beriladi (iteratsiya on_epoch_begin dan keyin boshlanadi).
+    """
+    
+    def __init__(self, batch_sampler):
+        self.batch_sampler = batch_sampler
+    
+    def on_epoch_begin(self, args, state, control, **kwargs):
+        self.batch_sampler.set_epoch(int(state.epoch or 0))
+
+
+class DurationBucketTrainer(Trainer):
+    """
+    Trainer - train batch'lari DurationBatchSampler orqali
+    (o'xshash uzunlikdagi clip'lar, batch hajmi audio soniyalari bilan cheklangan)
+    """
+    
+    def __init__(self, *args, train_durations=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.train_durations = train_durations
+    
+    def get_train_dataloader(self):
+        if self.train_durations is None:
+            return super().get_train_dataloader()
+        
+        train_dataset = self._remove_unused_columns(self.train_dataset, description="training")
+        batch_sampler = DurationBatchSampler(self.train_durations, seed=self.args.seed)
+        self.pop_callback(SamplerEpochCallback)
+        self.add_callback(SamplerEpochCallback(batch_sampler))
+        
+        return self.accelerator.prepare(DataLoader(
+            train_dataset,
+            batch_sampler=batch_sampler,
+            collate_fn=self.data_collator,
+            num_workers=self.args.dataloader_num_workers,
+            pin_memory=self.args.dataloader_pin_memory
+        ))
+
+
 class SpeechToTextTrainer:
     """Model o'qitish klassi"""
     
@@ -121,9 +218,10 @@ class SpeechToTextTrainer:
         print("Datasetlar yuklanmoqda...")
         print(f"{'='*60}")
         
-        train_dataset = load_from_disk(str(TRAIN_TEST_DIR / "train"))
-        valid_dataset = load_from_disk(str(TRAIN_TEST_DIR / "validation"))
-        test_dataset = load_from_disk(str(TRAIN_TEST_DIR / "test"))
+        # Audio (int16 / flac) kirish paytida float32 ga decode qilinadi
+        train_dataset = load_audio_dataset(TRAIN_TEST_DIR / "train")
+        valid_dataset = load_audio_dataset(TRAIN_TEST_DIR / "validation")
+        test_dataset = load_audio_dataset(TRAIN_TEST_DIR / "test")
         
         print(f"✓ Train: {len(train_dataset)} samples")
         print(f"✓ Validation: {len(valid_dataset)} samples")
@@ -133,65 +231,81 @@ class SpeechToTextTrainer:
     
     def prepare_dataset(self, batch):
         """
-        Datasetni training uchun tayyorlash
+        Datasetni training uchun tayyorlash (batch bo'yicha)
         
         Args:
-            batch: Batch ma'lumotlar
+            batch: Batch ma'lumotlar (ustun -> qiymatlar ro'yxati)
             
         Returns:
-            dict: Tayyorlangan batch
+            dict: input_values va labels
         """
-        # Audio ni processing qilish
-        audio = batch["audio"]
-        
-        # Agar numpy array bo'lsa
-        if isinstance(audio, np.ndarray):
-            # Feature extraction
-            batch["input_values"] = self.processor(
-                audio, 
-                sampling_rate=batch["sampling_rate"],
-            ).input_values[0]
-        
-        # Text tokenization
-        with self.processor.as_target_processor():
-            batch["labels"] = self.processor(batch["text"]).input_ids
+        return prepare_batch(self.processor, batch)
+    
+    def prepare_features(self, dataset, split_name):
+        """
+        Feature extraction - ko'p jarayonli, FEATURES_DIR da keshlanadi
         
-        return batch
+        Kesh fayli feature_cache_key bo'yicha nomlanadi: dataset, processor yoki
+        model o'zgarmagan bo'lsa keyingi training'larda qayta hisoblanmaydi.
+        
+        Args:
+            dataset: Qayta ishlangan dataset
+            split_name: Split nomi (kesh fayli uchun)
+            
+        Returns:
+            Dataset: input_values va labels
+        """
+        key = feature_cache_key(dataset, self.processor)
+        cache_file = FEATURES_DIR / f"{split_name}-{key}.arrow"
+        
+        if any(FEATURES_DIR.glob(f"{split_name}-{key}*.arrow")):
+            print(f"✓ {split_name}: keshdan olinadi ({cache_file.name})")
+        
+        return dataset.map(
+            partial(prepare_batch, self.processor),
+            batched=True,
+            batch_size=ModelConfig.FEATURE_BATCH_SIZE,
+            remove_columns=dataset.column_names,
+            num_proc=ModelConfig.FEATURE_NUM_PROC,
+            cache_file_name=str(cache_file),
+            load_from_cache_file=True,
+            desc=f"{split_name} feature'lar"
+        )
     
     def compute_metrics(self, pred):
         """
-        Model metrikalarini hisoblash (WER - Word Error Rate)
+        Model metrikalarini hisoblash (WER va CER)
         
         Args:
-            pred: Prediction natijasi
+            pred: Prediction natijasi (predictions - logits_to_ids dan token ID lar)
             
         Returns:
             dict: Metrikalar
         """
-        from jiwer import wer
-        
-        pred_logits = pred.predictions
-        pred_ids = np.argmax(pred_logits, axis=-1)
+        pad_token_id = self.processor.tokenizer.pad_token_id
+        pred_ids = pred.predictions
         
-        # Padding token'larni olib tashlash
-        pred.label_ids[pred.label_ids == -100] = self.processor.tokenizer.pad_token_id
+        # Batch'lar orasidagi padding (-100) ni pad token ga (CTC decode da tashlanadi)
+        pred_ids[pred_ids == -100] = pad_token_id
+        pred.label_ids[pred.label_ids == -100] = pad_token_id
         
         # Decode qilish
         pred_str = self.processor.batch_decode(pred_ids)
         label_str = self.processor.batch_decode(pred.label_ids, group_tokens=False)
         
-        # WER hisoblash
-        wer_score = wer(label_str, pred_str)
+        # WER va CER (bitta alignment)
+        metrics = score_transcripts(label_str, pred_str)
         
-        return {"wer": wer_score}
+        return {"wer": metrics["wer"], "cer": metrics["cer"]}
     
-    def create_trainer(self, train_dataset, valid_dataset):
+    def create_trainer(self, train_dataset, valid_dataset, train_durations=None):
         """
         Trainer yaratish
         
         Args:
             train_dataset: Train dataseti
             valid_dataset: Validation dataseti
+            train_durations: Train misollari davomiyligi (berilsa - uzunlik bo'yicha guruhlangan batch'lar)
             
         Returns:
             Trainer: Hugging Face Trainer obyekti
@@ -253,20 +367,28 @@ class SpeechToTextTrainer:
             padding=True
         )
         
+        # Uzunlik bo'yicha guruhlash
+        if train_durations is not None:
+            bucketed = padding_stats(DurationBatchSampler(train_durations).batches(), train_durations)
+            print(f"✓ Batch'lar: <= {ModelConfig.MAX_BATCH_SECONDS} s audio, "
+                  f"padding {bucketed['padding_ratio']*100:.1f}%")
+        
         # Trainer yaratish
-        trainer = Trainer(
+        trainer = DurationBucketTrainer(
             model=self.model,
             args=training_args,
             train_dataset=train_dataset,
             eval_dataset=valid_dataset,
             data_collator=data_collator,
             compute_metrics=self.compute_metrics,
+            preprocess_logits_for_metrics=logits_to_ids,
             tokenizer=self.processor.feature_extractor,
             callbacks=[
                 EarlyStoppingCallback(
                     early_stopping_patience=ModelConfig.EARLY_STOPPING_PATIENCE
                 )
-            ]
+            ],
+            train_durations=train_durations
         )
         
         print("✓ Trainer tayyor")
@@ -284,24 +406,20 @@ class SpeechToTextTrainer:
         # Datasetlarni yuklash
         train_dataset, valid_dataset, test_dataset = self.load_datasets()
         
-        # Datasetlarni tayyorlash
-        print("\nDatasetlar tayyorlanmoqda...")
-        train_dataset = train_dataset.map(
-            self.prepare_dataset,
-            remove_columns=train_dataset.column_names,
-            num_proc=1
-        )
+        # Davomiylik indeksi (map qatorlar tartibini o'zgartirmaydi)
+        train_durations = None
+        if ModelConfig.GROUP_BY_DURATION:
+            train_durations = load_duration_index(TRAIN_TEST_DIR / "train", train_dataset)
         
-        valid_dataset = valid_dataset.map(
-            self.prepare_dataset,
-            remove_columns=valid_dataset.column_names,
-            num_proc=1
-        )
+        # Datasetlarni tayyorlash (kesh bo'lsa - qayta hisoblanmaydi)
+        print("\nDatasetlar tayyorlanmoqda...")
+        train_dataset = self.prepare_features(train_dataset, "train")
+        valid_dataset = self.prepare_features(valid_dataset, "validation")
         
         print("✓ Datasetlar tayyor")
         
         # Trainer yaratish
-        trainer = self.create_trainer(train_dataset, valid_dataset)
+        trainer = self.create_trainer(train_dataset, valid_dataset, train_durations)
         
         # Training
         print(f"\n{'='*60}")
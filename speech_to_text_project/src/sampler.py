@@ -0,0 +1,177 @@
+"""
+Davomiylik indeksi va uzunlik bo'yicha guruhlangan batch sampler
+Tasodifiy sampler da 1 va 30 soniyalik clip'lar bitta batchga tushadi va
+DataCollatorCTCWithPadding hammasini eng uzunigacha to'ldiradi - CPU vaqtining
+katta qismi padding ga ketadi. DurationBatchSampler o'xshash uzunlikdagi
+clip'larni birlashtiradi va batch hajmini clip soni emas, audio soniyalari
+bilan cheklaydi.
+"""
+
+import numpy as np
+import pyarrow.compute as pc
+from pathlib import Path
+from torch.utils.data import Sampler
+
+from config import AudioConfig, ModelConfig
+
+
+DURATION_INDEX_FILE = "durations.npy"
+
+
+def compute_durations(dataset):
+    """
+    Har bir misol davomiyligi (soniya) - audio decode qilinmaydi
+
+    duration ustuni bo'lsa undan, bo'lmasa (eski datasetlar) audio ro'yxati
+    uzunligidan (Arrow offset'lari) hisoblanadi.
+    """
+    # "arrow" formatida ustun select/split indekslari bilan, python obyektlarisiz qaytadi
+    table = dataset.with_format("arrow")
+
+    if 'duration' in dataset.column_names:
+        durations = table['duration'].to_numpy()
+    else:
+        durations = pc.list_value_length(table['audio']).to_numpy() / AudioConfig.SAMPLE_RATE
+
+    return np.asarray(durations, dtype=np.float32)
+
+
+def save_duration_index(dataset, path):
+    """Davomiylik indeksini dataset papkasiga saqlash (save_to_disk dan keyin)"""
+    durations = compute_durations(dataset)
+    np.save(Path(path) / DURATION_INDEX_FILE, durations)
+    return durations
+
+
+def load_duration_index(path, dataset=None):
+    """
+    Davomiylik indeksini o'qish
+
+    Args:
+        path: Dataset papkasi
+        dataset: Indeks yo'q yoki mos kelmasa qayta hisoblash uchun
+
+    Returns:
+        numpy array yoki None
+    """
+    index_path = Path(path) / DURATION_INDEX_FILE
+
+    if index_path.exists():
+        durations = np.load(index_path)
+        if dataset is None or len(durations) == len(dataset):
+            return durations
+
+    if dataset is None:
+        return None
+
+    return save_duration_index(dataset, path)
+
+
+def padding_stats(batches, durations):
+    """
+    Batch'lar bo'yicha padding ulushi
+
+    Returns:
+        dict: haqiqiy va padding bilan audio soniyalari, padding ulushi
+    """
+    real = padded = 0.0
+    for batch in batches:
+        batch_durations = durations[batch]
+        real += float(batch_durations.sum())
+        padded += float(batch_durations.max()) * len(batch)
+
+    return {
+        'real_seconds': round(real, 1),
+        'padded_seconds': round(padded, 1),
+        'padding_ratio': round(1 - real / padded, 4) if padded else 0.0
+    }
+
+
+class DurationBatchSampler(Sampler):
+    """
+    Audio soniyalari bo'yicha cheklangan, uzunlik bo'yicha guruhlangan batch'lar
+
+    Har epoch: indekslar aralashtiriladi, bucket_size * o'rtacha batch hajmidagi
+    bo'laklarga bo'linadi, har bir bo'lak ichida davomiylik bo'yicha tartiblanadi va
+    batch'larga ajratiladi (batch_len * eng_uzun_clip <= max_batch_seconds).
+    So'ngra batch'lar tartibi ham aralashtiriladi - tasodifiylik saqlanadi.
+
+    Epoch faqat set_epoch() orqali o'zgaradi (Trainer da SamplerEpochCallback),
+    batch'lar epoch bo'yicha keshlanadi: len() va iteratsiya bir xil batch'larni ko'radi.
+    """
+
+    def __init__(self, durations, max_batch_seconds=ModelConfig.MAX_BATCH_SECONDS,
+                 bucket_size=ModelConfig.BUCKET_SIZE, shuffle=True, seed=42):
+        """
+        Args:
+            durations: Har bir misol davomiyligi (soniya)
+            max_batch_seconds: Padding bilan batchdagi maksimal audio soniyalari
+            bucket_size: Bitta tartiblanadigan bo'lakdagi batch'lar soni
+            shuffle: Aralashtirish (validation uchun False)
+            seed: Random seed
+        """
+        self.durations = np.asarray(durations, dtype=np.float32)
+        self.max_batch_seconds = max_batch_seconds
+        self.bucket_size = bucket_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+        self._batches = None
+
+    def set_epoch(self, epoch):
+        """Epoch raqami (har epoch da boshqacha aralashtirish)"""
+        if epoch != self.epoch:
+            self.epoch = epoch
+            self._batches = None
+
+    def _split(self, indices):
+        """Tartiblangan indekslarni soniya chegarasi bo'yicha batch'larga ajratish"""
+        batches = []
+        batch = []
+        longest = 0.0
+
+        for idx in indices:
+            duration = float(self.durations[idx])
+            longest_with = max(longest, duration)
+            if batch and longest_with * (len(batch) + 1) > self.max_batch_seconds:
+                batches.append(batch)
+                batch, longest_with = [], duration
+            batch.append(int(idx))
+            longest = longest_with
+
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def batches(self):
+        """Joriy epoch batch'lari"""
+        if self._batches is not None:
+            return self._batches
+
+        if not self.shuffle:
+            self._batches = self._split(np.argsort(self.durations, kind='stable'))
+            return self._batches
+
+        rng = np.random.default_rng(self.seed + self.epoch)
+        indices = rng.permutation(len(self.durations))
+
+        # Bo'lak hajmi: bucket_size ta o'rtacha batch
+        mean_duration = float(self.durations.mean()) if len(self.durations) else 1.0
+        per_batch = max(1, int(self.max_batch_seconds // max(mean_duration, 1e-3)))
+        chunk = per_batch * self.bucket_size
+
+        batches = []
+        for start in range(0, len(indices), chunk):
+            part = indices[start:start + chunk]
+            part = part[np.argsort(self.durations[part], kind='stable')]
+            batches.extend(self._split(part))
+
+        order = rng.permutation(len(batches))
+        self._batches = [batches[i] for i in order]
+        return self._batches
+
+    def __iter__(self):
+        return iter(self.batches())
+
+    def __len__(self):
+        return len(self.batches())
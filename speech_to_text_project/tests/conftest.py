@@ -0,0 +1,13 @@
+"""
+Pytest sozlamalari - src/ modullari va config.py loyiha ildizidan import qilinadi
+(src/ dagi skriptlar ham shunday ishga tushadi)
+
+Ishlatish (speech_to_text_project papkasidan):
+    python -m pytest tests
+"""
+import os
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+sys.path.insert(0, os.path.join(PROJECT_DIR, "src"))
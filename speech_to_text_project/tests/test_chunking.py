@@ -0,0 +1,64 @@
+"""
+chunk_spans - kontekst tashlangandan keyin bo'laklar audio ni bo'shliqsiz va
+takrorlanmasdan qoplaydi (transcribe_long stitching shunga tayanadi)
+"""
+import pytest
+
+for module in ("torch", "librosa", "soundfile", "transformers"):
+    pytest.importorskip(module)
+
+from inference import chunk_spans  # noqa: E402
+
+CHUNK = 320
+STRIDE = 64
+
+
+def kept_ranges(spans):
+    """Har bir bo'lakdan chet kontekstlari tashlangandan keyin qolgan qism"""
+    return [(start + left, end - right) for start, end, left, right in spans]
+
+
+@pytest.mark.parametrize("num_samples", [
+    1, STRIDE, CHUNK - 1, CHUNK, CHUNK + 1,
+    CHUNK - 2 * STRIDE + CHUNK, 2 * CHUNK, 2 * CHUNK + 1, 10 * CHUNK + 7, 12345
+])
+def test_kept_ranges_cover_audio_exactly(num_samples):
+    spans = chunk_spans(num_samples, CHUNK, STRIDE)
+    kept = kept_ranges(spans)
+
+    # Boshidan oxirigacha bo'shliqsiz va qoplanmasdan
+    assert kept[0][0] == 0
+    assert kept[-1][1] == num_samples
+    for (_, previous_end), (next_start, _) in zip(kept, kept[1:]):
+        assert previous_end == next_start
+    assert all(start < end for start, end in kept)
+    assert sum(end - start for start, end in kept) == num_samples
+
+
+@pytest.mark.parametrize("num_samples", [CHUNK - 1, CHUNK, CHUNK + 1, 5 * CHUNK + 3])
+def test_span_bounds(num_samples):
+    spans = chunk_spans(num_samples, CHUNK, STRIDE)
+
+    for index, (start, end, left, right) in enumerate(spans):
+        assert 0 <= start < end <= num_samples
+        assert end - start <= CHUNK
+        # Chet konteksti faqat qo'shni bo'lak bor tomonda
+        assert left == (STRIDE if index > 0 else 0)
+        assert right == (STRIDE if index < len(spans) - 1 else 0)
+
+
+def test_exact_chunk_is_single_span():
+    assert chunk_spans(CHUNK, CHUNK, STRIDE) == [(0, CHUNK, 0, 0)]
+
+
+def test_one_sample_over_chunk():
+    step = CHUNK - 2 * STRIDE
+    assert chunk_spans(CHUNK + 1, CHUNK, STRIDE) == [
+        (0, CHUNK, 0, STRIDE),
+        (step, CHUNK + 1, STRIDE, 0)
+    ]
+
+
+def test_stride_too_large():
+    with pytest.raises(ValueError):
+        chunk_spans(1000, CHUNK, CHUNK // 2)
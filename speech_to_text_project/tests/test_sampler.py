@@ -0,0 +1,82 @@
+"""
+DurationBatchSampler - soniya chegarasi, har bir indeks bir marta, epoch boshqaruvi
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("torch")
+pytest.importorskip("pyarrow")
+
+from sampler import DurationBatchSampler  # noqa: E402
+
+
+def random_durations(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0.5, 30.0, size=count).astype(np.float32)
+
+
+def assert_valid(batches, durations, max_batch_seconds):
+    flat = [idx for batch in batches for idx in batch]
+    # Har bir indeks aynan bir marta
+    assert sorted(flat) == list(range(len(durations)))
+
+    for batch in batches:
+        assert batch
+        padded = float(durations[batch].max()) * len(batch)
+        # Bitta clip chegaradan uzun bo'lsa ham o'z batch'ida yolg'iz qoladi
+        assert padded <= max_batch_seconds or len(batch) == 1
+
+
+@pytest.mark.parametrize("max_batch_seconds", [30.0, 60.0, 200.0])
+def test_split_respects_limit_and_covers_all(max_batch_seconds):
+    durations = random_durations(500)
+    sampler = DurationBatchSampler(durations, max_batch_seconds=max_batch_seconds, shuffle=False)
+
+    batches = sampler._split(np.argsort(durations, kind='stable'))
+    assert_valid(batches, durations, max_batch_seconds)
+
+
+def test_split_unsorted_and_oversized():
+    durations = np.array([5.0, 45.0, 1.0, 20.0, 20.0, 2.0, 50.0], dtype=np.float32)
+    sampler = DurationBatchSampler(durations, max_batch_seconds=40.0, shuffle=False)
+
+    batches = sampler._split(np.arange(len(durations)))
+    assert_valid(batches, durations, 40.0)
+    assert [1] in batches and [6] in batches
+
+
+def test_split_exact_limit():
+    durations = np.full(8, 10.0, dtype=np.float32)
+    sampler = DurationBatchSampler(durations, max_batch_seconds=40.0, shuffle=False)
+
+    assert sampler._split(np.arange(8)) == [[0, 1, 2, 3], [4, 5, 6, 7]]
+
+
+def test_shuffled_batches_valid():
+    durations = random_durations(1000, seed=1)
+    sampler = DurationBatchSampler(durations, max_batch_seconds=60.0, bucket_size=4, seed=7)
+    assert_valid(sampler.batches(), durations, 60.0)
+
+
+def test_epoch_only_changes_via_set_epoch():
+    durations = random_durations(300, seed=2)
+    sampler = DurationBatchSampler(durations, max_batch_seconds=60.0, bucket_size=2, seed=3)
+
+    length = len(sampler)
+    first = list(sampler)
+    second = list(sampler)
+
+    # Iteratsiya epoch ni o'zgartirmaydi - len() va batch'lar bir xil
+    assert sampler.epoch == 0
+    assert first == second
+    assert len(first) == length == len(sampler)
+
+    sampler.set_epoch(1)
+    next_epoch = list(sampler)
+    assert next_epoch != first
+    assert len(next_epoch) == len(sampler)
+    assert_valid(next_epoch, durations, 60.0)
+
+    # Bir xil epoch - bir xil aralashtirish (seed + epoch)
+    sampler.set_epoch(0)
+    assert list(sampler) == first